@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Latency of compound questions: split into concurrent parts vs one single prompt
+Runs the same multi-person / multi-topic queries through RAGPipeline.process_query
+twice against the offline mock LLM backend, with caches off so every run generates
+
+Usage (from backend/):
+    python benchmarks/compound_queries.py --rounds 5
+    python benchmarks/compound_queries.py --latency-ms 600 --tokens-per-second 150
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Mock backend unless the caller explicitly asks for something else
+os.environ.setdefault("LLM_BACKEND", "mock")
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
+
+COMPOUND_QUERIES = [
+    "Who is Asad and what are Adil's skills?",
+    "What are Adil's projects and skills?",
+    "Tell me about Adil's education and also his projects",
+    "Who is Saad Khan and who is Adil Saeed?",
+    "What is Adil's experience, skills and education?",
+]
+
+async def measure(pipeline, queries, rounds):
+    """Per-query latencies in milliseconds over several rounds"""
+    latencies = []
+    for _ in range(rounds):
+        for i, query in enumerate(queries):
+            started = time.perf_counter()
+            await pipeline.process_query(query, "en", f"bench_compound_{i}")
+            latencies.append((time.perf_counter() - started) * 1000)
+    return latencies
+
+async def run(args):
+    from config.settings import settings
+
+    settings.MOCK_LLM_LATENCY_MS = args.latency_ms
+    settings.MOCK_LLM_TOKENS_PER_SECOND = args.tokens_per_second
+    settings.GROQ_REQUESTS_PER_MINUTE = args.rpm
+    settings.RESPONSE_CACHE_ENABLED = False
+    settings.SEMANTIC_CACHE_ENABLED = False
+
+    from services.rag_pipeline import RAGPipeline
+
+    pipeline = RAGPipeline()
+    await pipeline.initialize()
+
+    results = {}
+    for label, enabled in (("single prompt", False), ("split parts", True)):
+        settings.QUERY_SPLITTING_ENABLED = enabled
+        results[label] = await measure(pipeline, COMPOUND_QUERIES, args.rounds)
+
+    split_stats = pipeline.get_pipeline_stats()["query_splitting"]
+    await pipeline.close()
+
+    print(f"\nCompound queries: {len(COMPOUND_QUERIES)}  Rounds: {args.rounds}  "
+          f"Mock LLM: {args.latency_ms:.0f}ms + {args.tokens_per_second:.0f} tok/s")
+    for label, latencies in results.items():
+        print(f"{label:>14}: mean={statistics.mean(latencies):.1f}ms "
+              f"median={statistics.median(latencies):.1f}ms max={max(latencies):.1f}ms")
+    speedup = statistics.mean(results["single prompt"]) / statistics.mean(results["split parts"])
+    print(f"Speedup from splitting: {speedup:.2f}x  ({split_stats['parts']} parts over "
+          f"{split_stats['compound_queries']} compound queries)")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=400)
+    parser.add_argument("--rpm", type=int, default=100000,
+                        help="Gateway request pacing (default effectively unpaced)")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
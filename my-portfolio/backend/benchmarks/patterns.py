@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark suite: per-request CPU of the regex rule sets
+"per-pattern" replays the old loops (one re.search / re.sub per raw pattern string, relying on
+the re module's internal cache); "registry" uses the precompiled alternations from
+utils.pattern_registry. Both must produce identical results on every query before timing
+
+Usage (from backend/):
+    python benchmarks/patterns.py --iterations 20000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+# Nothing here calls an LLM; the mock backend just avoids needing a Groq key
+os.environ.setdefault("LLM_BACKEND", "mock")
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
+
+QUERIES = [
+    "Who is Adeel Saeed?",
+    "What are Adil's technical skils and projets?",
+    "How can I contect him on linkdin?",
+    "tell me about his coding expertise and career",
+    "what is your name",
+    "what is the capital of france",
+    "how do I kill process in linux",
+    "buy now!!! click this link for a discount",
+    "aaaaaaaaaaaa",
+    "'; drop table users; --",
+    "which university did he study at and what are his abilities",
+    "adil saeed kon hai",
+]
+
+# Five remembered user turns per session, scanned newest first
+TURNS = [
+    {'role': 'user', 'content': "What projects has he built?"},
+    {'role': 'user', 'content': "Which programming languages does he know?"},
+    {'role': 'user', 'content': "Who is his friend Saad?"},
+    {'role': 'user', 'content': "Where did he study?"},
+    {'role': 'user', 'content': "How can I email him?"},
+]
+
+def old_safety(checker, query):
+    query_lower = query.lower().strip()
+    return (
+        any(re.search(p, query_lower, re.IGNORECASE) for p in checker.spam_indicators_raw),
+        any(re.search(p, query_lower, re.IGNORECASE) for p in checker.harmful_patterns),
+        any(re.search(p, query, re.IGNORECASE) for p in checker.injection_patterns)
+    )
+
+def new_safety(checker, query):
+    query_lower = query.lower().strip()
+    return (
+        checker._is_spam(query_lower),
+        not checker._check_harmful_content(query_lower).is_safe,
+        checker._has_injection_attempt(query_lower)
+    )
+
+def old_preproc(preproc, query):
+    text = query
+    for pattern, replacement in preproc.corrections.items():
+        text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
+    text_lower = text.lower()
+    for standard_term, synonyms in preproc.concept_map.items():
+        for synonym in synonyms:
+            pattern = r'\b' + re.escape(synonym) + r'\b'
+            if re.search(pattern, text_lower):
+                text = re.sub(pattern, standard_term, text, flags=re.IGNORECASE)
+    return text
+
+def new_preproc(preproc, query):
+    return preproc._normalize_concepts(preproc._apply_corrections(query))
+
+def old_memory(memory, query):
+    last_entity, topics = 'adil', []
+    for turn in reversed(TURNS):
+        content = turn['content'].lower()
+        found = [e for e, patterns in memory.entity_patterns.items() if any(re.search(p, content) for p in patterns)]
+        if found:
+            last_entity = found[0]
+            break
+    for turn in TURNS[-3:]:
+        content = turn['content'].lower()
+        for topic, patterns in memory.entity_patterns.items():
+            if any(re.search(p, content) for p in patterns) and topic not in topics:
+                topics.append(topic)
+    pronouns = [r'\bhe\b', r'\bhis\b', r'\bhim\b', r'\bthat\b', r'\bthis\b', r'\bit\b']
+    return last_entity, topics, any(re.search(p, query.lower()) for p in pronouns)
+
+def new_memory(memory, query):
+    return memory._get_last_entity(TURNS), memory._get_recent_topics(TURNS), memory.should_resolve_coreference(query)
+
+# Chatbot patterns as they were before they were labelled by persona intent
+OLD_CHATBOT_PATTERNS = [
+    r'what.*your name', r'who.*you', r'how old.*you', r'who created you',
+    r'tell me about yourself', r'are you', r'what are you'
+]
+
+def old_routing(pipeline, query):
+    normalized = query.lower()
+    return (
+        any(re.search(p, normalized) for p in pipeline.GENERAL_PATTERNS),
+        any(re.search(p, normalized) for p in OLD_CHATBOT_PATTERNS)
+    )
+
+def new_routing(pipeline, query):
+    normalized = query.lower()
+    return (
+        pipeline.general_set.contains(normalized),
+        pipeline._is_chatbot_personal_query(normalized)
+    )
+
+def measure(fn, target, iterations):
+    """Mean microseconds per query"""
+    started = time.process_time()
+    for i in range(iterations):
+        fn(target, QUERIES[i % len(QUERIES)])
+    return (time.process_time() - started) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    from services.safety import SafetyChecker
+    from services.memory import ConversationMemory
+    from services.rag_pipeline import RAGPipeline
+    from utils.text_preproc import TextPreprocessor
+
+    checker = SafetyChecker()
+    # The old spam rule used a numbered backreference
+    checker.spam_indicators_raw = [r'(.)\1{8,}'] + checker.spam_indicators[1:]
+
+    suites = [
+        ("safety", old_safety, new_safety, checker),
+        ("preprocessor", old_preproc, new_preproc, TextPreprocessor()),
+        ("memory", old_memory, new_memory, ConversationMemory()),
+        ("routing", old_routing, new_routing, RAGPipeline()),
+    ]
+
+    for name, old, new, target in suites:
+        for query in QUERIES:
+            if old(target, query) != new(target, query):
+                raise SystemExit(f"{name}: results differ for {query!r}: {old(target, query)} vs {new(target, query)}")
+
+    print(f"\nRegex rule sets, CPU per query over {args.iterations} queries")
+    print(f"  {'suite':<14}{'per-pattern':>14}{'registry':>12}{'reduction':>12}")
+    total_before = total_after = 0.0
+    for name, old, new, target in suites:
+        measure(old, target, 500)  # warm up
+        measure(new, target, 500)
+        before = measure(old, target, args.iterations)
+        after = measure(new, target, args.iterations)
+        total_before += before
+        total_after += after
+        print(f"  {name:<14}{before:>12.1f}us{after:>10.1f}us{(1 - after / before) * 100:>11.0f}%")
+    print(f"  {'per request':<14}{total_before:>12.1f}us{total_after:>10.1f}us"
+          f"{(1 - total_after / total_before) * 100:>11.0f}%")
+
+if __name__ == "__main__":
+    main()
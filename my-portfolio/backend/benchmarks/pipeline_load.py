@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Load test for RAGPipeline.process_query against the offline mock LLM backend
+Measures the real overhead of retrieval, formatting and caching without spending Groq quota
+
+Usage (from backend/):
+    python benchmarks/pipeline_load.py --requests 200 --concurrency 20
+    python benchmarks/pipeline_load.py --no-cache --latency-ms 500 --failure-rate 0.05
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Mock backend unless the caller explicitly asks for something else
+os.environ.setdefault("LLM_BACKEND", "mock")
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
+
+DEFAULT_QUERIES = [
+    "Who is Adil Saeed?",
+    "What projects has Adil worked on?",
+    "How can I contact Adil?",
+    "Tell me about Adil's education",
+    "What are Adil's technical skills?",
+    "What is your name?",
+    "What is 2+2?",
+    "adil saeed kon hai",
+]
+
+def load_queries(qa_log: Path, limit: int):
+    """Unique user queries from the QA log, falling back to a canned list"""
+    queries = []
+    if qa_log.exists():
+        with open(qa_log, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    query = json.loads(line).get("query", "").strip()
+                except json.JSONDecodeError:
+                    continue
+                if query and query not in queries:
+                    queries.append(query)
+    return (queries or DEFAULT_QUERIES)[:limit]
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def run(args):
+    from config.settings import settings
+
+    settings.MOCK_LLM_LATENCY_MS = args.latency_ms
+    settings.MOCK_LLM_TOKENS_PER_SECOND = args.tokens_per_second
+    settings.MOCK_LLM_FAILURE_RATE = args.failure_rate
+    settings.GROQ_REQUESTS_PER_MINUTE = args.rpm
+    if args.no_cache:
+        settings.RESPONSE_CACHE_ENABLED = False
+        settings.SEMANTIC_CACHE_ENABLED = False
+
+    from services.rag_pipeline import RAGPipeline
+
+    pipeline = RAGPipeline()
+    await pipeline.initialize()
+
+    queries = load_queries(backend_dir / "services" / "qa_log.jsonl", args.unique)
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def one(i):
+        async with semaphore:
+            started = time.perf_counter()
+            await pipeline.process_query(queries[i % len(queries)], "en", f"bench_{i}")
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    wall = time.perf_counter() - wall_start
+
+    stats = pipeline.get_pipeline_stats()
+    await pipeline.close()
+
+    llm_models = stats.get("llm", {}).get("models", {})
+    llm_calls = sum(m["successes"] for m in llm_models.values())
+    llm_ms = sum(m["avg_latency_ms"] * m["successes"] for m in llm_models.values())
+
+    print(f"\nRequests: {args.requests}  Concurrency: {args.concurrency}  Unique queries: {len(queries)}")
+    print(f"Throughput: {args.requests / wall:.1f} req/s  (wall {wall:.2f}s)")
+    print(f"Latency ms: mean={statistics.mean(latencies):.1f} p50={percentile(latencies, 50):.1f} "
+          f"p95={percentile(latencies, 95):.1f} p99={percentile(latencies, 99):.1f}")
+    print(f"LLM calls: {llm_calls}  mean LLM time per request: {llm_ms / args.requests:.1f}ms")
+    print(f"Pipeline overhead per request (excluding LLM): "
+          f"{statistics.mean(latencies) - llm_ms / args.requests:.1f}ms")
+    if args.verbose:
+        print(json.dumps(stats, indent=2, default=str))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--unique", type=int, default=50, help="Max distinct queries to cycle through")
+    parser.add_argument("--latency-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=400)
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--rpm", type=int, default=100000,
+                        help="Gateway request pacing (default effectively unpaced)")
+    parser.add_argument("--no-cache", action="store_true", help="Disable response caches")
+    parser.add_argument("--verbose", action="store_true", help="Print full pipeline stats")
+    asyncio.run(run(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
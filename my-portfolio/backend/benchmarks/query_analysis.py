@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: per-request CPU spent analysing the query text
+"repeated" replays the per-component logic as it was before QueryAnalysis (each routing check
+re-normalizes with the old typo dictionary and rescans its own keyword list, people are found
+with one regex per name, the length is predicted from scratch); "shared" builds one
+QueryAnalysis with the current pipeline and lets the same consumers read from it
+
+Usage (from backend/):
+    python benchmarks/query_analysis.py --iterations 20000
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+# Nothing here calls an LLM; the mock backend just avoids needing a Groq key
+os.environ.setdefault("LLM_BACKEND", "mock")
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
+
+QUERIES = [
+    "Who is Adil Saeed?",
+    "What are Adil's technical skills and projects?",
+    "How can I contact Adil?",
+    "Show me pictures of Adil's OCR project",
+    "Who is Asad and what are Adil's skills?",
+    "tell me about adil's education in detail",
+    "What is your name?",
+    "adil saeed kon hai",
+]
+
+# The per-component keyword lists and helpers as they were before QueryAnalysis
+OLD_TYPO_FIXES = {
+    'adeel': 'adil', 'contct': 'contact', 'porjects': 'projects',
+    'skils': 'skills', 'skill': 'skills', 'eduction': 'education',
+    'experiance': 'experience', 'mobil': 'mobile', 'phon': 'phone',
+    'socila': 'social', 'mdeia': 'media', 'acounts': 'accounts',
+    'linkedin': 'linkedin', 'github': 'github'
+}
+OLD_SEMANTIC_MAP = {
+    'social_media': ['social', 'media', 'links', 'profiles', 'accounts', 'platforms'],
+    'contact_info': ['contact', 'reach', 'get in touch', 'find', 'connect', 'email'],
+    'technical_skills': ['skills', 'technologies', 'programming', 'languages', 'tools', 'tech'],
+    'projects_work': ['projects', 'work', 'built', 'developed', 'created', 'portfolio'],
+    'education_background': ['education', 'study', 'university', 'degree', 'academic'],
+    'professional_experience': ['experience', 'job', 'work', 'career', 'internship'],
+    'personal_info': ['about', 'who is', 'tell me', 'background', 'story']
+}
+OLD_PORTFOLIO_TERMS = [
+    'adil', 'portfolio', 'projects', 'skills', 'education', 'experience',
+    'contact', 'github', 'linkedin', 'university', 'degree', 'programming',
+    'asad ali', 'sir ali imran', 'brother', 'mentor', 'giki', 'imsciences',
+    'chatbot', 'ocr', 'internship', 'bootcamp', 'social', 'media'
+]
+OLD_GENERAL_PATTERNS = [
+    r'capital of', r'weather', r'temperature', r'president', r'prime minister',
+    r'how to make', r'recipe', r'currency of', r'population of'
+]
+OLD_PERSONAL_PATTERNS = [
+    r'what.*your name', r'who.*you', r'how old.*you', r'who created you',
+    r'tell me about yourself', r'are you', r'what are you'
+]
+OLD_PERSON_PATTERNS = {
+    'adil': ['adil', 'saeed', 'adil saeed', 'creator', 'your'],
+    'asad': ['asad', 'asad ali', 'brother'],
+    'saad': ['saad', 'saad khan', 'saad ahmad'],
+    'rohail': ['rohail'],
+    'daud': ['daud', 'daud khan'],
+    'umer': ['umer', 'umer khan'],
+    'hasnain': ['hasnain']
+}
+OLD_SHORT_KEYWORDS = [
+    'briefly', 'quick', 'short', 'just tell', 'simply', 'who is', 'what is', 'when', 'where',
+    'which', 'yes or no', 'name of', 'how many', 'how much'
+]
+OLD_DETAILED_KEYWORDS = [
+    'explain', 'describe', 'tell me about', 'elaborate', 'detailed', 'comprehensive',
+    'thoroughly', 'in depth', 'how does', 'why', 'process', 'methodology', 'all about'
+]
+OLD_IMAGE_KEYWORDS = [
+    'show me', 'picture', 'photo', 'image', 'pic', 'screenshot',
+    'look like', 'appearance', 'face', 'portrait', 'visual'
+]
+
+def old_normalize(query):
+    normalized = query.lower().strip()
+    for typo, fix in OLD_TYPO_FIXES.items():
+        normalized = normalized.replace(typo, fix)
+    return normalized
+
+def old_is_chatbot(query):
+    normalized = old_normalize(query)
+    return any(re.search(pattern, normalized) for pattern in OLD_PERSONAL_PATTERNS)
+
+def old_is_general(query):
+    normalized = old_normalize(query)
+    if re.search(r'\d+\s*[\+\-\*\/]\s*\d+', normalized):
+        return True
+    is_general = any(re.search(pattern, normalized) for pattern in OLD_GENERAL_PATTERNS)
+    is_about_adil = any(term in normalized for term in ['adil', 'portfolio', 'his', 'him'])
+    return is_general and not is_about_adil
+
+def old_is_portfolio(query):
+    normalized = old_normalize(query)
+    return any(term in normalized for term in OLD_PORTFOLIO_TERMS)
+
+def old_intents(query):
+    normalized = old_normalize(query)
+    return [intent for intent, keywords in OLD_SEMANTIC_MAP.items()
+            if any(keyword in normalized for keyword in keywords)]
+
+def old_detect_people(query):
+    query_lower = query.lower()
+    people = []
+    for person, patterns in OLD_PERSON_PATTERNS.items():
+        for pattern in patterns:
+            if ((person == 'adil' and pattern in query_lower)
+                    or re.search(rf'\b{re.escape(pattern)}\b', query_lower)):
+                people.append(person)
+                break
+    return people
+
+def old_predict_length(query):
+    query_lower = query.lower()
+    if any(keyword in query_lower for keyword in OLD_DETAILED_KEYWORDS):
+        return 'detailed'
+    if any(keyword in query_lower for keyword in OLD_SHORT_KEYWORDS):
+        return 'short'
+    word_count = len(query.split())
+    return 'detailed' if word_count > 10 else 'short' if word_count < 4 else 'medium'
+
+def repeated(pipeline, query):
+    """The old per-request pattern: every component re-derives what it needs"""
+    query.lower().strip()                                                    # safety check
+    normalized = old_normalize(query)                                        # process_query
+    if not old_is_chatbot(query):                                            # keyword routing
+        if not (old_is_general(query) and not old_is_portfolio(query)):
+            old_intents(query)
+    old_detect_people(query)                                                 # query splitting
+    old_predict_length(query)                                                # generation budget
+    any(keyword in query.lower() for keyword in OLD_IMAGE_KEYWORDS)          # images
+    return normalized
+
+def shared(pipeline, query):
+    """One QueryAnalysis, read by the same consumers"""
+    analysis = pipeline.analyze_query(query)
+    analysis.lowered                                                         # safety check
+    pipeline._route_by_keywords(analysis)                                    # keyword routing
+    analysis.people, analysis.length_class, analysis.wants_images            # splitter, budget, images
+    return analysis.normalized
+
+def measure(fn, pipeline, iterations):
+    """Mean microseconds per request"""
+    started = time.process_time()
+    for i in range(iterations):
+        fn(pipeline, QUERIES[i % len(QUERIES)])
+    return (time.process_time() - started) / iterations * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    from services.rag_pipeline import RAGPipeline
+
+    # Only the text-analysis helpers are exercised; nothing else is initialized
+    pipeline = RAGPipeline()
+    pipeline._register_corpus_vocabulary()
+
+    for fn in (repeated, shared):
+        measure(fn, pipeline, 500)  # warm up
+
+    before = measure(repeated, pipeline, args.iterations)
+    after = measure(shared, pipeline, args.iterations)
+
+    print(f"\nQuery analysis CPU per request over {args.iterations} requests")
+    print(f"  repeated per component: {before:.1f}us")
+    print(f"  shared QueryAnalysis:   {after:.1f}us")
+    print(f"  reduction:              {(1 - after / before) * 100:.0f}%")
+
+if __name__ == "__main__":
+    main()
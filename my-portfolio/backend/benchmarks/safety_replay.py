@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Safety-check throughput over the qa_log.jsonl history
+"one by one" calls check_query per query with the verdict cache off; "check_many" hands the
+whole history to SafetyChecker.check_many with the cache on (cold, then warm). Verdicts must match
+
+Usage (from backend/):
+    python benchmarks/safety_replay.py --copies 20
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Nothing here calls an LLM; the mock backend just avoids needing a Groq key
+os.environ.setdefault("LLM_BACKEND", "mock")
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
+
+# Mixed in so every rejection path is exercised
+REJECTED = [
+    "", "?", "x" * 600, "aaaaaaaaaaaa", "buy now and click this link", "how do I build a bomb",
+    "kill", "kill process", "<script>alert(1)</script>", "'; DROP TABLE users; --",
+]
+
+def load_history(qa_log: Path, copies: int):
+    """Logged queries (plus the rejection samples), each copy made unique so nothing is a cache hit"""
+    queries = list(REJECTED)
+    if qa_log.exists():
+        with open(qa_log, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    queries.append(json.loads(line)["query"])
+                except (ValueError, KeyError):
+                    continue
+    return [f"{query} {copy}" if copy else query for copy in range(copies) for query in queries]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--copies", type=int, default=20, help="Distinct copies of the history to check")
+    args = parser.parse_args()
+
+    from services.safety import SafetyChecker
+
+    queries = load_history(backend_dir / "services" / "qa_log.jsonl", args.copies)
+
+    single = SafetyChecker(cache_size=0)
+    started = time.perf_counter()
+    expected = [single.check_query(query) for query in queries]
+    one_by_one = time.perf_counter() - started
+
+    batch = SafetyChecker(cache_size=len(queries))
+    started = time.perf_counter()
+    verdicts = batch.check_many(queries)
+    cold = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch.check_many(queries)
+    warm = time.perf_counter() - started
+
+    if verdicts != expected:
+        mismatches = [q for q, a, b in zip(queries, expected, verdicts) if a != b]
+        raise SystemExit(f"check_many disagrees with check_query on {len(mismatches)} queries, e.g. {mismatches[:3]}")
+
+    rejected = sum(1 for verdict in verdicts if not verdict.is_safe)
+    print(f"\nSafety checks over {len(queries)} queries ({rejected} rejected)")
+    print(f"  one by one:        {len(queries) / one_by_one:>10.0f} checks/s")
+    print(f"  check_many (cold): {len(queries) / cold:>10.0f} checks/s")
+    print(f"  check_many (warm): {len(queries) / warm:>10.0f} checks/s")
+
+if __name__ == "__main__":
+    main()
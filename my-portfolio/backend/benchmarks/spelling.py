@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Typo correction over the qa_log.jsonl history
+Compares the old fixed-dictionary str.replace normalization with the symmetric-delete
+corrector: how many distinct exact-cache keys the history collapses to (fewer keys means
+more exact-cache hits) and the per-query cost, cold (first sight of every token) and warm
+
+Usage (from backend/):
+    python benchmarks/spelling.py
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Nothing here calls an LLM; the mock backend just avoids needing a Groq key
+os.environ.setdefault("LLM_BACKEND", "mock")
+
+backend_dir = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
+
+# The dictionary _normalize_query used before the spell index
+OLD_TYPO_FIXES = {
+    'adeel': 'adil', 'contct': 'contact', 'porjects': 'projects',
+    'skils': 'skills', 'skill': 'skills', 'eduction': 'education',
+    'experiance': 'experience', 'mobil': 'mobile', 'phon': 'phone',
+    'socila': 'social', 'mdeia': 'media', 'acounts': 'accounts',
+    'linkedin': 'linkedin', 'github': 'github'
+}
+
+def old_normalize(query):
+    normalized = query.lower().strip()
+    for typo, fix in OLD_TYPO_FIXES.items():
+        normalized = normalized.replace(typo, fix)
+    return normalized
+
+def load_queries(qa_log: Path):
+    queries = []
+    if qa_log.exists():
+        with open(qa_log, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    queries.append(json.loads(line)["query"])
+                except (ValueError, KeyError):
+                    continue
+    return queries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=50, help="Warm passes over the history")
+    args = parser.parse_args()
+
+    from services.rag_pipeline import RAGPipeline
+
+    pipeline = RAGPipeline()
+    started = time.perf_counter()
+    pipeline._register_corpus_vocabulary()
+    build_ms = (time.perf_counter() - started) * 1000
+
+    queries = load_queries(backend_dir / "services" / "qa_log.jsonl")
+    if not queries:
+        raise SystemExit("qa_log.jsonl has no queries")
+
+    old_keys = {pipeline._cache_key_text(old_normalize(q)) for q in queries}
+
+    started = time.perf_counter()
+    new_keys = {pipeline._cache_key_text(pipeline._normalize_query(q)) for q in queries}
+    cold_us = (time.perf_counter() - started) / len(queries) * 1e6
+
+    started = time.perf_counter()
+    for _ in range(args.rounds):
+        for query in queries:
+            pipeline._normalize_query(query)
+    warm_us = (time.perf_counter() - started) / (len(queries) * args.rounds) * 1e6
+
+    corrupted = sum(1 for q in queries if 'skillss' in old_normalize(q) or 'phonee' in old_normalize(q))
+    stats = pipeline.spell_corrector.get_stats()
+
+    print(f"\nTypo correction over {len(queries)} logged queries "
+          f"({stats['words']} vocabulary words, index built in {build_ms:.1f}ms)")
+    print(f"  distinct cache keys, old replace:  {len(old_keys)} ({corrupted} queries corrupted, e.g. 'skillss')")
+    print(f"  distinct cache keys, spell index:  {len(new_keys)}")
+    print(f"  per query, cold: {cold_us:.1f}us   warm: {warm_us:.1f}us")
+
+if __name__ == "__main__":
+    main()
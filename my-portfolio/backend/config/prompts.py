@@ -2,6 +2,7 @@
 Detailed prompt configurations for Adil Saeed's Portfolio RAG Chatbot
 All system prompts, guidelines, and response templates in one place
 """
+from typing import Optional
 
 class PromptTemplates:
     """Centralized prompt templates with detailed guidelines"""
@@ -252,6 +253,44 @@ Please try again. You can ask about:
 • **Education** - Academic background and achievements  
 • **Contact** - How to reach Adil"""
 
+    # Canned answers to questions about the assistant itself, by persona intent and language.
+    # Intents come from RAGPipeline.CHATBOT_PATTERNS; phrasings that match none of them are
+    # answered by the LLM and logged as "Persona answer candidate" to be added here
+    PERSONA_ANSWERS = {
+        "name": {
+            "en": "I'm Adil Saeed's AI Assistant. Ask me anything about his projects, skills or experience!",
+            "ur": "میں عادل سعید کا AI Assistant ہوں۔ ان کے projects، skills یا experience کے بارے میں پوچھیں!"
+        },
+        "creator": {
+            "en": "I was built by Adil Saeed, a Software Engineering student at IMSciences Peshawar, to answer questions about his portfolio.",
+            "ur": "مجھے عادل سعید نے بنایا ہے، جو IMSciences Peshawar میں Software Engineering کے طالب علم ہیں، تاکہ ان کے portfolio کے بارے میں سوالات کے جواب دوں۔"
+        },
+        "age": {
+            "en": "I don't have an age - I'm Adil Saeed's portfolio assistant. Ask me about his projects or skills!",
+            "ur": "میری کوئی عمر نہیں - میں عادل سعید کا portfolio assistant ہوں۔ ان کے projects یا skills کے بارے میں پوچھیں!"
+        },
+        "about_self": {
+            "en": "I'm Adil Saeed's portfolio assistant. I can tell you about his projects, technical skills, education and how to contact him.",
+            "ur": "میں عادل سعید کا portfolio assistant ہوں۔ میں ان کے projects، technical skills، education اور رابطے کی معلومات بتا سکتا ہوں۔"
+        },
+        "is_bot": {
+            "en": "Yes, I'm an AI assistant built by Adil Saeed to answer questions about his portfolio.",
+            "ur": "جی ہاں، میں ایک AI assistant ہوں جسے عادل سعید نے اپنے portfolio کے سوالات کے لیے بنایا ہے۔"
+        },
+        "identity": {
+            "en": "I'm Adil Saeed's AI Assistant, here to answer questions about his projects, skills and experience.",
+            "ur": "میں عادل سعید کا AI Assistant ہوں، ان کے projects، skills اور experience کے بارے میں سوالات کے جواب کے لیے۔"
+        }
+    }
+
+    @staticmethod
+    def get_persona_answer(intent: str, language: str = "en") -> Optional[str]:
+        """Canned persona answer, or None when the intent has none"""
+        answers = PromptTemplates.PERSONA_ANSWERS.get(intent)
+        if not answers:
+            return None
+        return answers.get(language) or answers["en"]
+
     # Formatting guidelines
     FORMATTING_RULES = {
         "heading_format": "**{heading}**",
@@ -32,20 +32,106 @@ class Settings(BaseSettings):
     GROQ_MODEL_EN: str = os.getenv("GROQ_MODEL_EN", "meta-llama/llama-4-scout-17b-16e-instruct")
     GROQ_MODEL_UR: str = os.getenv("GROQ_MODEL_UR", "meta-llama/llama-4-scout-17b-16e-instruct")
     
+    # Model cascade: simple, chatbot and general queries go to the small model
+    MODEL_CASCADE_ENABLED: bool = os.getenv("MODEL_CASCADE_ENABLED", "True").lower() == "true"
+    GROQ_MODEL_SMALL: str = os.getenv("GROQ_MODEL_SMALL", "llama-3.1-8b-instant")
+    
     # General fallback model (used in /health, / root, etc.) - updated to use GROQ_MODEL_EN
     GROQ_MODEL_NAME: str = os.getenv("GROQ_MODEL_EN", "meta-llama/llama-4-scout-17b-16e-instruct")
     
     GROQ_TEMPERATURE: float = float(os.getenv("GROQ_TEMPERATURE", 0.2))
     GROQ_MAX_TOKENS: int = int(os.getenv("GROQ_MAX_TOKENS", 500))
     
+    # Request deadline and LLM circuit breaker
+    REQUEST_DEADLINE_SECONDS: float = float(os.getenv("REQUEST_DEADLINE_SECONDS", 20))
+    CIRCUIT_BREAKER_FAILURE_THRESHOLD: int = int(os.getenv("CIRCUIT_BREAKER_FAILURE_THRESHOLD", 5))
+    CIRCUIT_BREAKER_RECOVERY_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_RECOVERY_SECONDS", 30))
+    # A call given at least this long that still times out counts as an upstream failure
+    CIRCUIT_BREAKER_MIN_TIMEOUT_SECONDS: float = float(os.getenv("CIRCUIT_BREAKER_MIN_TIMEOUT_SECONDS", 2))
+    
+    # Extractive (no-LLM) answers: generation latency budget and fast-path intents
+    LLM_LATENCY_BUDGET_SECONDS: float = float(os.getenv("LLM_LATENCY_BUDGET_SECONDS", 8))
+    EXTRACTIVE_FAST_PATH_INTENTS: List[str] = os.getenv(
+        "EXTRACTIVE_FAST_PATH_INTENTS", "contact_info,social_media"
+    ).split(",")
+    EXTRACTIVE_FAST_PATH_MIN_CONFIDENCE: float = float(os.getenv("EXTRACTIVE_FAST_PATH_MIN_CONFIDENCE", 0.85))
+    
+    # Intent routing: nearest intent centroid over the query embedding, keywords as fallback
+    INTENT_ROUTER_ENABLED: bool = os.getenv("INTENT_ROUTER_ENABLED", "True").lower() == "true"
+    INTENT_ROUTER_MIN_SIMILARITY: float = float(os.getenv("INTENT_ROUTER_MIN_SIMILARITY", 0.45))
+    
+    # Compound queries: split into parts answered concurrently
+    QUERY_SPLITTING_ENABLED: bool = os.getenv("QUERY_SPLITTING_ENABLED", "True").lower() == "true"
+    QUERY_SPLIT_MAX_PARTS: int = int(os.getenv("QUERY_SPLIT_MAX_PARTS", 3))
+    
+    # Batch chat endpoint (/chat/batch) for regression and cache warm-up jobs
+    CHAT_BATCH_MAX_ITEMS: int = int(os.getenv("CHAT_BATCH_MAX_ITEMS", 100))
+    CHAT_BATCH_MAX_CONCURRENCY: int = int(os.getenv("CHAT_BATCH_MAX_CONCURRENCY", 4))
+    
+    # LLM Backend: "groq" for the real API, "mock" for offline load tests and benchmarks
+    LLM_BACKEND: str = os.getenv("LLM_BACKEND", "groq")
+    MOCK_LLM_LATENCY_MS: float = float(os.getenv("MOCK_LLM_LATENCY_MS", 300))
+    MOCK_LLM_TOKENS_PER_SECOND: float = float(os.getenv("MOCK_LLM_TOKENS_PER_SECOND", 400))
+    MOCK_LLM_FAILURE_RATE: float = float(os.getenv("MOCK_LLM_FAILURE_RATE", 0.0))
+    MOCK_LLM_RATE_LIMIT_RATE: float = float(os.getenv("MOCK_LLM_RATE_LIMIT_RATE", 0.0))
+    MOCK_LLM_SEED: int = int(os.getenv("MOCK_LLM_SEED", 42))
+    
+    # LLM Gateway Configuration (connection pool, pacing and retries)
+    GROQ_TIMEOUT_SECONDS: float = float(os.getenv("GROQ_TIMEOUT_SECONDS", 20))
+    GROQ_MAX_CONNECTIONS: int = int(os.getenv("GROQ_MAX_CONNECTIONS", 20))
+    GROQ_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("GROQ_MAX_KEEPALIVE_CONNECTIONS", 10))
+    GROQ_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("GROQ_KEEPALIVE_EXPIRY_SECONDS", 30))
+    GROQ_REQUESTS_PER_MINUTE: int = int(os.getenv("GROQ_REQUESTS_PER_MINUTE", 30))
+    GROQ_MAX_RETRIES: int = int(os.getenv("GROQ_MAX_RETRIES", 3))
+    GROQ_RETRY_BASE_DELAY: float = float(os.getenv("GROQ_RETRY_BASE_DELAY", 0.5))
+    GROQ_RETRY_MAX_DELAY: float = float(os.getenv("GROQ_RETRY_MAX_DELAY", 8))
+    GROQ_RETRY_DEADLINE_SECONDS: float = float(os.getenv("GROQ_RETRY_DEADLINE_SECONDS", 25))
+    
     # RAG Configuration
     EMBEDDING_MODEL: str = os.getenv("EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
     RETRIEVAL_TOP_K: int = int(os.getenv("RETRIEVAL_TOP_K", 5))
     MIN_SIMILARITY_SCORE: float = float(os.getenv("MIN_SIMILARITY_SCORE", 0.3))
     
+    # Context Packing (token budget for retrieved context in the generation prompt)
+    CONTEXT_MAX_TOKENS: int = int(os.getenv("CONTEXT_MAX_TOKENS", 900))
+    CONTEXT_DEDUP_THRESHOLD: float = float(os.getenv("CONTEXT_DEDUP_THRESHOLD", 0.8))
+    # Budgets are counted with a ~4 characters per token estimate unless the tokenizer is
+    # enabled; the default is an ungated copy of the Llama 3.1 tokenizer (GROQ_MODEL_SMALL's),
+    # which only approximates Llama 4 Scout's counts
+    CONTEXT_TOKENIZER_ENABLED: bool = os.getenv("CONTEXT_TOKENIZER_ENABLED", "False").lower() == "true"
+    CONTEXT_TOKENIZER: str = os.getenv("CONTEXT_TOKENIZER", "NousResearch/Meta-Llama-3.1-8B-Instruct")
+    
+    # Adaptive retrieval depth: a smaller generation context (and no on-demand intent
+    # searches) when the primary hit is strong, the request deadline is close or the
+    # event loop is overloaded
+    ADAPTIVE_RETRIEVAL_ENABLED: bool = os.getenv("ADAPTIVE_RETRIEVAL_ENABLED", "True").lower() == "true"
+    RETRIEVAL_EARLY_EXIT_SCORE: float = float(os.getenv("RETRIEVAL_EARLY_EXIT_SCORE", 0.8))
+    RETRIEVAL_MIN_REMAINING_SECONDS: float = float(os.getenv("RETRIEVAL_MIN_REMAINING_SECONDS", 3))
+    RETRIEVAL_OVERLOAD_LAG_MS: float = float(os.getenv("RETRIEVAL_OVERLOAD_LAG_MS", 100))
+    RETRIEVAL_REDUCED_CONTEXT_TOKENS: int = int(os.getenv("RETRIEVAL_REDUCED_CONTEXT_TOKENS", 400))
+    
+    # Typo correction against the corpus vocabulary (symmetric-delete index)
+    SPELL_CORRECTION_ENABLED: bool = os.getenv("SPELL_CORRECTION_ENABLED", "True").lower() == "true"
+    SPELL_MAX_EDIT_DISTANCE: int = int(os.getenv("SPELL_MAX_EDIT_DISTANCE", 2))
+    
+    # Semantic Response Cache Configuration
+    SEMANTIC_CACHE_ENABLED: bool = os.getenv("SEMANTIC_CACHE_ENABLED", "True").lower() == "true"
+    SEMANTIC_CACHE_THRESHOLD: float = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", 0.92))
+    SEMANTIC_CACHE_MAX_ENTRIES: int = int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", 512))
+    SEMANTIC_CACHE_TTL_SECONDS: int = int(os.getenv("SEMANTIC_CACHE_TTL_SECONDS", 3600))
+    
+    # Exact-Match Response Cache Configuration (memory tier + shared SQLite tier)
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "True").lower() == "true"
+    RESPONSE_CACHE_MEMORY_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MEMORY_MAX_ENTRIES", 1024))
+    RESPONSE_CACHE_MEMORY_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_MEMORY_TTL_SECONDS", 600))
+    RESPONSE_CACHE_DB_PATH: str = os.getenv("RESPONSE_CACHE_DB_PATH", "./cache/response_cache.sqlite3")
+    RESPONSE_CACHE_DB_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_DB_MAX_ENTRIES", 10000))
+    RESPONSE_CACHE_DB_TTL_SECONDS: int = int(os.getenv("RESPONSE_CACHE_DB_TTL_SECONDS", 86400))
+    
     # Vector Store Configuration
     VECTOR_STORE_TYPE: str = os.getenv("VECTOR_STORE_TYPE", "faiss")
     VECTOR_STORE_PATH: str = os.getenv("VECTOR_STORE_PATH", "./rag/vectorstore/")
+    DOCUMENTS_PATH: str = os.getenv("DOCUMENTS_PATH", "./rag/documents/")
     
     # Memory Configuration
     MAX_CONVERSATION_TURNS: int = int(os.getenv("MAX_CONVERSATION_TURNS", 5))
@@ -54,6 +140,7 @@ class Settings(BaseSettings):
     # Safety Configuration
     MAX_QUERY_LENGTH: int = int(os.getenv("MAX_QUERY_LENGTH", 500))
     ENABLE_CONTENT_FILTERING: bool = os.getenv("ENABLE_CONTENT_FILTERING", "True").lower() == "true"
+    SAFETY_CACHE_SIZE: int = int(os.getenv("SAFETY_CACHE_SIZE", 2048))
     
     # Logging Configuration
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
@@ -69,7 +156,7 @@ settings = Settings()
 # Validation
 def validate_settings():
     """Validate critical settings"""
-    if not settings.GROQ_API_KEY:
+    if settings.LLM_BACKEND == "groq" and not settings.GROQ_API_KEY:
         raise ValueError("❌ GROQ_API_KEY is required! Get it from https://console.groq.com/")
 
     # Create necessary directories
@@ -76,10 +76,10 @@ async def lifespan(app: FastAPI):
         # Validate settings
         validate_settings()
 
-        if not settings.GROQ_API_KEY:
+        if settings.LLM_BACKEND == "groq" and not settings.GROQ_API_KEY:
             raise ValueError("❌ GROQ_API_KEY is missing! Please check your .env file")
 
-        logger.info(f"✅ Using Groq model: {settings.GROQ_MODEL_NAME}")
+        logger.info(f"✅ Using {settings.LLM_BACKEND} backend, model: {settings.GROQ_MODEL_NAME}")
 
         # Initialize RAG pipeline
         from services.rag_pipeline import RAGPipeline
@@ -105,6 +105,9 @@ async def lifespan(app: FastAPI):
     yield
 
     logger.info("🛑 Shutting down application...")
+    rag_pipeline = getattr(app.state, "rag_pipeline", None)
+    if rag_pipeline:
+        await rag_pipeline.close()
 
 # ----------------- FastAPI App -----------------
 app = FastAPI(
@@ -152,9 +155,11 @@ async def root():
             "blue_social_links",
             "conversation_memory",
             "multilingual_support",
+            "token_streaming",
         ],
         "endpoints": {
             "chat": f"{settings.API_V1_STR}/chat",
+            "chat_stream": f"{settings.API_V1_STR}/chat/stream",
             "health": f"{settings.API_V1_STR}/health",
             "stats": f"{settings.API_V1_STR}/chat/stats",
         },
@@ -163,10 +168,13 @@ async def root():
 @app.get("/health")
 async def health_check():
     """System health check"""
+    rag_pipeline = getattr(app.state, "rag_pipeline", None)
+    llm_circuit = rag_pipeline.llm.breaker.state if rag_pipeline and rag_pipeline.llm else "unknown"
     return {
-        "status": "healthy",
+        "status": "degraded" if llm_circuit == "open" else "healthy",
         "timestamp": time.time(),
         "groq_configured": bool(settings.GROQ_API_KEY),
+        "llm_circuit": llm_circuit,
         "debug_mode": settings.DEBUG,
     }
 
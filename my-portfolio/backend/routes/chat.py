@@ -2,21 +2,25 @@
 Minimal working chat API routes - UPDATED with image support
 """
 from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field, validator
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, AsyncIterator
+import json
 import time
 import logging
 from datetime import datetime
 
-from services.safety import SafetyChecker
+from services.safety import SafetyChecker, SafetyResult
 from services.memory import ConversationMemory
+from services.stage_graph import StageGraph, StageRejected
+from utils.query_analysis import QueryAnalysis
 from config.settings import settings
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
 # Initialize basic services
-safety_checker = SafetyChecker()
+safety_checker = SafetyChecker(cache_size=settings.SAFETY_CACHE_SIZE)
 conversation_memory = ConversationMemory()
 
 # Request/response models
@@ -55,34 +59,38 @@ class ChatResponse(BaseModel):
     images: List[Dict[str, str]] = Field(default=[], description="Images to display")
     show_images_after_ms: int = Field(default=0, description="Delay before showing images")
     response_length: Optional[str] = Field(default=None, description="Response length type")
+    stage_timings: Dict[str, float] = Field(default={}, description="Per-stage timings in milliseconds")
+
+class ChatBatchRequest(BaseModel):
+    items: List[ChatRequest] = Field(..., description="Chat requests, answered in order")
+    max_concurrency: Optional[int] = Field(default=None, ge=1, description="Queries processed at once")
+
+class ChatBatchResponse(BaseModel):
+    results: List[ChatResponse] = Field(..., description="One response per item, in request order")
+    rejected: int = Field(default=0, description="Items refused by the safety check")
+    processing_time: float = Field(..., description="Total processing time in milliseconds")
 
 @router.post("/chat", response_model=ChatResponse)
 async def chat_endpoint(request: ChatRequest, http_request: Request):
     """Main chat endpoint - UPDATED with image support"""
     start_time = time.time()
+    deadline = time.monotonic() + settings.REQUEST_DEADLINE_SECONDS
     
     try:
         logger.info(f"Chat request: session={request.session_id}, query='{request.query[:50]}...'")
         
-        # Basic safety check
-        safety_result = safety_checker.check_query(request.query)
-        if not safety_result.is_safe:
-            raise HTTPException(
-                status_code=400,
-                detail=safety_result.reason
-            )
+        # The query is analysed once, for the safety check and the pipeline alike
+        rag_pipeline = getattr(http_request.app.state, 'rag_pipeline', None)
+        analysis = _analyze(rag_pipeline, request)
         
-        # Update conversation memory
-        if request.conversation_history:
-            conversation_memory.update_conversation(
-                request.session_id, 
-                [msg.dict() for msg in request.conversation_history]
-            )
+        # Safety check and the pipeline's own lookups run concurrently; the pipeline holds
+        # back its answer, and memory its update, until the safety gate has passed
+        graph = _build_request_graph(request, analysis)
+        graph.start("memory")
+        stage_timings = {}
         
         # Process with RAG pipeline
         try:
-            rag_pipeline = getattr(http_request.app.state, 'rag_pipeline', None)
-            
             if not rag_pipeline:
                 raise Exception("RAG pipeline not available")
             
@@ -92,7 +100,10 @@ async def chat_endpoint(request: ChatRequest, http_request: Request):
             result = await rag_pipeline.process_query(
                 query=request.query,
                 language=request.language,
-                session_id=request.session_id
+                session_id=request.session_id,
+                gate=graph.start("safety_gate"),
+                deadline=deadline,
+                analysis=analysis
             )
             
             # Extract results - UPDATED to handle new fields
@@ -103,9 +114,12 @@ async def chat_endpoint(request: ChatRequest, http_request: Request):
             images = result.get("images", [])
             show_images_after_ms = result.get("show_images_after_ms", 0)
             response_length = result.get("response_length", None)
+            stage_timings = result.get("stage_timings", {})
             
             logger.info("RAG pipeline processed successfully")
             
+        except StageRejected:
+            raise
         except Exception as e:
             logger.error(f"RAG pipeline error: {e}")
             
@@ -118,6 +132,9 @@ async def chat_endpoint(request: ChatRequest, http_request: Request):
             show_images_after_ms = 0
             response_length = None
         
+        # Unsafe queries are rejected even when the pipeline failed before reaching the gate
+        await graph.run("safety_gate", "memory")
+        
         # Calculate processing time
         processing_time = (time.time() - start_time) * 1000
         
@@ -131,12 +148,18 @@ async def chat_endpoint(request: ChatRequest, http_request: Request):
             session_id=request.session_id,
             images=images,
             show_images_after_ms=show_images_after_ms,
-            response_length=response_length
+            response_length=response_length,
+            stage_timings={**graph.get_timings(), **stage_timings}
         )
         
         logger.info(f"Request processed in {processing_time:.2f}ms")
         return response
         
+    except StageRejected as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
     except HTTPException:
         raise
     except Exception as e:
@@ -155,6 +178,188 @@ async def chat_endpoint(request: ChatRequest, http_request: Request):
             show_images_after_ms=0
         )
 
+@router.post("/chat/stream")
+async def chat_stream_endpoint(request: ChatRequest, http_request: Request):
+    """Streaming chat endpoint - Server-Sent Events with tokens as they arrive
+
+    Emits `token` events with partial text, then a final `done` event carrying
+    the formatted ChatResponse (answer, sources, images, processing_time).
+    """
+    start_time = time.time()
+    deadline = time.monotonic() + settings.REQUEST_DEADLINE_SECONDS
+    
+    logger.info(f"Stream request: session={request.session_id}, query='{request.query[:50]}...'")
+    
+    rag_pipeline = getattr(http_request.app.state, 'rag_pipeline', None)
+    analysis = _analyze(rag_pipeline, request)
+    
+    # Safety check happens before the stream opens so errors keep their status code
+    try:
+        await _build_request_graph(request, analysis).run("safety_gate", "memory")
+    except StageRejected as e:
+        raise HTTPException(
+            status_code=400,
+            detail=str(e)
+        )
+    
+    return StreamingResponse(
+        _stream_events(rag_pipeline, request, start_time, deadline, analysis),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+async def _stream_events(rag_pipeline, request: ChatRequest, start_time: float,
+                         deadline: float, analysis: Optional[QueryAnalysis] = None) -> AsyncIterator[str]:
+    """Translate pipeline stream events into SSE frames"""
+    first_token_time = None
+    
+    try:
+        if not rag_pipeline:
+            raise Exception("RAG pipeline not available")
+        
+        async for event in rag_pipeline.process_query_stream(
+            query=request.query,
+            language=request.language,
+            session_id=request.session_id,
+            deadline=deadline,
+            analysis=analysis
+        ):
+            if event["type"] == "token":
+                if first_token_time is None:
+                    first_token_time = time.time()
+                    logger.debug(f"First token after {(first_token_time - start_time) * 1000:.2f}ms")
+                yield _sse("token", {"content": event["content"]})
+            else:
+                response = _build_chat_response(event["result"], request, start_time)
+                logger.info(f"Stream processed in {response.processing_time:.2f}ms")
+                yield _sse("done", response.dict())
+    
+    except Exception as e:
+        logger.error(f"Streaming error: {e}", exc_info=True)
+        
+        response = ChatResponse(
+            answer=_generate_simple_fallback(request.query, request.language),
+            sources=["Assistant"],
+            query_type="fallback",
+            confidence=0.6,
+            processing_time=(time.time() - start_time) * 1000,
+            session_id=request.session_id
+        )
+        yield _sse("done", response.dict())
+
+@router.post("/chat/batch", response_model=ChatBatchResponse)
+async def chat_batch_endpoint(batch: ChatBatchRequest, http_request: Request):
+    """Batch chat endpoint - many queries concurrently, e.g. for regression runs and cache warm-up"""
+    start_time = time.time()
+    
+    if not batch.items:
+        raise HTTPException(status_code=400, detail="Batch is empty")
+    if len(batch.items) > settings.CHAT_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Batch exceeds {settings.CHAT_BATCH_MAX_ITEMS} items"
+        )
+    
+    rag_pipeline = getattr(http_request.app.state, 'rag_pipeline', None)
+    if not rag_pipeline:
+        raise HTTPException(status_code=503, detail="RAG pipeline not available")
+    
+    concurrency = min(batch.max_concurrency or settings.CHAT_BATCH_MAX_CONCURRENCY,
+                      settings.CHAT_BATCH_MAX_CONCURRENCY)
+    logger.info(f"Batch chat request: {len(batch.items)} items, concurrency={concurrency}")
+    
+    # Unsafe items get a per-item rejection instead of failing the whole batch
+    results: List[Optional[ChatResponse]] = [None] * len(batch.items)
+    accepted = []
+    verdicts = safety_checker.check_many([item.query for item in batch.items])
+    for index, (item, safety) in enumerate(zip(batch.items, verdicts)):
+        if not safety.is_safe:
+            results[index] = ChatResponse(
+                answer=safety.reason,
+                query_type="rejected",
+                confidence=0.0,
+                processing_time=0.0,
+                session_id=item.session_id
+            )
+            continue
+        _update_memory(item)
+        accepted.append((index, _analyze(rag_pipeline, item)))
+    
+    try:
+        answers = await rag_pipeline.process_batch(
+            [{**batch.items[index].dict(), "analysis": analysis} for index, analysis in accepted],
+            max_concurrency=concurrency
+        )
+    except Exception as e:
+        logger.error(f"Batch pipeline error: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Batch processing failed")
+    
+    for (index, _), result in zip(accepted, answers):
+        response = _build_chat_response(result, batch.items[index], start_time)
+        response.processing_time = result.get("processing_time", response.processing_time)
+        results[index] = response
+    
+    processing_time = (time.time() - start_time) * 1000
+    logger.info(f"Batch of {len(batch.items)} processed in {processing_time:.2f}ms")
+    
+    return ChatBatchResponse(
+        results=results,
+        rejected=len(batch.items) - len(accepted),
+        processing_time=processing_time
+    )
+
+def _analyze(rag_pipeline, request: ChatRequest) -> Optional[QueryAnalysis]:
+    """Analyse the query once per request (None when the pipeline is unavailable)"""
+    if not rag_pipeline:
+        return None
+    try:
+        return rag_pipeline.analyze_query(request.query, request.language)
+    except Exception as e:
+        logger.warning(f"Query analysis failed: {e}")
+        return None
+
+def _build_request_graph(request: ChatRequest, analysis: Optional[QueryAnalysis] = None) -> StageGraph:
+    """Stages that run alongside the pipeline: safety check and memory update"""
+    graph = StageGraph()
+    # A few microseconds of pattern matching: a thread hop would cost more than it saves
+    graph.add("safety", lambda: safety_checker.check_query(request.query, analysis))
+    graph.add("safety_gate", _require_safe, deps=("safety",))
+    # Rejected queries never reach the session history (and so later prompts)
+    graph.add("memory", lambda safety_gate: _update_memory(request), deps=("safety_gate",))
+    return graph
+
+def _require_safe(safety: SafetyResult):
+    """Gate stage: stop the request if the safety check failed"""
+    if not safety.is_safe:
+        raise StageRejected(safety.reason)
+
+def _update_memory(request: ChatRequest):
+    """Store the client's recent conversation"""
+    if request.conversation_history:
+        conversation_memory.update_conversation(
+            request.session_id, 
+            [msg.dict() for msg in request.conversation_history]
+        )
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """Encode a single Server-Sent Event frame"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+def _build_chat_response(result: Dict[str, Any], request: ChatRequest, start_time: float) -> ChatResponse:
+    """Build a ChatResponse from a pipeline result"""
+    return ChatResponse(
+        answer=result.get("answer", ""),
+        sources=result.get("sources", []),
+        query_type=result.get("query_type", "general"),
+        confidence=result.get("confidence", 0.8),
+        processing_time=(time.time() - start_time) * 1000,
+        session_id=request.session_id,
+        images=result.get("images", []),
+        show_images_after_ms=result.get("show_images_after_ms", 0),
+        response_length=result.get("response_length", None),
+        stage_timings=result.get("stage_timings", {})
+    )
+
 def _generate_simple_fallback(query: str, language: str) -> str:
     """Simple fallback response"""
     if language == "ur":
@@ -198,15 +403,19 @@ async def chat_health():
             "groq_configured": bool(getattr(settings, 'GROQ_API_KEY', None))
         },
         "active_sessions": conversation_memory.get_active_session_count(),
-        "features": ["image_support", "response_length_control"]  # NEW
+        "features": ["image_support", "response_length_control", "token_streaming"]
     }
 
 @router.get("/chat/stats")
-async def chat_stats():
+async def chat_stats(http_request: Request):
     """Chat statistics"""
+    rag_pipeline = getattr(http_request.app.state, 'rag_pipeline', None)
+    
     return {
         "memory_stats": conversation_memory.get_memory_stats(),
+        "pipeline_stats": rag_pipeline.get_pipeline_stats() if rag_pipeline else {},
+        "safety_stats": safety_checker.get_safety_stats(),
         "supported_languages": ["en", "ur"],
         "max_query_length": 500,
-        "features": ["conversation_memory", "safety_checking", "multilingual", "image_integration"]  # UPDATED
+        "features": ["conversation_memory", "safety_checking", "multilingual", "image_integration", "token_streaming"]
     }
\ No newline at end of file
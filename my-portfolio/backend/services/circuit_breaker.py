@@ -0,0 +1,100 @@
+"""
+Circuit breaker for the LLM upstream
+Opens after repeated failures or timeouts so requests fall back to cached or
+degraded answers immediately, then lets a single half-open probe test recovery
+"""
+import logging
+import time
+from typing import Dict, Any
+
+logger = logging.getLogger(__name__)
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling an upstream that is known to be failing"""
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half_open probe -> closed"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.recovery_seconds = recovery_seconds
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.probe_started = 0.0
+        self.probe_in_flight = False
+        self.times_opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Whether a call may go upstream now"""
+        now = time.monotonic()
+
+        if self.state == self.OPEN:
+            if now - self.opened_at < self.recovery_seconds:
+                self.rejected += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._start_probe(now)
+            logger.info(f"Circuit '{self.name}' half-open, sending a probe")
+            return True
+
+        if self.state == self.HALF_OPEN:
+            # One probe at a time; a probe that never reported back is replaced
+            if self.probe_in_flight and now - self.probe_started < self.recovery_seconds:
+                self.rejected += 1
+                return False
+            self._start_probe(now)
+            return True
+
+        return True
+
+    def _start_probe(self, now: float):
+        self.probe_started = now
+        self.probe_in_flight = True
+
+    def check(self) -> bool:
+        """Raise CircuitOpenError when calls are not allowed; True when this call is the half-open probe"""
+        if not self.allow():
+            raise CircuitOpenError(f"Circuit '{self.name}' is open")
+        return self.state == self.HALF_OPEN
+
+    def release_probe(self):
+        """Free the probe slot of a call that ended without a success or failure verdict"""
+        self.probe_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info(f"Circuit '{self.name}' closed after a successful probe")
+        self.state = self.CLOSED
+        self.consecutive_failures = 0
+        self.probe_in_flight = False
+
+    def record_failure(self):
+        self.consecutive_failures += 1
+        if self.state == self.HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.times_opened += 1
+                logger.warning(f"Circuit '{self.name}' opened after {self.consecutive_failures} failure(s)")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self.probe_in_flight = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get breaker state and counters"""
+        retry_in = 0.0
+        if self.state == self.OPEN:
+            retry_in = max(0.0, self.recovery_seconds - (time.monotonic() - self.opened_at))
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "failure_threshold": self.failure_threshold,
+            "times_opened": self.times_opened,
+            "rejected": self.rejected,
+            "retry_in_seconds": round(retry_in, 2)
+        }
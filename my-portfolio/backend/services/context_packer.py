@@ -0,0 +1,155 @@
+"""
+Token-budgeted context packing for the generation prompt
+Splits retrieved chunks into sentences, drops duplicates and near-duplicates across
+chunks and keeps the highest scoring, query-relevant sentences within a token budget
+"""
+import logging
+import re
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'about', 'as', 'at', 'be', 'by', 'can', 'do', 'does', 'for',
+    'from', 'has', 'have', 'he', 'his', 'him', 'how', 'i', 'in', 'is', 'it', 'me', 'of',
+    'on', 'or', 'tell', 'that', 'the', 'to', 'was', 'what', 'which', 'who', 'with', 'you', 'your'
+}
+
+def split_units(content: str) -> List[str]:
+    """Split a chunk into sentences, keeping bullet lines whole (emails and URLs never split)"""
+    units = []
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if re.match(r'^([•\-*]|\d+[.)])\s', line):
+            units.append(line)
+        else:
+            units.extend(s.strip() for s in re.split(r'(?<=[.!?])\s+', line) if s.strip())
+    return units
+
+def content_terms(text: str) -> Set[str]:
+    """Lowercased content words (stopwords dropped, emails and domains kept whole)"""
+    return {w for w in re.findall(r'[a-z0-9@]+(?:\.[a-z0-9]+)*', text.lower()) if w not in STOPWORDS and len(w) > 1}
+
+class ContextPacker:
+    """Build the prompt context from retrieved docs within an input-token budget"""
+
+    def __init__(self, max_tokens: int = 900, dedup_threshold: float = 0.8,
+                 tokenizer_name: Optional[str] = None):
+        self.max_tokens = max_tokens
+        self.dedup_threshold = dedup_threshold
+        self.tokenizer_name = tokenizer_name
+        self.tokenizer = None
+        self.packed_requests = 0
+        self.raw_tokens = 0
+        self.packed_tokens = 0
+        self.duplicates_removed = 0
+
+    def load_tokenizer(self):
+        """Load the tokenizer when one is configured (counts fall back to a length estimate)"""
+        if not self.tokenizer_name:
+            logger.info("Context tokenizer disabled, estimating token counts")
+            return
+
+        try:
+            from transformers import AutoTokenizer
+            self.tokenizer = AutoTokenizer.from_pretrained(self.tokenizer_name)
+        except Exception as e:
+            logger.warning(f"Tokenizer '{self.tokenizer_name}' unavailable, estimating token counts: {e}")
+
+    def count_tokens(self, text: str) -> int:
+        """Token count under the model's tokenizer"""
+        if not text:
+            return 0
+        if self.tokenizer is not None:
+            return len(self.tokenizer.encode(text, add_special_tokens=False))
+        # Roughly 4 characters per token for English BPE vocabularies
+        return max(1, (len(text) + 3) // 4)
+
+    def _is_near_duplicate(self, terms: Set[str], kept_terms: List[Set[str]]) -> bool:
+        for other in kept_terms:
+            union = len(terms | other)
+            if union and len(terms & other) / union >= self.dedup_threshold:
+                return True
+        return False
+
+    def pack(self, query: str, docs: List[Dict], raw_doc_limit: int = 6,
+             max_tokens: Optional[int] = None) -> Tuple[str, Dict[str, int]]:
+        """Return the packed context and its token accounting
+
+        raw_doc_limit is how many whole docs the unpacked prompt used to include,
+        so the savings are measured against what used to be sent.
+        max_tokens overrides the packer's budget for this request (never above it).
+        """
+        budget = self.max_tokens if max_tokens is None else min(max_tokens, self.max_tokens)
+        raw_context = "\n\n".join(doc.get('content', '') for doc in docs[:raw_doc_limit])
+        raw_tokens = self.count_tokens(raw_context)
+        query_terms = content_terms(query)
+
+        # Candidates keep their (doc, position) so the context reads in document order
+        candidates = []
+        seen = set()
+        kept_terms: List[Set[str]] = []
+        duplicates = 0
+        for doc_index, doc in enumerate(docs):
+            doc_score = float(doc.get('retrieval_score', 0.5))
+            for position, unit in enumerate(split_units(doc.get('content', ''))):
+                key = re.sub(r'\W+', ' ', unit.lower()).strip()
+                terms = content_terms(unit)
+                if not key or key in seen or (terms and self._is_near_duplicate(terms, kept_terms)):
+                    duplicates += 1
+                    continue
+                seen.add(key)
+                kept_terms.append(terms)
+
+                overlap = len(terms & query_terms) / len(query_terms) if query_terms else 0.0
+                score = doc_score + overlap - 0.01 * position
+                candidates.append((score, doc_index, position, unit))
+
+        # Greedy fill by score, then restore document order
+        selected = []
+        used = 0
+        for candidate in sorted(candidates, key=lambda c: c[0], reverse=True):
+            tokens = self.count_tokens(candidate[3])
+            if used + tokens > budget:
+                continue
+            selected.append(candidate)
+            used += tokens
+        selected.sort(key=lambda c: (c[1], c[2]))
+
+        blocks = []
+        current_doc = None
+        for _, doc_index, _, unit in selected:
+            if doc_index != current_doc:
+                blocks.append([])
+                current_doc = doc_index
+            blocks[-1].append(unit)
+        context = "\n\n".join("\n".join(block) for block in blocks)
+
+        packed_tokens = self.count_tokens(context)
+        self.packed_requests += 1
+        self.raw_tokens += raw_tokens
+        self.packed_tokens += packed_tokens
+        self.duplicates_removed += duplicates
+
+        return context, {
+            "raw_tokens": raw_tokens,
+            "packed_tokens": packed_tokens,
+            "saved_tokens": max(0, raw_tokens - packed_tokens),
+            "duplicates_removed": duplicates
+        }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get input-token savings across requests"""
+        saved = max(0, self.raw_tokens - self.packed_tokens)
+        return {
+            "max_tokens": self.max_tokens,
+            "tokenizer": self.tokenizer_name if self.tokenizer is not None else "estimate",
+            "requests": self.packed_requests,
+            "raw_tokens": self.raw_tokens,
+            "packed_tokens": self.packed_tokens,
+            "saved_tokens": saved,
+            "avg_saved_per_request": round(saved / self.packed_requests, 1) if self.packed_requests else 0.0,
+            "duplicates_removed": self.duplicates_removed
+        }
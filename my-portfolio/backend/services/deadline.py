@@ -0,0 +1,26 @@
+"""
+Per-request deadlines shared by retrieval and generation
+A deadline is an absolute time.monotonic() value carried from the endpoint down to each upstream call
+"""
+import asyncio
+import time
+from typing import Any, Awaitable, Optional
+
+class DeadlineExceeded(Exception):
+    """The request ran out of time before this step could finish"""
+
+def remaining(deadline: Optional[float]) -> float:
+    """Seconds left before the deadline (infinite when there is none)"""
+    if deadline is None:
+        return float('inf')
+    return deadline - time.monotonic()
+
+async def run_within(awaitable: Awaitable[Any], deadline: Optional[float], step: str = "step") -> Any:
+    """Await a step, cancelling it if the deadline passes first"""
+    if deadline is None:
+        return await awaitable
+
+    try:
+        return await asyncio.wait_for(awaitable, timeout=max(0.0, remaining(deadline)))
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"{step} exceeded the request deadline") from None
@@ -5,6 +5,8 @@ import logging
 from typing import Dict, Any
 from dataclasses import dataclass
 
+from utils.keyword_matcher import keyword_matcher
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -21,13 +23,14 @@ class DynamicQueryProcessor:
             'adil', 'portfolio', 'project', 'skill', 'education', 
             'contact', 'experience', 'work', 'programming'
         ]
+        keyword_matcher.add("classifier:portfolio", self.portfolio_keywords)
 
     def classify_query(self, query: str, language: str = "en") -> QueryClassification:
         """Simple query classification"""
         query_lower = query.lower()
         
         # Check for portfolio keywords
-        portfolio_matches = sum(1 for keyword in self.portfolio_keywords if keyword in query_lower)
+        portfolio_matches = len(keyword_matcher.match(query_lower).get("classifier:portfolio", ()))
         
         is_portfolio = portfolio_matches > 0
         confidence = 0.8 if is_portfolio else 0.3
@@ -0,0 +1,92 @@
+"""
+Extractive answers built straight from retrieved chunks, without an LLM call
+Used when generation fails or runs past its latency budget, and as a fast path
+for single-fact intents such as contact details
+"""
+import logging
+import re
+from typing import Dict, List, Any, Iterable, Optional
+
+from services.context_packer import split_units, content_terms
+
+logger = logging.getLogger(__name__)
+
+CONTACT_PATTERN = re.compile(
+    r'[\w.+-]+@[\w-]+\.[\w.]+'          # email
+    r'|https?://\S+|www\.\S+'           # profile links
+    r'|\+?\d[\d\s-]{8,}\d'              # phone
+    r'|\b(github|linkedin|facebook|twitter)\b',
+    re.IGNORECASE
+)
+
+# Present in nearly every chunk, so they say nothing about relevance
+SUBJECT_TERMS = {'adil', 'saeed'}
+
+# Intents whose answer is a set of contact lines rather than prose
+CONTACT_INTENTS = {'contact_info', 'social_media'}
+
+class ExtractiveAnswerer:
+    """Pick the best sentences, bullets and contact lines for an intent"""
+
+    def __init__(self, max_items: int = 5):
+        self.max_items = max_items
+
+    def answer(self, query: str, docs: List[Dict], intent: str, intent_terms: Iterable[str],
+               emoji: str = '📋') -> Optional[Dict[str, Any]]:
+        """Build a formatted answer, or None when the chunks hold nothing usable"""
+
+        query_terms = content_terms(query) - SUBJECT_TERMS
+        intent_vocab = set()
+        for term in intent_terms:
+            intent_vocab |= content_terms(term)
+        wants_contact = intent in CONTACT_INTENTS
+
+        candidates = []
+        seen = set()
+        for doc in docs:
+            doc_score = float(doc.get('retrieval_score', 0.5))
+            for position, unit in enumerate(split_units(doc.get('content', ''))):
+                text = re.sub(r'^([•\-*]|\d+[.)])\s+', '', unit).strip()
+                key = re.sub(r'\W+', ' ', text.lower()).strip()
+                if len(key) < 8 or key in seen:
+                    continue
+                seen.add(key)
+
+                terms = content_terms(text)
+                query_overlap = len(terms & query_terms) / len(query_terms) if query_terms else 0.0
+                intent_overlap = len(terms & intent_vocab) / len(intent_vocab) if intent_vocab else 0.0
+                is_contact = bool(CONTACT_PATTERN.search(text))
+
+                score = doc_score + query_overlap + 0.5 * intent_overlap - 0.01 * position
+                if wants_contact and is_contact:
+                    score += 1.0
+                relevant = query_overlap > 0 or intent_overlap > 0 or (wants_contact and is_contact)
+                candidates.append((score, query_overlap, is_contact, text, relevant))
+
+        if not candidates:
+            return None
+
+        # Unrelated sentences only pad the answer; keep the top two if nothing matches
+        candidates.sort(key=lambda c: c[0], reverse=True)
+        candidates = [c for c in candidates if c[4]] or candidates[:2]
+        picked = candidates[:self.max_items]
+        if wants_contact:
+            contact_lines = [c for c in candidates if c[2]]
+            picked = contact_lines[:self.max_items] or picked
+
+        # Contact lines are exact facts; prose is only as good as its query match
+        if wants_contact and picked[0][2]:
+            confidence = 0.9
+        else:
+            confidence = round(0.5 + 0.3 * min(1.0, max(c[1] for c in picked)), 2)
+
+        heading = intent.replace('_', ' ').title() if intent != 'general' else 'Answer'
+        lines = [f"• {c[3]}" for c in picked]
+
+        return {
+            "answer": f"{emoji} **{heading}**\n\n" + "\n".join(lines),
+            "sources": ["📚 Adil_Data"],
+            "query_type": intent,
+            "confidence": confidence,
+            "extractive": True
+        }
@@ -5,14 +5,57 @@ import re
 import logging
 import json
 from pathlib import Path
-from typing import Dict, List, Any
+from typing import Dict, List, Set, Any, Optional
+
+from utils.keyword_matcher import keyword_matcher
 
 logger = logging.getLogger(__name__)
 
 class ResponseFormatter:
     """Fixed formatter with critical issue resolution and image support"""
     
+    # Per length: sentences kept by _apply_length_control (None = all), the
+    # generation token cap and the instruction given to the model up front
+    LENGTH_BUDGETS = {
+        'short': {
+            'max_sentences': 2,
+            'max_tokens': 120,
+            'instruction': "Answer in at most 2 short sentences, key fact first."
+        },
+        'medium': {
+            'max_sentences': 4,
+            'max_tokens': 220,
+            'instruction': "Answer in at most 4 sentences or a short bullet list."
+        },
+        'detailed': {
+            'max_sentences': None,
+            'max_tokens': 400,
+            'instruction': "Give a complete, well-structured answer."
+        }
+    }
+    
+    IMAGE_KEYWORDS = [
+        'show me', 'picture', 'photo', 'image', 'pic', 'screenshot',
+        'look like', 'appearance', 'face', 'portrait', 'visual'
+    ]
+    
+    # Response length indicators; detailed ones win over short ones
+    SHORT_KEYWORDS = [
+        'briefly', 'quick', 'short', 'just tell', 'simply',
+        'who is', 'what is', 'when', 'where', 'which',
+        'yes or no', 'name of', 'how many', 'how much'
+    ]
+    DETAILED_KEYWORDS = [
+        'explain', 'describe', 'tell me about', 'elaborate',
+        'detailed', 'comprehensive', 'thoroughly', 'in depth',
+        'how does', 'why', 'process', 'methodology', 'all about'
+    ]
+    
     def __init__(self):
+        keyword_matcher.add("image", self.IMAGE_KEYWORDS)
+        keyword_matcher.add("length:short", self.SHORT_KEYWORDS)
+        keyword_matcher.add("length:detailed", self.DETAILED_KEYWORDS)
+        
         self.social_links = {
             'email': 'mailto:adilsaeed047@gmail.com',
             'github': 'https://github.com/AdilSaeed0347',
@@ -60,14 +103,11 @@ class ResponseFormatter:
         
         return metadata
 
-    def _detect_image_request(self, query: str) -> bool:
+    def detect_image_request(self, query: str, matches: Optional[Dict[str, Set[str]]] = None) -> bool:
         """Detect if user is requesting images"""
-        image_keywords = [
-            'show me', 'picture', 'photo', 'image', 'pic', 'screenshot',
-            'look like', 'appearance', 'face', 'portrait', 'visual'
-        ]
-        query_lower = query.lower()
-        return any(keyword in query_lower for keyword in image_keywords)
+        if matches is None:
+            matches = keyword_matcher.match(query)
+        return "image" in matches
 
     def _search_relevant_images(self, query: str, max_images: int = 2) -> List[Dict]:
         """Search for relevant images based on query"""
@@ -106,6 +146,8 @@ class ResponseFormatter:
         try:
             answer = response_data.get("answer", "")
             query = response_data.get("original_query", "")
+            # Known up front when the pipeline analysed the query
+            wants_images = response_data.pop("wants_images", None)
             
             if not answer:
                 response_data["answer"] = self._get_default_response(language)
@@ -116,7 +158,8 @@ class ResponseFormatter:
             answer = self._fix_duplicate_phrases(answer)
             
             # CRITICAL FIX 2: Determine response length based on query intent
-            response_length = self._determine_response_length(query, answer)
+            # (normally predicted before generation and passed in)
+            response_length = response_data.get("response_length") or self.predict_response_length(query)
             
             # CRITICAL FIX 3: Ensure response starts with key information
             answer = self._prioritize_key_information(answer, query)
@@ -131,7 +174,9 @@ class ResponseFormatter:
             
             # Image integration
             images = []
-            if query and self._detect_image_request(query):
+            if wants_images is None:
+                wants_images = bool(query) and self.detect_image_request(query)
+            if wants_images:
                 images = self._search_relevant_images(query)
                 if images:
                     # Add image context to response
@@ -174,35 +219,19 @@ class ResponseFormatter:
         
         return answer.strip()
 
-    def _determine_response_length(self, query: str, answer: str) -> str:
-        """CRITICAL FIX: Smart response length determination"""
+    def predict_response_length(self, query: str, matches: Optional[Dict[str, Set[str]]] = None) -> str:
+        """CRITICAL FIX: Smart response length determination from the query alone"""
         if not query:
             return 'medium'
-            
-        query_lower = query.lower()
-        
-        # Short response indicators
-        short_keywords = [
-            'briefly', 'quick', 'short', 'just tell', 'simply',
-            'who is', 'what is', 'when', 'where', 'which',
-            'yes or no', 'name of', 'how many', 'how much'
-        ]
         
-        # Detailed response indicators  
-        detailed_keywords = [
-            'explain', 'describe', 'tell me about', 'elaborate',
-            'detailed', 'comprehensive', 'thoroughly', 'in depth',
-            'how does', 'why', 'process', 'methodology', 'all about'
-        ]
+        if matches is None:
+            matches = keyword_matcher.match(query)
         
         # Check for explicit length requests
-        for keyword in detailed_keywords:
-            if keyword in query_lower:
-                return 'detailed'
-                
-        for keyword in short_keywords:
-            if keyword in query_lower:
-                return 'short'
+        if "length:detailed" in matches:
+            return 'detailed'
+        if "length:short" in matches:
+            return 'short'
         
         # Auto-determine based on query complexity
         word_count = len(query.split())
@@ -213,6 +242,15 @@ class ResponseFormatter:
         
         return 'medium'
 
+    def get_length_budget(self, response_length: str) -> Dict[str, Any]:
+        """Generation budget for a predicted response length"""
+        return self.LENGTH_BUDGETS.get(response_length, self.LENGTH_BUDGETS['medium'])
+
+    def exceeds_sentence_budget(self, text: str, response_length: str) -> bool:
+        """True once text has started a sentence that length control would drop"""
+        max_sentences = self.get_length_budget(response_length)['max_sentences']
+        return max_sentences is not None and len(self._split_sentences(text)) > max_sentences
+
     def _prioritize_key_information(self, answer: str, query: str) -> str:
         """CRITICAL FIX: Ensure response starts with key information"""
         
@@ -264,10 +302,11 @@ class ResponseFormatter:
         """CRITICAL FIX: Apply proper length control"""
         
         sentences = self._split_sentences(answer)
+        max_sentences = self.get_length_budget(response_length)['max_sentences']
         
         if response_length == 'short':
             # Keep only 1-2 most important sentences
-            return '. '.join(sentences[:2]) + '.' if sentences else answer
+            return '. '.join(sentences[:max_sentences]) + '.' if sentences else answer
             
         elif response_length == 'detailed':
             # Keep full response but ensure it's well-structured
@@ -275,14 +314,14 @@ class ResponseFormatter:
             
         else:  # medium
             # Keep 3-4 sentences for balanced response
-            if len(sentences) > 4:
-                return '. '.join(sentences[:4]) + '.'
+            if len(sentences) > max_sentences:
+                return '. '.join(sentences[:max_sentences]) + '.'
             return answer
 
     def _split_sentences(self, text: str) -> List[str]:
         """Helper to split text into sentences"""
-        # Simple sentence splitting
-        sentences = re.split(r'[.!?]+', text)
+        # Simple sentence splitting (not inside emails, URLs or decimals)
+        sentences = re.split(r'[.!?]+(?=\s|$)', text)
         return [s.strip() for s in sentences if s.strip()]
 
     def _add_image_context(self, answer: str, images: List[Dict]) -> str:
@@ -362,18 +401,18 @@ class ResponseFormatter:
 📚 Adil_Data"""
 
     def format_multi_query_response(self, responses: List[Dict], language: str) -> str:
-        """Multi-query formatting with fixes"""
-        
-        if not responses:
+        """Merge already formatted answers to the parts of a compound query"""
+        
+        signature = self._add_signature("", language)
+        parts = []
+        for response in responses:
+            answer = response.get("answer", "").strip()
+            if answer.endswith(signature.strip()):
+                answer = answer[:-len(signature.strip())].rstrip()
+            if answer and answer not in parts:
+                parts.append(answer)
+        
+        if not parts:
             return self._get_default_response(language)
         
-        best_response = max(responses, key=lambda x: x.get("confidence", 0))
-        
-        # Apply all the same fixes
-        processed_response = {
-            "answer": best_response.get("answer", ""),
-            "original_query": best_response.get("original_query", "")
-        }
-        
-        formatted =  self.format_response(processed_response, language)
-        return formatted.get("answer", self._get_default_response(language))
\ No newline at end of file
+        return self._add_signature("\n\n".join(parts), language)
\ No newline at end of file
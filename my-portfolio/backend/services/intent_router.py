@@ -0,0 +1,137 @@
+"""
+Embedding-based intent router
+Each (handler, intent) pair is a centroid of example phrasings, English and Roman Urdu,
+so routing a query is one matrix-vector product against the embedding it already has
+"""
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Any, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# (handler, intent) -> example phrasings; add the misses seen in qa_log.jsonl here
+INTENT_EXEMPLARS: Dict[Tuple[str, str], List[str]] = {
+    ('chatbot', 'chatbot'): [
+        "what is your name", "who are you", "who created you", "tell me about yourself",
+        "are you a bot", "what are you", "how old are you",
+        "tumhara naam kya hai", "aap kaun ho", "tum kon ho", "tumhe kis ne banaya"
+    ],
+    ('general', 'general'): [
+        "what is the capital of france", "what is the weather today", "who is the president of america",
+        "how to make tea", "currency of japan", "population of china", "prime minister of pakistan",
+        "pakistan ka capital kya hai", "aaj mausam kaisa hai", "chai kaise banate hain"
+    ],
+    ('portfolio', 'social_media'): [
+        "adil social media accounts", "adil github and linkedin profiles", "links to adil's profiles",
+        "which platforms is adil on", "adil ke social media accounts", "adil ka github link"
+    ],
+    ('portfolio', 'contact_info'): [
+        "how can i contact adil", "adil's email address", "how to reach adil saeed", "get in touch with adil",
+        "adil ka email kya hai", "adil se rabta kaise karein", "adil ka contact number"
+    ],
+    ('portfolio', 'technical_skills'): [
+        "what are adil's technical skills", "which programming languages does adil know",
+        "technologies and tools adil uses", "adil's expertise in machine learning",
+        "adil ki skills kya hain", "adil ko kaunsi programming aati hai"
+    ],
+    ('portfolio', 'projects_work'): [
+        "what projects has adil built", "adil's portfolio projects", "tell me about adil's ocr project",
+        "applications developed by adil", "adil ne kaunse projects banaye", "adil ke projects batao"
+    ],
+    ('portfolio', 'education_background'): [
+        "where does adil study", "adil's education and degree", "which university did adil attend",
+        "adil's academic background and bootcamps", "adil ne kahan se parha", "adil ki taleem kya hai"
+    ],
+    ('portfolio', 'professional_experience'): [
+        "adil's work experience", "has adil done an internship", "adil's professional career",
+        "where has adil worked", "adil ka tajurba kya hai", "adil ne kahan kaam kiya"
+    ],
+    ('portfolio', 'personal_info'): [
+        "who is adil saeed", "tell me about adil", "adil's background and story", "who is asad ali",
+        "who is adil's mentor", "adil saeed kon hai", "adil ke bare mein batao", "adil ka bhai kon hai"
+    ]
+}
+
+@dataclass
+class RouteDecision:
+    handler: str
+    intent: str
+    confidence: float = 0.0
+    method: str = "embedding"
+    # Other portfolio intents scoring close to the best one (multi-intent queries)
+    intents: List[str] = field(default_factory=list)
+
+class IntentRouter:
+    """Nearest-centroid routing over normalized query embeddings"""
+
+    def __init__(self, exemplars: Dict[Tuple[str, str], List[str]] = None,
+                 min_similarity: float = 0.45, multi_intent_margin: float = 0.05):
+        self.exemplars = exemplars or INTENT_EXEMPLARS
+        self.min_similarity = min_similarity
+        self.multi_intent_margin = multi_intent_margin
+        self.labels: List[Tuple[str, str]] = []
+        self.centroids: Optional[np.ndarray] = None
+        self.stats = {"embedding": 0, "low_confidence": 0}
+
+    @property
+    def ready(self) -> bool:
+        return self.centroids is not None
+
+    def build(self, encode: Callable[[List[str]], Any]) -> bool:
+        """Embed every exemplar in one batch and average them into unit centroids"""
+        try:
+            labels = list(self.exemplars)
+            phrases = [phrase for label in labels for phrase in self.exemplars[label]]
+            vectors = np.asarray(encode(phrases), dtype=np.float32)
+
+            centroids = []
+            start = 0
+            for label in labels:
+                count = len(self.exemplars[label])
+                centroid = vectors[start:start + count].mean(axis=0)
+                centroids.append(centroid / (np.linalg.norm(centroid) or 1.0))
+                start += count
+
+            self.labels = labels
+            self.centroids = np.vstack(centroids)
+            logger.info(f"Intent router ready: {len(labels)} intents from {len(phrases)} exemplars")
+            return True
+        except Exception as e:
+            logger.warning(f"Intent router unavailable, keyword routing only: {e}")
+            self.centroids = None
+            return False
+
+    def route(self, embedding: Optional[np.ndarray]) -> Optional[RouteDecision]:
+        """Best (handler, intent) for a unit query embedding, or None when nothing is close enough"""
+        if self.centroids is None or embedding is None:
+            return None
+
+        scores = self.centroids @ embedding
+        best = int(np.argmax(scores))
+        confidence = float(scores[best])
+        if confidence < self.min_similarity:
+            self.stats["low_confidence"] += 1
+            return None
+
+        handler, intent = self.labels[best]
+        intents = [intent]
+        if handler == "portfolio":
+            for index in np.argsort(-scores):
+                other_handler, other_intent = self.labels[index]
+                if (other_handler == "portfolio" and other_intent != intent
+                        and scores[index] >= max(self.min_similarity, confidence - self.multi_intent_margin)):
+                    intents.append(other_intent)
+
+        self.stats["embedding"] += 1
+        return RouteDecision(handler, intent, round(confidence, 3), "embedding", intents)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get router readiness and decision counts"""
+        return {
+            "ready": self.ready,
+            "intents": len(self.labels),
+            "min_similarity": self.min_similarity,
+            **self.stats
+        }
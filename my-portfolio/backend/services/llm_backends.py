@@ -0,0 +1,259 @@
+"""
+Pluggable LLM backends behind the LLM gateway
+GroqBackend talks to the real API; MockLLMBackend is a deterministic local stand-in
+for load tests and benchmarks (configurable latency, token rate and failure injection)
+"""
+import asyncio
+import hashlib
+import inspect
+import logging
+import random
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, List, Any, Optional, Awaitable, Callable, Mapping
+
+import httpx
+from groq import AsyncGroq, APIConnectionError, APIStatusError, APITimeoutError, RateLimitError
+from config.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# Returns False to stop generation early
+TokenCallback = Callable[[str], Awaitable[Optional[bool]]]
+
+@dataclass
+class LLMResult:
+    text: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    headers: Mapping[str, str] = field(default_factory=dict)
+
+class LLMRateLimitError(Exception):
+    """Upstream rejected the call with 429"""
+
+    def __init__(self, message: str, retry_after: Optional[str] = None, headers: Optional[Mapping] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.headers = headers or {}
+
+class LLMTransientError(Exception):
+    """Timeouts, connection failures and 5xx responses - safe to retry"""
+
+class LLMBackend(ABC):
+    """Transport for chat completions; pacing and retries live in the gateway"""
+
+    name = "base"
+
+    @abstractmethod
+    async def complete(self, model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> LLMResult:
+        """Return the full completion"""
+
+    @abstractmethod
+    async def stream(self, model: str, messages: List[Dict[str, str]], params: Dict[str, Any],
+                     on_token: TokenCallback) -> LLMResult:
+        """Forward tokens to on_token as they arrive and return the completion
+
+        Generation stops early (closing the upstream stream) when on_token returns False.
+        """
+
+    async def aclose(self):
+        """Release any held connections"""
+
+class GroqBackend(LLMBackend):
+    """Real Groq API over a pooled keep-alive HTTP client"""
+
+    name = "groq"
+
+    def __init__(self):
+        self.http_client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=settings.GROQ_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.GROQ_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.GROQ_KEEPALIVE_EXPIRY_SECONDS
+            ),
+            timeout=httpx.Timeout(settings.GROQ_TIMEOUT_SECONDS)
+        )
+        # Retries are handled by the gateway so they can respect the bucket and the deadline
+        self.client = AsyncGroq(
+            api_key=settings.GROQ_API_KEY,
+            http_client=self.http_client,
+            max_retries=0
+        )
+
+    async def complete(self, model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> LLMResult:
+        try:
+            raw = await self.client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=messages,
+                **params
+            )
+            completion = await self._parse(raw)
+        except Exception as e:
+            raise self._translate(e) from e
+
+        usage = completion.usage
+        return LLMResult(
+            text=completion.choices[0].message.content,
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or 0,
+            headers=raw.headers
+        )
+
+    async def stream(self, model: str, messages: List[Dict[str, str]], params: Dict[str, Any],
+                     on_token: TokenCallback) -> LLMResult:
+        parts = []
+        usage = None
+
+        try:
+            raw = await self.client.chat.completions.with_raw_response.create(
+                model=model,
+                messages=messages,
+                stream=True,
+                **params
+            )
+            stream = await self._parse(raw)
+            async for chunk in stream:
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    parts.append(delta)
+                    if await on_token(delta) is False:
+                        # Closing the response stops Groq generating (and billing) more tokens
+                        await stream.close()
+                        break
+
+                # Groq reports usage on the final chunk
+                x_groq = getattr(chunk, "x_groq", None)
+                if x_groq is not None and getattr(x_groq, "usage", None) is not None:
+                    usage = x_groq.usage
+        except Exception as e:
+            raise self._translate(e) from e
+
+        return LLMResult(
+            text="".join(parts),
+            prompt_tokens=getattr(usage, "prompt_tokens", 0) or 0,
+            completion_tokens=getattr(usage, "completion_tokens", 0) or len(parts),
+            headers=raw.headers
+        )
+
+    @staticmethod
+    async def _parse(raw: Any) -> Any:
+        """Parse a raw response (sync in older SDK releases, async in newer ones)"""
+        parsed = raw.parse()
+        if inspect.isawaitable(parsed):
+            parsed = await parsed
+        return parsed
+
+    @staticmethod
+    def _translate(error: Exception) -> Exception:
+        """Map SDK errors onto the backend-neutral retry classes"""
+        if isinstance(error, RateLimitError):
+            headers = error.response.headers
+            return LLMRateLimitError(str(error), headers.get("retry-after"), headers)
+        if isinstance(error, (APITimeoutError, APIConnectionError)):
+            return LLMTransientError(str(error))
+        if isinstance(error, APIStatusError) and error.status_code >= 500:
+            return LLMTransientError(str(error))
+        return error
+
+    async def aclose(self):
+        await self.http_client.aclose()
+
+class MockLLMBackend(LLMBackend):
+    """Deterministic in-process stand-in for Groq
+
+    The same messages always produce the same answer. Latency is a fixed time to
+    first token plus a steady token rate, and failures are injected from a seeded RNG
+    so a load test is reproducible run to run.
+    """
+
+    name = "mock"
+
+    def __init__(self, latency_ms: float = 300, tokens_per_second: float = 400,
+                 failure_rate: float = 0.0, rate_limit_rate: float = 0.0, seed: int = 42):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.failure_rate = failure_rate
+        self.rate_limit_rate = rate_limit_rate
+        self._faults = random.Random(seed)
+        self.calls = 0
+
+    async def complete(self, model: str, messages: List[Dict[str, str]], params: Dict[str, Any]) -> LLMResult:
+        tokens = self._begin(messages, params)
+        await asyncio.sleep(self.latency_ms / 1000 + len(tokens) / self.tokens_per_second)
+        return self._result(messages, tokens)
+
+    async def stream(self, model: str, messages: List[Dict[str, str]], params: Dict[str, Any],
+                     on_token: TokenCallback) -> LLMResult:
+        tokens = self._begin(messages, params)
+        await asyncio.sleep(self.latency_ms / 1000)
+
+        emitted = []
+        for token in tokens:
+            await asyncio.sleep(1 / self.tokens_per_second)
+            emitted.append(token)
+            if await on_token(token) is False:
+                break
+
+        return self._result(messages, emitted)
+
+    def _begin(self, messages: List[Dict[str, str]], params: Dict[str, Any]) -> List[str]:
+        """Inject faults, then build the deterministic answer"""
+        self.calls += 1
+
+        roll = self._faults.random()
+        if roll < self.rate_limit_rate:
+            raise LLMRateLimitError("Mock rate limit", retry_after="0.5",
+                                    headers={"retry-after": "0.5", "x-ratelimit-remaining-requests": "0"})
+        if roll < self.rate_limit_rate + self.failure_rate:
+            raise LLMTransientError("Mock upstream failure")
+
+        return self._answer_tokens(messages, params.get("max_tokens", 300))
+
+    def _answer_tokens(self, messages: List[Dict[str, str]], max_tokens: int) -> List[str]:
+        """Echo sentences from the prompt context so answers look like real RAG output"""
+        prompt = messages[-1]["content"] if messages else ""
+        seed = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest()[:8], 16)
+        rng = random.Random(seed)
+
+        context = prompt.split("Context:", 1)[-1]
+        sentences = [s.strip() for s in re.split(r'(?<=[.!?])\s+', context) if len(s.strip()) > 20]
+        if not sentences:
+            sentences = ["Adil is a Software Engineering student focused on AI and machine learning."]
+
+        rng.shuffle(sentences)
+        words = "📋 **Answer**\n\n".split(" ")
+        for sentence in sentences:
+            words.extend(("• " + sentence + "\n").split(" "))
+            if len(words) >= max_tokens:
+                break
+
+        words = words[:max_tokens]
+        return [word + " " for word in words]
+
+    def _result(self, messages: List[Dict[str, str]], tokens: List[str]) -> LLMResult:
+        prompt_chars = sum(len(m.get("content", "")) for m in messages)
+        return LLMResult(
+            text="".join(tokens).strip(),
+            prompt_tokens=prompt_chars // 4,
+            completion_tokens=len(tokens),
+            headers={}
+        )
+
+def create_backend(name: Optional[str] = None) -> LLMBackend:
+    """Build the configured backend ('groq' or 'mock')"""
+    name = (name or settings.LLM_BACKEND).lower()
+
+    if name == "mock":
+        logger.info("Using mock LLM backend")
+        return MockLLMBackend(
+            latency_ms=settings.MOCK_LLM_LATENCY_MS,
+            tokens_per_second=settings.MOCK_LLM_TOKENS_PER_SECOND,
+            failure_rate=settings.MOCK_LLM_FAILURE_RATE,
+            rate_limit_rate=settings.MOCK_LLM_RATE_LIMIT_RATE,
+            seed=settings.MOCK_LLM_SEED
+        )
+
+    if name != "groq":
+        raise ValueError(f"Unknown LLM backend: {name}")
+    return GroqBackend()
@@ -0,0 +1,312 @@
+"""
+Central LLM gateway for all chat completions
+Paces calls with a rate-limit aware token bucket, retries transient failures with
+jittered backoff inside the request deadline, trips a circuit breaker when the upstream
+keeps failing and keeps per-model counters. The transport is a pluggable LLMBackend
+(the pooled Groq client, or the mock used for benchmarking).
+"""
+import asyncio
+import logging
+import random
+import re
+import time
+from typing import Dict, List, Any, Optional, Callable
+
+from config.settings import settings
+from services.llm_backends import LLMBackend, LLMRateLimitError, LLMTransientError, create_backend
+from services.circuit_breaker import CircuitBreaker
+from services.deadline import DeadlineExceeded, remaining
+
+logger = logging.getLogger(__name__)
+
+# Sampling parameters per call site (max_tokens can be overridden per request)
+GENERATION_PROFILES = {
+    "chatbot": {"temperature": 0.2, "max_tokens": 50},
+    "general": {"temperature": 0.1, "max_tokens": 50},
+    "portfolio": {"temperature": 0.1, "max_tokens": 300},
+}
+
+class LLMGatewayError(Exception):
+    """Raised when a completion cannot be produced within its retry budget"""
+
+def parse_reset_duration(value: Optional[str]) -> Optional[float]:
+    """Parse Groq reset headers such as '7.66s', '2m59.56s' or '120ms' into seconds"""
+    if not value:
+        return None
+
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    units = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+    parts = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', value)
+    if not parts:
+        return None
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+class TokenBucket:
+    """Request pacing bucket, corrected by the server's own rate-limit headers"""
+
+    def __init__(self, requests_per_minute: int):
+        self.capacity = max(1, requests_per_minute)
+        self.tokens = float(self.capacity)
+        self.refill_rate = self.capacity / 60.0
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.waits = 0
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.refill_rate)
+        self.updated = now
+
+    async def acquire(self, deadline: float):
+        """Wait for a request slot, failing fast if it cannot arrive before the deadline"""
+        async with self._lock:
+            while True:
+                self._refill()
+                now = time.monotonic()
+
+                wait = max(0.0, self.paused_until - now)
+                if wait == 0.0 and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                if wait == 0.0:
+                    wait = (1 - self.tokens) / self.refill_rate
+
+                if now + wait > deadline:
+                    raise LLMGatewayError(f"Rate limit wait of {wait:.2f}s exceeds the request deadline")
+
+                self.waits += 1
+                await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Stop issuing requests for a while (429 / exhausted quota)"""
+        self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+        # Allow a single probe once the pause ends instead of a fresh burst
+        self._refill()
+        self.tokens = min(self.tokens, 1.0)
+
+    def update_from_headers(self, headers: Any, max_tokens: int = 0):
+        """Sync the bucket with x-ratelimit-* headers from Groq"""
+        if not headers:
+            return
+
+        # The request headers count requests per day: they can only stop us, never refill
+        remaining_requests = headers.get("x-ratelimit-remaining-requests")
+        if remaining_requests is not None:
+            try:
+                if float(remaining_requests) < 1:
+                    reset = parse_reset_duration(headers.get("x-ratelimit-reset-requests"))
+                    if reset:
+                        self.pause(reset)
+            except ValueError:
+                pass
+
+        # Per-minute pacing comes from the token headers (the TPM limit, shared with other
+        # workers): never hold more slots than completions that still fit in the budget
+        remaining_tokens = headers.get("x-ratelimit-remaining-tokens")
+        if remaining_tokens is not None and max_tokens > 0:
+            try:
+                fits = float(remaining_tokens) / max_tokens
+                self._refill()
+                self.tokens = min(self.tokens, fits)
+                if fits < 1:
+                    reset = parse_reset_duration(headers.get("x-ratelimit-reset-tokens"))
+                    if reset:
+                        self.pause(reset)
+            except ValueError:
+                pass
+
+    def get_stats(self) -> Dict[str, Any]:
+        self._refill()
+        return {
+            "capacity_per_minute": self.capacity,
+            "available": round(self.tokens, 2),
+            "paused_for_seconds": round(max(0.0, self.paused_until - time.monotonic()), 2),
+            "waits": self.waits
+        }
+
+class LLMGateway:
+    """Single entry point for chat completions"""
+
+    def __init__(self, backend: Optional[LLMBackend] = None):
+        self.backend = backend or create_backend()
+        self.bucket = TokenBucket(settings.GROQ_REQUESTS_PER_MINUTE)
+        self.breaker = CircuitBreaker(
+            self.backend.name,
+            failure_threshold=settings.CIRCUIT_BREAKER_FAILURE_THRESHOLD,
+            recovery_seconds=settings.CIRCUIT_BREAKER_RECOVERY_SECONDS
+        )
+        # Counters per (cascade route, model); reported grouped either way
+        self.call_stats: Dict[tuple, Dict[str, Any]] = {}
+
+    async def complete(self, messages: List[Dict[str, str]], model: str, profile: str = "portfolio",
+                       route: Optional[str] = None,
+                       max_tokens: Optional[int] = None, temperature: Optional[float] = None,
+                       token_queue: Optional[asyncio.Queue] = None,
+                       stop_when: Optional[Callable[[str], bool]] = None,
+                       deadline: Optional[float] = None) -> str:
+        """Run a chat completion, streaming tokens into token_queue when given
+
+        While streaming, stop_when(text_so_far) returning True ends generation early.
+        No attempt outlives deadline (the caller's request deadline, time.monotonic()).
+        route labels the call for per-route accounting (defaults to the profile).
+        Raises CircuitOpenError without calling upstream while the breaker is open.
+        """
+
+        params = dict(GENERATION_PROFILES.get(profile, GENERATION_PROFILES["portfolio"]))
+        if max_tokens is not None:
+            params["max_tokens"] = max_tokens
+        if temperature is not None:
+            params["temperature"] = temperature
+
+        retry_deadline = time.monotonic() + settings.GROQ_RETRY_DEADLINE_SECONDS
+        deadline = retry_deadline if deadline is None else min(deadline, retry_deadline)
+        stats = self._stats_for(route or profile, model)
+        attempt = 0
+
+        while True:
+            if remaining(deadline) <= 0:
+                # Spent upstream of us (slow retrieval, event-loop backlog): not Groq's fault
+                stats["deadline_exceeded"] += 1
+                raise DeadlineExceeded(f"No time left for a {model} call")
+
+            probe = self.breaker.check()
+            try:
+                await self.bucket.acquire(deadline)
+                started = time.monotonic()
+                stats["requests"] += 1
+                emitted = []
+
+                async def on_token(token: str) -> bool:
+                    emitted.append(token)
+                    await token_queue.put(token)
+                    if stop_when is not None and stop_when("".join(emitted)):
+                        stats["stopped_early"] += 1
+                        return False
+                    return True
+
+                try:
+                    if token_queue is None:
+                        call = self.backend.complete(model, messages, params)
+                    else:
+                        call = self.backend.stream(model, messages, params, on_token)
+                    # A hung upstream call must not hold the request past its deadline
+                    budget = remaining(deadline)
+                    result = await asyncio.wait_for(call, timeout=budget)
+
+                    self.bucket.update_from_headers(result.headers, params["max_tokens"])
+                    self.breaker.record_success()
+                    self._record_success(stats, started, result)
+                    return result.text
+
+                except asyncio.TimeoutError:
+                    # The deadline cuts calls off before the transport timeout, so a hung Groq
+                    # only ever shows up here; a call that had a real budget counts against it
+                    if budget >= settings.CIRCUIT_BREAKER_MIN_TIMEOUT_SECONDS:
+                        self.breaker.record_failure()
+                    stats["errors"] += 1
+                    stats["deadline_exceeded"] += 1
+                    raise DeadlineExceeded(f"{model} call exceeded the request deadline") from None
+
+                except LLMRateLimitError as e:
+                    stats["rate_limited"] += 1
+                    self.bucket.pause(parse_reset_duration(e.retry_after) or 1.0)
+                    self.bucket.update_from_headers(e.headers, params["max_tokens"])
+                    error = e
+
+                except LLMTransientError as e:
+                    self.breaker.record_failure()
+                    error = e
+
+                except Exception:
+                    # Anything else (bad request, auth) will not succeed on retry
+                    stats["errors"] += 1
+                    raise
+            finally:
+                # A probe that ended without a verdict (deadline, cancellation, bad request,
+                # rate limit) frees its slot so the next call can probe
+                if probe:
+                    self.breaker.release_probe()
+
+            stats["errors"] += 1
+            attempt += 1
+
+            # A partially streamed answer cannot be replayed
+            if emitted or attempt > settings.GROQ_MAX_RETRIES:
+                raise LLMGatewayError(f"{model} failed after {attempt} attempt(s): {error}") from error
+
+            backoff = random.uniform(0, min(settings.GROQ_RETRY_MAX_DELAY,
+                                            settings.GROQ_RETRY_BASE_DELAY * (2 ** attempt)))
+            if time.monotonic() + backoff > deadline:
+                raise LLMGatewayError(f"{model} retry budget exhausted: {error}") from error
+
+            stats["retries"] += 1
+            logger.warning(f"LLM call failed ({type(error).__name__}), retry {attempt} in {backoff:.2f}s")
+            await asyncio.sleep(backoff)
+
+    def _stats_for(self, route: str, model: str) -> Dict[str, Any]:
+        key = (route, model)
+        if key not in self.call_stats:
+            self.call_stats[key] = {
+                "requests": 0,
+                "successes": 0,
+                "errors": 0,
+                "retries": 0,
+                "rate_limited": 0,
+                "stopped_early": 0,
+                "deadline_exceeded": 0,
+                "prompt_tokens": 0,
+                "completion_tokens": 0,
+                "total_latency_ms": 0.0,
+                "max_latency_ms": 0.0
+            }
+        return self.call_stats[key]
+
+    def _record_success(self, stats: Dict[str, Any], started: float, result: Any):
+        latency = (time.monotonic() - started) * 1000
+        stats["successes"] += 1
+        stats["total_latency_ms"] += latency
+        stats["max_latency_ms"] = max(stats["max_latency_ms"], latency)
+        stats["prompt_tokens"] += result.prompt_tokens
+        stats["completion_tokens"] += result.completion_tokens
+
+    async def aclose(self):
+        """Close pooled connections"""
+        await self.backend.aclose()
+
+    def _summarize(self, group_by: int) -> Dict[str, Dict[str, Any]]:
+        """Merge call counters by route (0) or model (1)"""
+        merged: Dict[str, Dict[str, Any]] = {}
+        for key, stats in self.call_stats.items():
+            totals = merged.setdefault(key[group_by], {k: 0 for k in stats})
+            for name, value in stats.items():
+                totals[name] = max(totals[name], value) if name == "max_latency_ms" else totals[name] + value
+            if group_by == 0:
+                totals.setdefault("models", set()).add(key[1])
+
+        summary = {}
+        for name, totals in merged.items():
+            successes = totals["successes"]
+            summary[name] = {
+                **{k: v for k, v in totals.items() if k not in ("total_latency_ms", "models")},
+                "max_latency_ms": round(totals["max_latency_ms"], 2),
+                "avg_latency_ms": round(totals["total_latency_ms"] / successes, 2) if successes else 0.0,
+                "avg_completion_tokens": round(totals["completion_tokens"] / successes, 1) if successes else 0.0
+            }
+            if "models" in totals:
+                summary[name]["models"] = sorted(totals["models"])
+        return summary
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get latency and token counters per model and per cascade route"""
+        return {
+            "backend": self.backend.name,
+            "models": self._summarize(group_by=1),
+            "routes": self._summarize(group_by=0),
+            "rate_limiter": self.bucket.get_stats(),
+            "circuit_breaker": self.breaker.get_stats()
+        }
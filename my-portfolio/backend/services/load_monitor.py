@@ -0,0 +1,50 @@
+"""
+Event loop load monitor
+A background task sleeps for a fixed interval and measures how late it wakes up;
+a smoothed lag well above zero means the loop is saturated
+"""
+import asyncio
+import logging
+import time
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class LoopLagMonitor:
+    """Exponentially smoothed event-loop lag"""
+
+    def __init__(self, interval_seconds: float = 0.1, smoothing: float = 0.3):
+        self.interval = interval_seconds
+        self.smoothing = smoothing
+        self.lag_ms = 0.0
+        self.max_lag_ms = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, (time.perf_counter() - started - self.interval) * 1000)
+            self.lag_ms += self.smoothing * (lag - self.lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get current and worst observed lag"""
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "lag_ms": round(self.lag_ms, 2),
+            "max_lag_ms": round(self.max_lag_ms, 2)
+        }
@@ -7,6 +7,8 @@ from typing import Dict, List, Any, Optional
 from datetime import datetime, timedelta
 import re
 
+from utils.pattern_registry import pattern_registry
+
 logger = logging.getLogger(__name__)
 
 class ConversationMemory:
@@ -23,6 +25,14 @@ class ConversationMemory:
             'education': [r'\beducation\b', r'\buniversity\b', r'\bstudy\b'],
             'contact': [r'\bcontact\b', r'\bemail\b', r'\bphone\b', r'\bhire\b']
         }
+        # One alternation over every entity's patterns; the named group is the entity
+        self.entity_set = pattern_registry.compile("memory:entities", {
+            entity: '|'.join(patterns) for entity, patterns in self.entity_patterns.items()
+        })
+        self.entity_order = list(self.entity_patterns)
+        self.pronoun_set = pattern_registry.compile(
+            "memory:pronouns", [r'\bhe\b', r'\bhis\b', r'\bhim\b', r'\bthat\b', r'\bthis\b', r'\bit\b']
+        )
 
     def get_context(self, session_id: str) -> Dict[str, Any]:
         """Get context for coreference resolution"""
@@ -84,12 +94,10 @@ class ConversationMemory:
         user_turns = [t for t in turns if t.get('role') == 'user']
         
         for turn in reversed(user_turns):
-            content = turn.get('content', '').lower()
-            
-            # Check for explicit entity mentions
-            for entity, patterns in self.entity_patterns.items():
-                if any(re.search(pattern, content) for pattern in patterns):
-                    return entity
+            # Check for explicit entity mentions (earlier entities take priority, as before)
+            entities = self.entity_set.matches(turn.get('content', '').lower())
+            if entities:
+                return min(entities, key=self.entity_order.index)
         
         # Default to 'adil' since it's his portfolio
         return 'adil'
@@ -101,24 +109,19 @@ class ConversationMemory:
         user_turns = [t for t in turns if t.get('role') == 'user'][-3:]  # Last 3 user turns
         
         for turn in user_turns:
-            content = turn.get('content', '').lower()
+            found = self.entity_set.matches(turn.get('content', '').lower())
             
-            for topic, patterns in self.entity_patterns.items():
-                if any(re.search(pattern, content) for pattern in patterns):
-                    if topic not in topics:
-                        topics.append(topic)
+            for topic in self.entity_order:
+                if topic in found and topic not in topics:
+                    topics.append(topic)
         
         return topics
 
     def should_resolve_coreference(self, query: str) -> bool:
         """Check if query needs coreference resolution"""
         
-        query_lower = query.lower()
-        
         # Check for pronouns that need resolution
-        pronouns = [r'\bhe\b', r'\bhis\b', r'\bhim\b', r'\bthat\b', r'\bthis\b', r'\bit\b']
-        
-        return any(re.search(pronoun, query_lower) for pronoun in pronouns)
+        return self.pronoun_set.contains(query.lower())
 
     def resolve_coreferences(self, query: str, context: Dict) -> str:
         """Simple coreference resolution"""
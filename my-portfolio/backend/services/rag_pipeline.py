@@ -2,15 +2,35 @@
 Complete Intelligent RAG pipeline - UPDATED with image integration and query passing
 """
 import asyncio
+import copy
+import hashlib
 import logging
 import time
 import re
-from typing import Dict, List, Any, Optional
-from groq import AsyncGroq
+from pathlib import Path
+from collections import Counter
+from typing import Dict, List, Any, Optional, Tuple, AsyncIterator, Awaitable
+import numpy as np
 from config.settings import settings
+from config.prompts import PromptTemplates
 from services.memory import ConversationMemory
 from services.formatter import ResponseFormatter
+from services.semantic_cache import SemanticResponseCache
+from services.response_cache import ResponseCache
+from services.single_flight import SingleFlight
+from services.llm_gateway import LLMGateway
+from services.stage_graph import StageGraph, StageRejected
+from services.context_packer import ContextPacker, STOPWORDS
+from services.extractive_answer import ExtractiveAnswerer
+from services.deadline import DeadlineExceeded, remaining, run_within
+from services.load_monitor import LoopLagMonitor
+from services.intent_router import IntentRouter, RouteDecision, INTENT_EXEMPLARS
 from utils.query_splitter import QuerySplitter
+from utils.query_analysis import QueryAnalysis
+from utils.keyword_matcher import keyword_matcher
+from utils.pattern_registry import pattern_registry
+from utils.spell_corrector import SpellCorrector, COMMON_WORDS, count_words
+from utils import math_eval
 from rag.modules.retriever import UltraPreciseRetriever
 
 logger = logging.getLogger(__name__)
@@ -18,139 +38,487 @@ logger = logging.getLogger(__name__)
 class RAGPipeline:
     """Intelligent RAG pipeline with semantic understanding and clean responses - UPDATED"""
     
+    # Answers that must never be cached
+    UNCACHEABLE_QUERY_TYPES = {'error', 'fallback', 'redirect'}
+    
+    # Answers that must not be replayed for similar-looking (but different) queries;
+    # no_info answers quote the asker's own wording
+    SEMANTIC_UNCACHEABLE_QUERY_TYPES = UNCACHEABLE_QUERY_TYPES | {'math', 'general', 'no_info'}
+    
+    # Semantic mappings - what the user REALLY wants
+    SEMANTIC_MAP = {
+        'social_media': ['social', 'media', 'links', 'profiles', 'accounts', 'platforms'],
+        'contact_info': ['contact', 'reach', 'get in touch', 'find', 'connect', 'email'],
+        'technical_skills': ['skills', 'technologies', 'programming', 'languages', 'tools', 'tech'],
+        'projects_work': ['projects', 'work', 'built', 'developed', 'created', 'portfolio'],
+        'education_background': ['education', 'study', 'university', 'degree', 'academic'],
+        'professional_experience': ['experience', 'job', 'work', 'career', 'internship'],
+        'personal_info': ['about', 'who is', 'tell me', 'background', 'story']
+    }
+    
+    # Anything mentioning these is about the portfolio, never general knowledge
+    PORTFOLIO_TERMS = [
+        'adil', 'portfolio', 'projects', 'skills', 'education', 'experience',
+        'contact', 'github', 'linkedin', 'university', 'degree', 'programming',
+        'asad ali', 'sir ali imran', 'brother', 'mentor', 'giki', 'imsciences',
+        'chatbot', 'ocr', 'internship', 'bootcamp', 'social', 'media'
+    ]
+    
+    # Project headers ("Name (Tech, Tech)") and people ("Name: Relation" + "- " bullets)
+    # as laid out in developmentGuide.md
+    PROJECT_HEADER = re.compile(r'^([A-Z][\w .&+/-]{2,60}?)\s*\(([^()]{2,120})\)\s*$')
+    PERSON_HEADER = re.compile(r'^([A-Z][a-z]+(?: [A-Z][a-z]+){1,3}):\s*\S')
+    
+    # Whole-token fixes the spell corrector cannot reach on its own (short tokens, two edits)
+    TYPO_ALIASES = {
+        'adeel': 'adil', 'skill': 'skills', 'phon': 'phone', 'mobil': 'mobile'
+    }
+    
+    # Matched against the normalized (lowercased) query
+    GENERAL_PATTERNS = [
+        r'capital of', r'weather', r'temperature', r'president', r'prime minister',
+        r'how to make', r'recipe', r'currency of', r'population of'
+    ]
+    # Chatbot self-questions, most specific first: the label picks the canned answer in
+    # PromptTemplates.PERSONA_ANSWERS; "chatbot" phrasings are routed here but answered by the LLM
+    CHATBOT_PATTERNS = {
+        'creator': r'who (?:created|made|built|developed|designed) you|kis ne banaya',
+        'name': r'what.*your name|(?:tumhara|aap ka|apka|tera) naam',
+        'age': r'how old are you\b|(?:tumhari|aap ki|apki) (?:umar|umr)',
+        'about_self': r'tell me about yourself|apne (?:bare|baare) (?:mein|me) batao',
+        'is_bot': r'are you (?:a |an )?(?:bot|robot|human|ai|real|chatbot)\b',
+        'identity': r'\b(?:who|what) are you\b|(?:aap|tum) (?:kaun|kon) ho',
+        'chatbot': r'who.*you|are you'
+    }
+    # Unmatched chatbot phrasings kept for review (most common first in the stats)
+    MAX_PERSONA_CANDIDATES = 200
+    
+    INTENT_EMOJIS = {
+        'social_media': '🔗',
+        'contact_info': '📧',
+        'technical_skills': '🛠️',
+        'projects_work': '💻',
+        'education_background': '🎓',
+        'professional_experience': '💼',
+        'personal_info': '👨‍💻',
+        'general': '📋'
+    }
+    
+    # Fixed extra searches per intent; results only change with the corpus
+    INTENT_SEARCHES = {
+        'social_media': [
+            "github linkedin facebook social contact",
+            "adilsaeed047 profiles networking platforms",
+            "email social media accounts online"
+        ],
+        'technical_skills': [
+            "programming languages python javascript",
+            "technical skills technologies tools",
+            "ai machine learning frameworks"
+        ],
+        'projects_work': [
+            "projects portfolio development work",
+            "built created applications systems",
+            "chatbot ocr machine learning"
+        ],
+        'contact_info': [
+            "email contact adilsaeed047",
+            "github linkedin profiles",
+            "professional networking"
+        ],
+        'education_background': [
+            "education university degree imsciences",
+            "academic background study",
+            "giki bootcamp training"
+        ],
+        'professional_experience': [
+            "experience internship work job",
+            "microsoft learn student ambassador",
+            "professional career"
+        ],
+        'general': ["adil saeed background information"]
+    }
+    
     def __init__(self):
+        # One automaton for every keyword list; the splitter and formatter add theirs too
+        for intent, keywords in self.SEMANTIC_MAP.items():
+            keyword_matcher.add(f"semantic:{intent}", keywords)
+        keyword_matcher.add("portfolio", self.PORTFOLIO_TERMS)
+        keyword_matcher.add("about_adil", ['adil', 'portfolio', 'his', 'him'])
+        self.general_set = pattern_registry.compile("pipeline:general", self.GENERAL_PATTERNS, flags=0)
+        self.chatbot_set = pattern_registry.compile("pipeline:chatbot", self.CHATBOT_PATTERNS, flags=0)
+        
         self.retriever = UltraPreciseRetriever()
-        self.groq_client = None
+        self.llm: Optional[LLMGateway] = None
         self.memory = ConversationMemory()
         self.formatter = ResponseFormatter()
         self.query_splitter = QuerySplitter()
+        self.spell_corrector = SpellCorrector(
+            max_edit_distance=settings.SPELL_MAX_EDIT_DISTANCE,
+            aliases=self.TYPO_ALIASES
+        )
+        self.encoder = None
+        self.semantic_cache = SemanticResponseCache(
+            threshold=settings.SEMANTIC_CACHE_THRESHOLD,
+            max_entries=settings.SEMANTIC_CACHE_MAX_ENTRIES,
+            ttl_seconds=settings.SEMANTIC_CACHE_TTL_SECONDS
+        )
+        self.response_cache = ResponseCache(
+            db_path=settings.RESPONSE_CACHE_DB_PATH,
+            memory_max_entries=settings.RESPONSE_CACHE_MEMORY_MAX_ENTRIES,
+            memory_ttl_seconds=settings.RESPONSE_CACHE_MEMORY_TTL_SECONDS,
+            db_max_entries=settings.RESPONSE_CACHE_DB_MAX_ENTRIES,
+            db_ttl_seconds=settings.RESPONSE_CACHE_DB_TTL_SECONDS
+        ) if settings.RESPONSE_CACHE_ENABLED else None
+        self.single_flight = SingleFlight()
+        self.context_packer = ContextPacker(
+            max_tokens=settings.CONTEXT_MAX_TOKENS,
+            dedup_threshold=settings.CONTEXT_DEDUP_THRESHOLD,
+            tokenizer_name=settings.CONTEXT_TOKENIZER if settings.CONTEXT_TOKENIZER_ENABLED else None
+        )
+        self.extractive = ExtractiveAnswerer()
+        self.extractive_stats = {"fast_path": 0, "fallback": 0, "latency_budget": 0}
+        self.deadline_stats = {"retrieval": 0, "generation": 0}
+        self.loop_monitor = LoopLagMonitor()
+        self.batch_stats = {"batches": 0, "items": 0, "distinct": 0, "batched_searches": 0}
+        self.intent_router = IntentRouter(min_similarity=settings.INTENT_ROUTER_MIN_SIMILARITY)
+        self.keyword_routes = 0
+        self.split_stats = {"compound_queries": 0, "parts": 0, "part_cache_hits": 0}
+        self.math_stats = {"answered": 0, "refused": 0}
+        self.persona_stats = {"canned": 0, "llm": 0}
+        self.persona_candidates: Counter = Counter()
+        self.retrieval_depth_stats = {"full": 0, "early_exit": 0, "deadline": 0, "overload": 0}
+        self.corpus_version = "unversioned"
+        self.intent_plans: Dict[str, List[Dict]] = {}
         self.initialized = False
         self.conversation_context = {}
 
     async def initialize(self):
         """Initialize components"""
         try:
-            self.groq_client = AsyncGroq(api_key=settings.GROQ_API_KEY)
+            self.llm = LLMGateway()
             await self.retriever.initialize()
+            self.corpus_version = self._compute_corpus_version()
+            self._register_corpus_vocabulary()
+            await self._build_intent_plans()
+            await asyncio.to_thread(self.context_packer.load_tokenizer)
+            self.loop_monitor.start()
+            if settings.SEMANTIC_CACHE_ENABLED or settings.INTENT_ROUTER_ENABLED:
+                self.encoder = self._load_encoder()
+            if self.encoder is not None and settings.INTENT_ROUTER_ENABLED:
+                await asyncio.to_thread(
+                    self.intent_router.build,
+                    lambda texts: self.encoder.encode(texts, normalize_embeddings=True)
+                )
             self.initialized = True
             logger.info("RAG pipeline initialized")
         except Exception as e:
             logger.error(f"Failed to initialize: {e}")
             raise
 
+    def _compute_corpus_version(self) -> str:
+        """Content hash of the source documents, identical across workers on the same corpus"""
+        digest = hashlib.sha256()
+        documents_dir = Path(settings.DOCUMENTS_PATH)
+        
+        if documents_dir.exists():
+            for path in sorted(p for p in documents_dir.rglob('*') if p.is_file()):
+                digest.update(path.name.encode('utf-8'))
+                digest.update(path.read_bytes())
+        
+        return digest.hexdigest()[:16]
+
+    def _register_corpus_vocabulary(self) -> int:
+        """Hot-add project names, technologies and people from the source documents"""
+        documents_dir = Path(settings.DOCUMENTS_PATH)
+        texts = []
+        terms, people = set(), {}
+        paths = sorted(documents_dir.rglob('*.txt')) if documents_dir.exists() else []
+        for path in paths:
+            try:
+                lines = path.read_text(encoding='utf-8').splitlines()
+            except Exception as e:
+                logger.warning(f"Could not read {path.name} for vocabulary: {e}")
+                continue
+            
+            texts.append('\n'.join(lines))
+            for index, line in enumerate(lines):
+                line = line.strip()
+                project = self.PROJECT_HEADER.match(line)
+                if project:
+                    terms.add(project.group(1).strip().lower())
+                    terms.update(t.strip().lower() for t in project.group(2).split(',') if len(t.strip()) > 2)
+                    continue
+                
+                person = self.PERSON_HEADER.match(line)
+                following = lines[index + 1].strip() if index + 1 < len(lines) else ''
+                if person and following.startswith('- '):
+                    name = person.group(1).lower()
+                    people[name.split()[0]] = [name, name.split()[0]]
+                    terms.add(name)
+        
+        added = keyword_matcher.add("portfolio", terms)
+        for person, patterns in people.items():
+            if person not in self.query_splitter.person_patterns:
+                self.query_splitter.add_person(person, patterns)
+        
+        if added or people:
+            logger.info(f"Keyword vocabulary: {added} new portfolio terms, {len(people)} people from documents")
+        
+        self.spell_corrector.update(self._spelling_vocabulary(texts))
+        return added
+
+    def _spelling_vocabulary(self, texts: List[str]) -> Dict[str, int]:
+        """Word counts from the indexed documents plus every term the pipeline itself knows"""
+        vocabulary = count_words(texts)
+        known = list(keyword_matcher.vocabulary()) + list(STOPWORDS) + list(self.TYPO_ALIASES.values())
+        known += COMMON_WORDS
+        known += [phrase for phrases in INTENT_EXEMPLARS.values() for phrase in phrases]
+        known += [name for patterns in self.query_splitter.person_patterns.values() for name in patterns]
+        for word, count in count_words(known).items():
+            vocabulary[word] = vocabulary.get(word, 0) + count
+        return vocabulary
+
+    def _cache_key_text(self, normalized_query: str) -> str:
+        """Collapse whitespace and trailing punctuation so trivial variants share a cache entry"""
+        return re.sub(r'\s+', ' ', normalized_query).strip(' ?!.')
+
+    def _is_cacheable(self, formatted: Dict[str, Any], semantic: bool = False) -> bool:
+        """Only cache complete answers (never degraded fallbacks)"""
+        excluded = self.SEMANTIC_UNCACHEABLE_QUERY_TYPES if semantic else self.UNCACHEABLE_QUERY_TYPES
+        return not formatted.get("degraded") and formatted.get("query_type") not in excluded
+
+    def _route_query(self, analysis: QueryAnalysis, query_embedding: Optional[np.ndarray] = None) -> RouteDecision:
+        """Pick the handler and intent for a query: chatbot, general or portfolio"""
+        # Arithmetic is syntax, not meaning - embeddings cannot tell 2+2 from 2*3
+        if analysis.math_expression is not None:
+            return RouteDecision("general", "general", 1.0, "keywords")
+        
+        decision = self.intent_router.route(query_embedding)
+        # As with keyword routing, anything naming the portfolio is never general knowledge
+        if decision is not None and not (decision.handler == "general"
+                                         and self._is_adil_portfolio_query(analysis)):
+            return decision
+        
+        self.keyword_routes += 1
+        return self._route_by_keywords(analysis)
+
+    def _route_by_keywords(self, analysis: QueryAnalysis) -> RouteDecision:
+        """Keyword routing, used when no encoder is loaded or no intent centroid is close"""
+        normalized = analysis.normalized
+        if self._is_chatbot_personal_query(normalized):
+            return RouteDecision("chatbot", "chatbot", 1.0, "keywords")
+        if self._is_general_knowledge(analysis) and not self._is_adil_portfolio_query(analysis):
+            return RouteDecision("general", "general", 1.0, "keywords")
+        
+        return RouteDecision("portfolio", analysis.primary_intent, 1.0, "keywords", list(analysis.intents))
+
+    def _load_encoder(self):
+        """Reuse the retriever's sentence-transformers model for query embeddings"""
+        for attr in ('embedding_model', 'model', 'encoder'):
+            encoder = getattr(self.retriever, attr, None)
+            if hasattr(encoder, 'encode'):
+                return encoder
+        
+        try:
+            from sentence_transformers import SentenceTransformer
+            return SentenceTransformer(settings.EMBEDDING_MODEL)
+        except Exception as e:
+            logger.warning(f"Query embeddings unavailable, semantic cache disabled: {e}")
+            return None
+
+    async def _embed_query(self, text: str) -> Optional[np.ndarray]:
+        """Embed a query as a unit vector (None when no encoder is available)"""
+        return (await self._embed_queries([text]))[0]
+
+    async def _embed_queries(self, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """Embed several queries in one encoder batch"""
+        if self.encoder is None or not texts:
+            return [None] * len(texts)
+        
+        try:
+            embeddings = await asyncio.to_thread(self.encoder.encode, texts, normalize_embeddings=True)
+            return [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
+        except Exception as e:
+            logger.warning(f"Query embedding failed: {e}")
+            return [None] * len(texts)
+
     def _normalize_query(self, query: str) -> str:
         """Enhanced query normalization with typo fixes"""
-        typo_fixes = {
-            'adeel': 'adil', 'contct': 'contact', 'porjects': 'projects',
-            'skils': 'skills', 'skill': 'skills', 'eduction': 'education', 
-            'experiance': 'experience', 'mobil': 'mobile', 'phon': 'phone',
-            'socila': 'social', 'mdeia': 'media', 'acounts': 'accounts',
-            'linkedin': 'linkedin', 'github': 'github'
-        }
-        
         normalized = query.lower().strip()
-        for typo, fix in typo_fixes.items():
-            normalized = normalized.replace(typo, fix)
-        
+        if settings.SPELL_CORRECTION_ENABLED:
+            # Token by token against the corpus vocabulary ("skill" -> "skills", never "skillss")
+            normalized = self.spell_corrector.correct(normalized)
         return normalized
 
-    def _analyze_query_semantics(self, query: str) -> Dict[str, Any]:
-        """Analyze query for semantic meaning and synonyms"""
-        normalized = self._normalize_query(query)
+    def analyze_query(self, query: str, language: str = "en") -> QueryAnalysis:
+        """Derive everything the request needs from the query text, once"""
+        lowered = query.lower().strip()
+        normalized = self._normalize_query(lowered)
         
-        # Semantic mappings - what the user REALLY wants
-        semantic_map = {
-            'social_media': ['social', 'media', 'links', 'profiles', 'accounts', 'platforms'],
-            'contact_info': ['contact', 'reach', 'get in touch', 'find', 'connect', 'email'],
-            'technical_skills': ['skills', 'technologies', 'programming', 'languages', 'tools', 'tech'],
-            'projects_work': ['projects', 'work', 'built', 'developed', 'created', 'portfolio'],
-            'education_background': ['education', 'study', 'university', 'degree', 'academic'],
-            'professional_experience': ['experience', 'job', 'work', 'career', 'internship'],
-            'personal_info': ['about', 'who is', 'tell me', 'background', 'story']
-        }
+        # Single pass over every registered keyword list
+        matches = keyword_matcher.match(normalized)
+        
+        keyword_hits = {}
+        for intent, keywords in self.SEMANTIC_MAP.items():
+            hits = matches.get(f"semantic:{intent}")
+            if hits:
+                keyword_hits[intent] = tuple(k for k in keywords if k in hits)
         
-        detected_intents = []
-        for intent, keywords in semantic_map.items():
-            if any(keyword in normalized for keyword in keywords):
-                detected_intents.append(intent)
+        return QueryAnalysis(
+            query=query,
+            lowered=lowered,
+            normalized=normalized,
+            language=language,
+            keyword_hits=keyword_hits,
+            people=tuple(self.query_splitter.detect_people(normalized, matches)),
+            wants_images=self.formatter.detect_image_request(normalized, matches),
+            length_class=self.formatter.predict_response_length(query, matches),
+            matches=matches,
+            # From the text before typo fixes: "sqrt" and "factorial" are not corpus words
+            math_expression=math_eval.extract_expression(lowered)
+        )
+
+    def _intent_info(self, decision: RouteDecision, analysis: QueryAnalysis) -> Dict[str, Any]:
+        """Intent analysis in the shape of _analyze_query_semantics, from a routing decision"""
+        intents = [i for i in decision.intents if i != 'general']
+        return {
+            'primary_intent': decision.intent,
+            'all_intents': intents,
+            'needs_comprehensive_search': len(intents) > 0,
+            'query_complexity': 'complex' if len(intents) > 1 else 'simple',
+            'response_length': analysis.length_class
+        }
+
+    def _analyze_query_semantics(self, analysis: QueryAnalysis) -> Dict[str, Any]:
+        """Analyze query for semantic meaning and synonyms"""
+        detected_intents = list(analysis.intents)
         
         return {
-            'primary_intent': detected_intents[0] if detected_intents else 'general',
+            'primary_intent': analysis.primary_intent,
             'all_intents': detected_intents,
             'needs_comprehensive_search': len(detected_intents) > 0,
-            'query_complexity': 'complex' if len(detected_intents) > 1 else 'simple'
+            'query_complexity': 'complex' if len(detected_intents) > 1 else 'simple',
+            'response_length': analysis.length_class
         }
 
-    def _is_adil_portfolio_query(self, query: str) -> bool:
+    def _is_adil_portfolio_query(self, analysis: QueryAnalysis) -> bool:
         """Check if query is specifically about Adil's portfolio content"""
-        normalized = self._normalize_query(query)
-        
-        portfolio_terms = [
-            'adil', 'portfolio', 'projects', 'skills', 'education', 'experience',
-            'contact', 'github', 'linkedin', 'university', 'degree', 'programming',
-            'asad ali', 'sir ali imran', 'brother', 'mentor', 'giki', 'imsciences',
-            'chatbot', 'ocr', 'internship', 'bootcamp', 'social', 'media'
-        ]
-        
-        return any(term in normalized for term in portfolio_terms)
+        return "portfolio" in analysis.matches
 
-    def _is_general_knowledge(self, query: str) -> bool:
+    def _is_general_knowledge(self, analysis: QueryAnalysis) -> bool:
         """Detect general knowledge queries"""
-        normalized = self._normalize_query(query)
+        normalized = analysis.normalized
         
         # Math
-        if re.search(r'\d+\s*[\+\-\*\/]\s*\d+', normalized):
+        if analysis.math_expression is not None:
             return True
         
         # Clear general knowledge patterns
-        general_patterns = [
-            r'capital of', r'weather', r'temperature', r'president', r'prime minister',
-            r'how to make', r'recipe', r'currency of', r'population of'
-        ]
-        
-        is_general = any(re.search(pattern, normalized) for pattern in general_patterns)
-        is_about_adil = any(term in normalized for term in ['adil', 'portfolio', 'his', 'him'])
+        is_general = self.general_set.contains(normalized)
+        is_about_adil = "about_adil" in analysis.matches
         
         return is_general and not is_about_adil
 
-    def _is_chatbot_personal_query(self, query: str) -> bool:
+    def _is_chatbot_personal_query(self, normalized: str) -> bool:
         """Detect chatbot personal queries"""
-        normalized = self._normalize_query(query)
-        
-        personal_patterns = [
-            r'what.*your name', r'who.*you', r'how old.*you', r'who created you',
-            r'tell me about yourself', r'are you', r'what are you'
-        ]
-        
-        return any(re.search(pattern, normalized) for pattern in personal_patterns)
+        return self.chatbot_set.contains(normalized)
 
     async def process_query(self, query: str, language: str = "en", session_id: str = None, 
-                          conversation_history: List = None, user_context: Dict = None) -> Dict[str, Any]:
-        """Process queries with intelligent semantic understanding - UPDATED with image support"""
+                          conversation_history: List = None, user_context: Dict = None,
+                          token_queue: Optional[asyncio.Queue] = None,
+                          gate: Optional[Awaitable[Any]] = None,
+                          deadline: Optional[float] = None,
+                          query_embedding: Optional[np.ndarray] = None,
+                          analysis: Optional[QueryAnalysis] = None,
+                          route_decision: Optional[RouteDecision] = None,
+                          retrieved_docs: Optional[List[Dict]] = None,
+                          cache_lookup: Optional[Tuple[Optional[str], Optional[Dict[str, Any]]]] = None
+                          ) -> Dict[str, Any]:
+        """Process queries with intelligent semantic understanding - UPDATED with image support
+
+        When token_queue is given, LLM tokens are pushed to it as they arrive.
+        Cache lookups, embedding and retrieval run concurrently; nothing is returned
+        or generated until gate (e.g. the caller's safety check) has passed.
+        deadline (time.monotonic()) bounds retrieval and every LLM call.
+        query_embedding skips embedding when the caller already has it (batches);
+        analysis, route_decision, retrieved_docs (the primary search) and cache_lookup
+        (exact cache key, cached answer from either cache) likewise reuse the caller's work.
+        """
         
         if not self.initialized:
             raise RuntimeError("Pipeline not initialized")
         
         start_time = time.time()
+        if deadline is None:
+            deadline = time.monotonic() + settings.REQUEST_DEADLINE_SECONDS
+        if analysis is None:
+            analysis = self.analyze_query(query, language)
+        normalized_query = analysis.normalized
+        
+        graph = StageGraph()
+        graph.add("exact_cache", lambda: cache_lookup if cache_lookup is not None
+                  else self._lookup_exact_cache(normalized_query, language))
+        graph.add("embed", lambda: query_embedding if query_embedding is not None
+                  else self._embed_query(normalized_query))
+        graph.add("route", lambda embed: route_decision if route_decision is not None
+                  else self._route_query(analysis, embed), deps=("embed",))
+        graph.add("semantic_cache", lambda embed: self.semantic_cache.lookup(embed, language)
+                  if embed is not None and cache_lookup is None else None, deps=("embed",))
+        graph.add("retrieval", lambda: retrieved_docs if retrieved_docs is not None
+                  else self.retriever.hybrid_retrieve(query=query, top_k=4))
+        graph.add("gate", lambda: gate)
         
         try:
-            # Route based on query type
-            if self._is_chatbot_personal_query(query):
-                response = await self._handle_chatbot_query(query)
-            elif self._is_general_knowledge(query) and not self._is_adil_portfolio_query(query):
-                response = await self._handle_general_query(query)
+            graph.start("route")
+            
+            # Exact repeat of an answered question (shared across workers),
+            # then a near-duplicate: either way skip retrieval and generation
+            cache_key, cached = await graph.result("exact_cache")
+            retrieval = None
+            if not cached:
+                # Speculative: primary retrieval overlaps routing and the semantic lookup,
+                # and is dropped if the query turns out not to be about the portfolio
+                retrieval = graph.start("retrieval")
+                decision = await graph.result("route")
+                if decision.handler != "portfolio":
+                    graph.cancel("retrieval")
+                    retrieval = None
+                cached = await graph.result("semantic_cache")
+            if cached:
+                graph.cancel("retrieval")
+                await graph.result("gate")
+                cached["processing_time"] = (time.time() - start_time) * 1000
+                cached["stage_timings"] = graph.get_timings()
+                return cached
+            
+            query_embedding = await graph.result("embed")
+            primary_docs = retrieval
+            route = decision.handler
+            
+            # Streaming requests need their own token feed, so only buffered ones are coalesced
+            if token_queue is not None:
+                answer = lambda gate: self._answer_query(query, route, language, cache_key, normalized_query,
+                                                         query_embedding, token_queue, primary_docs, deadline,
+                                                         decision, analysis)
             else:
-                response = await self._handle_adil_query_intelligent(query)
+                flight_key = (self._cache_key_text(normalized_query), language)
+                answer = lambda gate: self._answer_coalesced(flight_key, query, route, language, cache_key,
+                                                             normalized_query, query_embedding, None, primary_docs,
+                                                             deadline, decision, analysis)
+            graph.add("answer", answer, deps=("gate",))
+            formatted = await graph.result("answer")
             
-            # CRITICAL: Add original query to response for formatter
-            response["original_query"] = query
+            # A coalesced follower never used its own speculative retrieval
+            graph.cancel("retrieval")
             
-            # Format response - UPDATED to handle images
-            formatted = await self.formatter.format_response(response, language)
             formatted["processing_time"] = (time.time() - start_time) * 1000
+            formatted["stage_timings"] = graph.get_timings()
             
             return formatted
             
+        except StageRejected:
+            raise
         except Exception as e:
             logger.error(f"Processing error: {e}")
             return await self.formatter.format_response({
@@ -161,67 +529,344 @@ class RAGPipeline:
                 "original_query": query  # ADDED
             }, language)
 
-    async def _handle_chatbot_query(self, query: str) -> Dict[str, Any]:
+    async def process_batch(self, items: List[Dict[str, Any]], max_concurrency: int = 8) -> List[Dict[str, Any]]:
+        """Answer many queries concurrently, results in input order
+
+        Queries are embedded in one encoder batch and routed once, the primary searches
+        of portfolio queries the caches cannot answer run as one retrieval batch, repeated
+        questions are answered once and at most max_concurrency queries run through
+        process_query at a time.
+        """
+        analyses = [item.get("analysis") or self.analyze_query(item["query"], item.get("language", "en"))
+                    for item in items]
+        normalized = [analysis.normalized for analysis in analyses]
+        embeddings = await self._embed_queries(normalized)
+        
+        # A follow-up in a session with history may resolve its pronouns differently
+        # from the same words elsewhere, so it is only shared within its session
+        owners = []
+        distinct: Dict[Tuple[str, str, Optional[str]], int] = {}
+        for index, item in enumerate(items):
+            session = item.get("session_id") if item.get("conversation_history") else None
+            key = (self._cache_key_text(normalized[index]), item.get("language", "en"), session)
+            owners.append(distinct.setdefault(key, index))
+        firsts = list(distinct.values())
+        
+        decisions = {index: self._route_query(analyses[index], embeddings[index]) for index in firsts}
+        
+        # Cache hits (a warm regression run or a repeated warm-up) skip retrieval entirely
+        lookups = await asyncio.gather(*(
+            self._lookup_exact_cache(normalized[index], items[index].get("language", "en")) for index in firsts
+        ))
+        cache_lookups = {}
+        for index, (cache_key, cached) in zip(firsts, lookups):
+            if not cached and embeddings[index] is not None:
+                cached = self.semantic_cache.lookup(embeddings[index], items[index].get("language", "en"))
+            cache_lookups[index] = (cache_key, cached)
+        
+        portfolio = [index for index in firsts
+                     if decisions[index].handler == "portfolio" and not cache_lookups[index][1]]
+        retrieved: Dict[int, List[Dict]] = {}
+        if portfolio:
+            try:
+                results = await self._hybrid_retrieve_many([items[index]["query"] for index in portfolio],
+                                                           [4] * len(portfolio))
+                retrieved = dict(zip(portfolio, results))
+            except Exception as e:
+                logger.warning(f"Batch retrieval failed, retrieving per query: {e}")
+        
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+        
+        async def answer(index: int) -> Dict[str, Any]:
+            item = items[index]
+            async with semaphore:
+                # The deadline starts when the query does, not when the batch arrived
+                return await self.process_query(
+                    query=item["query"],
+                    language=item.get("language", "en"),
+                    session_id=item.get("session_id"),
+                    query_embedding=embeddings[index],
+                    analysis=analyses[index],
+                    route_decision=decisions[index],
+                    retrieved_docs=retrieved.get(index),
+                    cache_lookup=cache_lookups[index]
+                )
+        
+        tasks = {index: asyncio.ensure_future(answer(index)) for index in firsts}
+        await asyncio.gather(*tasks.values())
+        
+        self.batch_stats["batches"] += 1
+        self.batch_stats["items"] += len(items)
+        self.batch_stats["distinct"] += len(tasks)
+        self.batch_stats["batched_searches"] += len(retrieved)
+        
+        return [copy.deepcopy(tasks[owner].result()) for owner in owners]
+
+    async def _lookup_exact_cache(self, normalized_query: str,
+                                  language: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+        """Return the exact-match cache key and any cached answer"""
+        if not self.response_cache:
+            return None, None
+        
+        # The route is a function of the query text, so it is not part of the key
+        cache_key = ResponseCache.make_key(
+            self._cache_key_text(normalized_query), language, self.corpus_version
+        )
+        return cache_key, await self.response_cache.get(cache_key)
+
+    async def _answer_coalesced(self, flight_key: Tuple[str, str], *args) -> Dict[str, Any]:
+        """Answer through the single-flight layer (each caller gets its own copy)"""
+        return copy.deepcopy(await self.single_flight.run(flight_key, lambda: self._answer_query(*args)))
+
+    async def _answer_query(self, query: str, route: str, language: str, cache_key: Optional[str],
+                            normalized_query: str, query_embedding: Optional[np.ndarray],
+                            token_queue: Optional[asyncio.Queue] = None,
+                            primary_docs: Optional[Awaitable[List[Dict]]] = None,
+                            deadline: Optional[float] = None,
+                            decision: Optional[RouteDecision] = None,
+                            analysis: Optional[QueryAnalysis] = None) -> Dict[str, Any]:
+        """Run the routed handler, format the answer and populate the caches"""
+        
+        if analysis is None:
+            analysis = self.analyze_query(query, language)
+        
+        # Compound portfolio questions are answered part by part, concurrently;
+        # streamed answers stay single-prompt so tokens do not interleave
+        parts = self._split_compound_query(analysis) if route == "portfolio" and token_queue is None else []
+        
+        if parts:
+            formatted = await self._answer_compound_query(query, parts, language, deadline)
+        else:
+            # Route based on query type
+            if route == "chatbot":
+                response = await self._handle_chatbot_query(query, token_queue, deadline, analysis)
+            elif route == "general":
+                response = await self._handle_general_query(query, token_queue, deadline, analysis)
+            else:
+                response = await self._handle_adil_query_intelligent(query, token_queue, primary_docs, deadline,
+                                                                     decision, analysis)
+            
+            # CRITICAL: Add original query to response for formatter
+            response["original_query"] = query
+            response.setdefault("response_length", analysis.length_class)
+            response["wants_images"] = analysis.wants_images
+            
+            # Format response - UPDATED to handle images
+            formatted = await self.formatter.format_response(response, language)
+        
+        if cache_key and self._is_cacheable(formatted):
+            await self.response_cache.set(cache_key, formatted)
+        if query_embedding is not None and self._is_cacheable(formatted, semantic=True):
+            self.semantic_cache.store(normalized_query, query_embedding, language, formatted)
+        
+        return formatted
+
+    def _split_compound_query(self, analysis: QueryAnalysis) -> List[Dict[str, str]]:
+        """Sub-queries of a multi-person or multi-topic question (empty when it is a single question)"""
+        if not settings.QUERY_SPLITTING_ENABLED:
+            return []
+        
+        parts = self.query_splitter.split_query(analysis.query, people=list(analysis.people),
+                                                matches=analysis.matches)
+        distinct = []
+        seen = set()
+        for part in parts:
+            key = self._cache_key_text(self._normalize_query(part["query"]))
+            if key not in seen:
+                seen.add(key)
+                distinct.append(part)
+        
+        return distinct[:settings.QUERY_SPLIT_MAX_PARTS] if len(distinct) > 1 else []
+
+    async def _answer_compound_query(self, query: str, parts: List[Dict[str, str]], language: str,
+                                     deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Answer each part concurrently and merge them into one formatted answer"""
+        
+        self.split_stats["compound_queries"] += 1
+        self.split_stats["parts"] += len(parts)
+        logger.info(f"Compound query split into {len(parts)} parts: {[p['query'][:30] for p in parts]}")
+        
+        answers = await asyncio.gather(*(
+            self._answer_query_part(part["query"], language, deadline) for part in parts
+        ))
+        
+        sources, images = [], []
+        for answer in answers:
+            sources += [s for s in answer.get("sources", []) if s not in sources]
+            images += [i for i in answer.get("images", []) if i not in images]
+        
+        # The longest part decides the length class; confidence is the weakest part's
+        lengths = [a.get("response_length") for a in answers]
+        response_length = next((l for l in ("detailed", "medium", "short") if l in lengths), None)
+        
+        return {
+            "answer": self.formatter.format_multi_query_response(answers, language),
+            "sources": sources,
+            "query_type": "multi_query",
+            "confidence": min(a.get("confidence", 0.0) for a in answers),
+            "images": images,
+            "show_images_after_ms": 2500 if images else 0,
+            "response_length": response_length,
+            "original_query": query,
+            "degraded": any(a.get("degraded") for a in answers),
+            "parts": [a.get("original_query", "") for a in answers]
+        }
+
+    async def _answer_query_part(self, query: str, language: str,
+                                 deadline: Optional[float] = None) -> Dict[str, Any]:
+        """Answer one part of a compound query, reusing and filling the exact-match cache"""
+        
+        analysis = self.analyze_query(query, language)
+        cache_key, cached = await self._lookup_exact_cache(analysis.normalized, language)
+        if cached:
+            self.split_stats["part_cache_hits"] += 1
+            return cached
+        
+        response = await self._handle_adil_query_intelligent(query, None, None, deadline, analysis=analysis)
+        response["original_query"] = query
+        response.setdefault("response_length", analysis.length_class)
+        response["wants_images"] = analysis.wants_images
+        formatted = await self.formatter.format_response(response, language)
+        
+        if cache_key and self._is_cacheable(formatted):
+            await self.response_cache.set(cache_key, formatted)
+        
+        return formatted
+
+    async def process_query_stream(self, query: str, language: str = "en", session_id: str = None,
+                                   deadline: Optional[float] = None,
+                                   analysis: Optional[QueryAnalysis] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Stream LLM tokens as they arrive, then the formatted result as the last event"""
+        
+        token_queue: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(self.process_query(
+            query=query,
+            language=language,
+            session_id=session_id,
+            token_queue=token_queue,
+            deadline=deadline,
+            analysis=analysis
+        ))
+        # Sentinel wakes the consumer once the pipeline has finished
+        task.add_done_callback(lambda _: token_queue.put_nowait(None))
+        
+        try:
+            while True:
+                token = await token_queue.get()
+                if token is None:
+                    break
+                yield {"type": "token", "content": token}
+            
+            yield {"type": "done", "result": task.result()}
+        finally:
+            if not task.done():
+                task.cancel()
+
+    async def _handle_chatbot_query(self, query: str, token_queue: Optional[asyncio.Queue] = None,
+                                    deadline: Optional[float] = None,
+                                    analysis: Optional[QueryAnalysis] = None) -> Dict[str, Any]:
         """Handle chatbot personal queries briefly"""
         
+        normalized = analysis.normalized if analysis is not None else self._normalize_query(query)
+        language = analysis.language if analysis is not None else "en"
+        
+        # Known self-questions are answered from the persona table, no LLM call
+        persona_intent = self.chatbot_set.search(normalized)
+        canned = PromptTemplates.get_persona_answer(persona_intent, language) if persona_intent else None
+        if canned:
+            self.persona_stats["canned"] += 1
+            return {
+                "answer": canned,
+                "sources": [],
+                "query_type": "chatbot",
+                "confidence": 0.95
+            }
+        
+        self.persona_stats["llm"] += 1
+        self._record_persona_candidate(normalized)
+        
         system_prompt = """You are Adil's portfolio assistant. Answer personal questions about yourself briefly (1 sentence) and redirect to Adil's portfolio."""
 
         try:
-            response = await self.groq_client.chat.completions.create(
-                model=settings.GROQ_MODEL_EN,
+            route, model = self._select_model("chatbot")
+            answer = await self.llm.complete(
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": query}
                 ],
-                temperature=0.2,
-                max_tokens=50
+                profile="chatbot",
+                route=route,
+                token_queue=token_queue,
+                deadline=deadline
             )
             
             return {
-                "answer": response.choices[0].message.content.strip(),
+                "answer": answer.strip(),
                 "sources": [],
                 "query_type": "chatbot",
                 "confidence": 0.95
             }
             
-        except Exception:
+        except Exception as e:
+            logger.warning(f"Chatbot completion failed, using canned answer: {e}")
             return {
                 "answer": "I'm Adil's portfolio assistant. Ask me about his projects or experience!",
                 "sources": [],
                 "query_type": "chatbot",
-                "confidence": 0.9
+                "confidence": 0.9,
+                "degraded": True
             }
 
-    async def _handle_general_query(self, query: str) -> Dict[str, Any]:
+    def _record_persona_candidate(self, normalized: str):
+        """Log a chatbot phrasing the persona table missed, as a candidate to add to it"""
+        logger.info(f"Persona answer candidate (no canned match): {normalized!r}")
+        self.persona_candidates[self._cache_key_text(normalized)] += 1
+        if len(self.persona_candidates) > self.MAX_PERSONA_CANDIDATES:
+            self.persona_candidates = Counter(dict(self.persona_candidates.most_common(self.MAX_PERSONA_CANDIDATES // 2)))
+
+    async def _handle_general_query(self, query: str, token_queue: Optional[asyncio.Queue] = None,
+                                    deadline: Optional[float] = None,
+                                    analysis: Optional[QueryAnalysis] = None) -> Dict[str, Any]:
         """Handle general knowledge without portfolio attribution"""
         
-        # Math
-        math_match = re.search(r'(\d+)\s*[\+\-\*\/]\s*(\d+)', query)
-        if math_match:
+        # Math is answered locally by the sandboxed evaluator, never by the LLM
+        expression = analysis.math_expression if analysis is not None else math_eval.extract_expression(query.lower())
+        if expression is not None:
             try:
-                result = eval(math_match.group(0))
+                result = math_eval.format_number(math_eval.evaluate(expression))
+                self.math_stats["answered"] += 1
                 return {
                     "answer": f"🔢 The result is **{result}**.",
                     "sources": [],
                     "query_type": "math",
                     "confidence": 0.95
                 }
-            except:
-                pass
+            except math_eval.MathError as e:
+                self.math_stats["refused"] += 1
+                return {
+                    "answer": f"🔢 I can't compute that: {e}.",
+                    "sources": [],
+                    "query_type": "math",
+                    "confidence": 0.9
+                }
         
         # General knowledge
         try:
-            response = await self.groq_client.chat.completions.create(
-                model=settings.GROQ_MODEL_EN,
+            route, model = self._select_model("general")
+            answer = await self.llm.complete(
+                model=model,
                 messages=[
                     {"role": "system", "content": "Answer general knowledge questions briefly and accurately. One sentence only."},
                     {"role": "user", "content": query}
                 ],
-                temperature=0.1,
-                max_tokens=50
+                profile="general",
+                route=route,
+                token_queue=token_queue,
+                deadline=deadline
             )
             
-            answer = response.choices[0].message.content.strip()
+            answer = answer.strip()
             return {
                 "answer": f"🌍 {answer}",
                 "sources": [],
@@ -229,29 +874,59 @@ class RAGPipeline:
                 "confidence": 0.8
             }
             
-        except Exception:
+        except Exception as e:
+            logger.warning(f"General completion failed, redirecting: {e}")
             return {
                 "answer": "📋 I specialize in Adil's portfolio information. Ask about his projects, skills, or experience!",
                 "sources": [],
                 "query_type": "redirect",
-                "confidence": 0.7
+                "confidence": 0.7,
+                "degraded": True
             }
 
-    async def _handle_adil_query_intelligent(self, query: str) -> Dict[str, Any]:
+    async def _handle_adil_query_intelligent(self, query: str, token_queue: Optional[asyncio.Queue] = None,
+                                             primary_docs: Optional[Awaitable[List[Dict]]] = None,
+                                             deadline: Optional[float] = None,
+                                             decision: Optional[RouteDecision] = None,
+                                             analysis: Optional[QueryAnalysis] = None) -> Dict[str, Any]:
         """Intelligent query handling with semantic understanding"""
         
         try:
-            # Get query intent and semantic variations
-            intent_info = self._analyze_query_semantics(query)
+            # Get query intent and semantic variations (already known when the router decided)
+            if analysis is None:
+                analysis = self.analyze_query(query)
+            if decision is not None and decision.handler == "portfolio":
+                intent_info = self._intent_info(decision, analysis)
+            else:
+                intent_info = self._analyze_query_semantics(analysis)
             
             # Multi-strategy retrieval based on semantic analysis
-            docs = await self._intelligent_retrieval(query, intent_info)
+            docs = await self._intelligent_retrieval(query, intent_info, primary_docs, deadline)
             
             if not docs:
                 return self._no_portfolio_info_response(query)
             
+            # Fast path: single-fact intents answered straight from the chunks
+            if (intent_info['primary_intent'] in settings.EXTRACTIVE_FAST_PATH_INTENTS
+                    and intent_info['query_complexity'] == 'simple'):
+                extractive = self._extractive_answer(query, docs, intent_info)
+                if extractive and extractive['confidence'] >= settings.EXTRACTIVE_FAST_PATH_MIN_CONFIDENCE:
+                    self.extractive_stats['fast_path'] += 1
+                    return extractive
+            
             # Generate intelligent response with clean formatting
-            return await self._generate_intelligent_response(query, docs, intent_info)
+            return await self._generate_intelligent_response(query, docs, intent_info, token_queue, deadline)
+            
+        except DeadlineExceeded as e:
+            self.deadline_stats["retrieval"] += 1
+            logger.warning(f"Retrieval did not finish in time: {e}")
+            return {
+                "answer": "Information temporarily unavailable.",
+                "sources": [],
+                "query_type": "error",
+                "confidence": 0.5,
+                "degraded": True
+            }
             
         except Exception as e:
             logger.error(f"Intelligent query error: {e}")
@@ -259,63 +934,35 @@ class RAGPipeline:
                 "answer": "Information temporarily unavailable.",
                 "sources": [],
                 "query_type": "error",
-                "confidence": 0.5
+                "confidence": 0.5,
+                "degraded": True
             }
 
-    async def _intelligent_retrieval(self, query: str, intent_info: Dict) -> List[Dict]:
+    async def _intelligent_retrieval(self, query: str, intent_info: Dict,
+                                     primary_docs: Optional[Awaitable[List[Dict]]] = None,
+                                     deadline: Optional[float] = None) -> List[Dict]:
         """Multi-strategy retrieval based on semantic understanding"""
         
         all_docs = []
         primary_intent = intent_info['primary_intent']
         
-        # Primary retrieval
-        docs = await self.retriever.hybrid_retrieve(query=query, top_k=4)
+        # Only the user's own query is searched per request (possibly already started)
+        if primary_docs is None:
+            primary_docs = self.retriever.hybrid_retrieve(query=query, top_k=4)
+        docs = await run_within(primary_docs, deadline, "retrieval")
         all_docs.extend(docs)
         
-        # Intent-specific additional searches
-        if primary_intent == 'social_media':
-            searches = [
-                "github linkedin facebook social contact",
-                "adilsaeed047 profiles networking platforms",
-                "email social media accounts online"
-            ]
-        elif primary_intent == 'technical_skills':
-            searches = [
-                "programming languages python javascript",
-                "technical skills technologies tools",
-                "ai machine learning frameworks"
-            ]
-        elif primary_intent == 'projects_work':
-            searches = [
-                "projects portfolio development work",
-                "built created applications systems",
-                "chatbot ocr machine learning"
-            ]
-        elif primary_intent == 'contact_info':
-            searches = [
-                "email contact adilsaeed047",
-                "github linkedin profiles",
-                "professional networking"
-            ]
-        elif primary_intent == 'education_background':
-            searches = [
-                "education university degree imsciences",
-                "academic background study",
-                "giki bootcamp training"
-            ]
-        elif primary_intent == 'professional_experience':
-            searches = [
-                "experience internship work job",
-                "microsoft learn student ambassador",
-                "professional career"
-            ]
-        else:
-            searches = ["adil saeed background information"]
-        
-        # Execute additional searches
-        for search_query in searches:
-            extra_docs = await self.retriever.hybrid_retrieve(query=search_query, top_k=2)
-            all_docs.extend(extra_docs)
+        # Intent searches are fixed strings answered from the precomputed plans, so they cost
+        # nothing here. The depth decides how much context generation gets, and whether a
+        # plan that was never precomputed is searched now
+        depth = self._retrieval_depth(docs, deadline)
+        self.retrieval_depth_stats[depth] += 1
+        intent_info['retrieval_depth'] = depth
+        plan_intent = primary_intent if primary_intent in self.INTENT_SEARCHES else 'general'
+        plan = self.intent_plans.get(plan_intent)
+        if plan is None and depth == "full":
+            plan = await run_within(self._run_intent_plan(plan_intent), deadline, "intent retrieval")
+        all_docs.extend(dict(doc) for doc in plan or ())
         
         # Remove duplicates and return best results
         seen_ids = set()
@@ -328,24 +975,70 @@ class RAGPipeline:
         
         return sorted(unique_docs, key=lambda x: x.get('retrieval_score', 0), reverse=True)[:8]
 
-    async def _generate_intelligent_response(self, query: str, docs: List[Dict], intent_info: Dict) -> Dict[str, Any]:
+    def _retrieval_depth(self, primary_docs: List[Dict], deadline: Optional[float]) -> str:
+        """Decide how much context a request gets: full, early_exit, deadline or overload"""
+        if not settings.ADAPTIVE_RETRIEVAL_ENABLED:
+            return "full"
+        
+        best_score = max((doc.get('retrieval_score', 0) for doc in primary_docs), default=0)
+        if best_score >= settings.RETRIEVAL_EARLY_EXIT_SCORE:
+            return "early_exit"
+        if remaining(deadline) < settings.RETRIEVAL_MIN_REMAINING_SECONDS:
+            return "deadline"
+        if self.loop_monitor.lag_ms > settings.RETRIEVAL_OVERLOAD_LAG_MS:
+            return "overload"
+        return "full"
+
+    async def _run_intent_plan(self, intent: str) -> List[Dict]:
+        """Run the fixed searches for one intent"""
+        searches = self.INTENT_SEARCHES[intent]
+        results = await self._hybrid_retrieve_many(searches, [2] * len(searches))
+        return [doc for docs in results for doc in docs]
+
+    async def _build_intent_plans(self):
+        """Precompute the intent search results for the current corpus"""
+        plans = {}
+        for intent in self.INTENT_SEARCHES:
+            try:
+                plans[intent] = await self._run_intent_plan(intent)
+            except Exception as e:
+                logger.warning(f"Intent plan '{intent}' not precomputed, searching per request: {e}")
+        
+        self.intent_plans = plans
+        logger.info(f"Precomputed {len(plans)} intent retrieval plans")
+
+    async def _hybrid_retrieve_many(self, queries: List[str], top_ks: List[int]) -> List[List[Dict]]:
+        """Run several hybrid searches at once, one result list per query"""
+        
+        # A batch-capable retriever encodes every query together and searches once
+        batch_retrieve = getattr(self.retriever, "hybrid_retrieve_many", None)
+        if batch_retrieve is not None:
+            return await batch_retrieve(queries=queries, top_ks=top_ks)
+        
+        return await asyncio.gather(*(
+            self.retriever.hybrid_retrieve(query=q, top_k=k) for q, k in zip(queries, top_ks)
+        ))
+
+    async def _generate_intelligent_response(self, query: str, docs: List[Dict], intent_info: Dict,
+                                             token_queue: Optional[asyncio.Queue] = None,
+                                             deadline: Optional[float] = None) -> Dict[str, Any]:
         """Generate intelligent, well-formatted responses"""
         
-        # Build comprehensive context
-        context = "\n\n".join([doc.get('content', '') for doc in docs[:6]])
+        # Build context: deduplicated, query-relevant sentences within the token budget
+        # Strong primary hits, a close deadline or an overloaded loop get a smaller prompt
+        reduced = intent_info.get('retrieval_depth', 'full') != 'full'
+        context, context_tokens = self.context_packer.pack(
+            query, docs, max_tokens=settings.RETRIEVAL_REDUCED_CONTEXT_TOKENS if reduced else None
+        )
+        logger.info(f"Context packed to {context_tokens['packed_tokens']} tokens "
+                    f"({context_tokens['saved_tokens']} saved, {context_tokens['duplicates_removed']} duplicates)")
         
         intent = intent_info['primary_intent']
-        emoji_map = {
-            'social_media': '🔗',
-            'contact_info': '📧',
-            'technical_skills': '🛠️',
-            'projects_work': '💻',
-            'education_background': '🎓',
-            'professional_experience': '💼',
-            'personal_info': '👨‍💻',
-            'general': '📋'
-        }
-        emoji = emoji_map.get(intent, '📋')
+        emoji = self.INTENT_EMOJIS.get(intent, '📋')
+        
+        # Decide the answer length before generating instead of trimming afterwards
+        response_length = intent_info.get('response_length') or self.formatter.predict_response_length(query)
+        budget = self.formatter.get_length_budget(response_length)
         
         # Intelligent system prompt - NO "Adil Saeed is" nonsense
         system_prompt = f"""You are Adil's portfolio assistant. Create a natural, intelligent response.
@@ -363,25 +1056,34 @@ CRITICAL FORMATTING RULES:
 10. If context has relevant info, present it comprehensively
 
 QUERY INTENT: {intent}
+RESPONSE LENGTH: {response_length} - {budget['instruction']}
 RESPONSE STYLE: Professional but conversational"""
 
-        # Adjust response length based on query complexity
+        # Adjust response length based on query complexity, capped by the predicted length
         max_tokens = 400 if intent_info['query_complexity'] == 'complex' else 300
+        max_tokens = min(max_tokens, budget['max_tokens'])
 
         user_prompt = f"Query: '{query}'\n\nContext:\n{context}\n\nCreate a comprehensive, well-formatted response that intelligently addresses what the user is asking for."
 
         try:
-            response = await self.groq_client.chat.completions.create(
-                model=settings.GROQ_MODEL_EN,
+            # The latency budget tightens the request deadline for this call
+            budget_deadline = time.monotonic() + settings.LLM_LATENCY_BUDGET_SECONDS
+            route, model = self._select_model("portfolio", intent_info, response_length)
+            answer = await self.llm.complete(
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt},
                     {"role": "user", "content": user_prompt}
                 ],
-                temperature=0.1,
-                max_tokens=max_tokens
+                profile="portfolio",
+                route=route,
+                max_tokens=max_tokens,
+                token_queue=token_queue,
+                stop_when=lambda text: self.formatter.exceeds_sentence_budget(text, response_length),
+                deadline=budget_deadline if deadline is None else min(deadline, budget_deadline)
             )
             
-            answer = response.choices[0].message.content.strip()
+            answer = answer.strip()
             
             # Clean up common formatting issues
             answer = re.sub(r'^Adil Saeed is\s*', '', answer)
@@ -392,18 +1094,66 @@ RESPONSE STYLE: Professional but conversational"""
                 "answer": answer,
                 "sources": ["📚 Adil_Data"],
                 "query_type": intent,
-                "confidence": 0.9
+                "confidence": 0.9,
+                "response_length": response_length
+            }
+            
+        except DeadlineExceeded:
+            self.deadline_stats["generation"] += 1
+            logger.warning("Generation ran out of time, answering extractively")
+            extractive = self._extractive_fallback(query, docs, intent_info, 'latency_budget')
+            if extractive:
+                return extractive
+            return {
+                "answer": f"Technical issue occurred while processing query about {intent.replace('_', ' ')}.",
+                "sources": [],
+                "query_type": "error",
+                "confidence": 0.5,
+                "degraded": True
             }
             
         except Exception as e:
             logger.error(f"Response generation error: {e}")
+            extractive = self._extractive_fallback(query, docs, intent_info, 'fallback')
+            if extractive:
+                return extractive
             return {
                 "answer": f"Technical issue occurred while processing query about {intent.replace('_', ' ')}.",
                 "sources": [],
                 "query_type": "error",
-                "confidence": 0.5
+                "confidence": 0.5,
+                "degraded": True
             }
 
+    def _select_model(self, handler: str, intent_info: Optional[Dict] = None,
+                      response_length: Optional[str] = None) -> Tuple[str, str]:
+        """Model cascade: (route label, model) - only complex portfolio answers need the large model"""
+        route = handler
+        if handler == "portfolio":
+            is_complex = (intent_info is not None and intent_info['query_complexity'] == 'complex') \
+                or response_length == 'detailed'
+            route = "portfolio_complex" if is_complex else "portfolio_simple"
+        
+        if not settings.MODEL_CASCADE_ENABLED or route == "portfolio_complex":
+            return route, settings.GROQ_MODEL_EN
+        return route, settings.GROQ_MODEL_SMALL
+
+    def _extractive_answer(self, query: str, docs: List[Dict], intent_info: Dict) -> Optional[Dict[str, Any]]:
+        """Answer from the retrieved chunks alone (no LLM call)"""
+        intent = intent_info['primary_intent']
+        intent_terms = self.SEMANTIC_MAP.get(intent, []) + self.INTENT_SEARCHES.get(intent, [])
+        return self.extractive.answer(query, docs, intent, intent_terms, self.INTENT_EMOJIS.get(intent, '📋'))
+
+    def _extractive_fallback(self, query: str, docs: List[Dict], intent_info: Dict,
+                             reason: str) -> Optional[Dict[str, Any]]:
+        """Degraded answer used when generation failed or ran out of time"""
+        extractive = self._extractive_answer(query, docs, intent_info)
+        if extractive:
+            self.extractive_stats[reason] += 1
+            # Served instead of a generated answer, so never cached
+            extractive["degraded"] = True
+        return extractive
+
     def _no_portfolio_info_response(self, query: str) -> Dict[str, Any]:
         """Response when no portfolio info is found"""
         return {
@@ -437,8 +1187,52 @@ RESPONSE STYLE: Professional but conversational"""
         try:
             logger.info("Refreshing retriever data...")
             await self.retriever.initialize()
-            logger.info("Data refreshed successfully")
+            
+            # Cached answers and intent plans were built from the old corpus
+            self.corpus_version = self._compute_corpus_version()
+            self._register_corpus_vocabulary()
+            await self._build_intent_plans()
+            invalidated = self.semantic_cache.clear()
+            if self.response_cache:
+                invalidated += self.response_cache.clear_memory()
+            logger.info(f"Data refreshed successfully ({invalidated} cached answers invalidated)")
             return True
         except Exception as e:
             logger.error(f"Failed to refresh data: {e}")
-            return False
\ No newline at end of file
+            return False
+
+    def get_pipeline_stats(self) -> Dict[str, Any]:
+        """Get pipeline cache and performance statistics"""
+        return {
+            "corpus_version": self.corpus_version,
+            "intent_plans": len(self.intent_plans),
+            "single_flight": self.single_flight.get_stats(),
+            "context_packer": self.context_packer.get_stats(),
+            "extractive_answers": dict(self.extractive_stats),
+            "deadline_exceeded": dict(self.deadline_stats),
+            "batches": dict(self.batch_stats),
+            "query_splitting": dict(self.split_stats),
+            "math": {**self.math_stats, **math_eval.get_limits()},
+            "persona_answers": {**self.persona_stats, "candidates": self.persona_candidates.most_common(10)},
+            "keyword_matcher": keyword_matcher.get_stats(),
+            "spell_corrector": self.spell_corrector.get_stats(),
+            "pattern_registry": pattern_registry.get_stats(),
+            "intent_router": {**self.intent_router.get_stats(), "keyword_routes": self.keyword_routes},
+            "adaptive_retrieval": {
+                **self.retrieval_depth_stats,
+                "reduced_context_tokens": settings.RETRIEVAL_REDUCED_CONTEXT_TOKENS,
+                "event_loop": self.loop_monitor.get_stats()
+            },
+            "llm": self.llm.get_stats() if self.llm else {},
+            "response_cache": self.response_cache.get_stats() if self.response_cache else {"enabled": False},
+            "semantic_cache": {
+                **self.semantic_cache.get_stats(),
+                "enabled": self.encoder is not None
+            }
+        }
+
+    async def close(self):
+        """Release pooled upstream connections"""
+        await self.loop_monitor.stop()
+        if self.llm:
+            await self.llm.aclose()
@@ -0,0 +1,199 @@
+"""
+Two-tier exact-match response cache
+Tier one is an in-process LRU, tier two a SQLite (WAL) store shared by every worker on the host
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Any, Optional
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """Exact-match cache keyed on (normalized query, language, corpus version)"""
+
+    # Prune the shared store every N writes rather than on each one
+    PRUNE_EVERY = 100
+
+    def __init__(self, db_path: str, memory_max_entries: int = 1024, memory_ttl_seconds: int = 600,
+                 db_max_entries: int = 10000, db_ttl_seconds: int = 86400):
+        self.memory_max_entries = memory_max_entries
+        self.memory_ttl_seconds = memory_ttl_seconds
+        self.db_max_entries = db_max_entries
+        self.db_ttl_seconds = db_ttl_seconds
+
+        # key -> (created, response)
+        self.memory: "OrderedDict[str, tuple]" = OrderedDict()
+
+        self.stats = {
+            "memory_hits": 0,
+            "memory_misses": 0,
+            "db_hits": 0,
+            "db_misses": 0,
+            "writes": 0,
+            "db_errors": 0
+        }
+
+        self._db_lock = threading.Lock()
+        self._conn = self._open_db(db_path)
+
+    @staticmethod
+    def make_key(normalized_query: str, language: str, corpus_version: str) -> str:
+        """Stable key shared across worker processes"""
+        raw = "\x1f".join([normalized_query, language, corpus_version])
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _open_db(self, db_path: str) -> Optional[sqlite3.Connection]:
+        """Open the shared store; the cache degrades to memory-only if this fails"""
+        try:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_response_cache_accessed ON response_cache(accessed)")
+            conn.commit()
+            return conn
+        except Exception as e:
+            logger.warning(f"Shared response cache unavailable, using memory tier only: {e}")
+            return None
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Look up memory first, then the shared store"""
+
+        entry = self.memory.get(key)
+        if entry and time.time() - entry[0] < self.memory_ttl_seconds:
+            self.memory.move_to_end(key)
+            self.stats["memory_hits"] += 1
+            return json.loads(entry[1])
+
+        if entry:
+            del self.memory[key]
+        self.stats["memory_misses"] += 1
+
+        if self._conn is None:
+            return None
+
+        row = await asyncio.to_thread(self._db_get, key)
+        if row is None:
+            self.stats["db_misses"] += 1
+            return None
+
+        self.stats["db_hits"] += 1
+        value, created = row
+        self._remember(key, value, created)
+        return json.loads(value)
+
+    async def set(self, key: str, response: Dict[str, Any]):
+        """Write through both tiers"""
+
+        value = json.dumps(response, ensure_ascii=False)
+        now = time.time()
+        self._remember(key, value, now)
+        self.stats["writes"] += 1
+
+        if self._conn is not None:
+            await asyncio.to_thread(self._db_set, key, value, now)
+
+    def clear_memory(self) -> int:
+        """Drop the in-process tier (the shared store is keyed by corpus version)"""
+        count = len(self.memory)
+        self.memory.clear()
+        return count
+
+    def _remember(self, key: str, value: str, created: float):
+        """Insert into the in-process LRU"""
+        self.memory[key] = (created, value)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_max_entries:
+            self.memory.popitem(last=False)
+
+    def _db_get(self, key: str) -> Optional[tuple]:
+        try:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT value, created FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+
+                if time.time() - row[1] >= self.db_ttl_seconds:
+                    self._conn.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+                    self._conn.commit()
+                    return None
+
+                self._conn.execute("UPDATE response_cache SET accessed = ? WHERE key = ?", (time.time(), key))
+                self._conn.commit()
+                return row
+        except sqlite3.Error as e:
+            self.stats["db_errors"] += 1
+            logger.warning(f"Response cache read failed: {e}")
+            return None
+
+    def _db_set(self, key: str, value: str, now: float):
+        try:
+            with self._db_lock:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO response_cache (key, value, created, accessed) VALUES (?, ?, ?, ?)",
+                    (key, value, now, now)
+                )
+                if self.stats["writes"] % self.PRUNE_EVERY == 0:
+                    self._prune(now)
+                self._conn.commit()
+        except sqlite3.Error as e:
+            self.stats["db_errors"] += 1
+            logger.warning(f"Response cache write failed: {e}")
+
+    def _prune(self, now: float):
+        """Enforce TTL and size limits on the shared store"""
+        self._conn.execute("DELETE FROM response_cache WHERE created < ?", (now - self.db_ttl_seconds,))
+        self._conn.execute(
+            "DELETE FROM response_cache WHERE key NOT IN "
+            "(SELECT key FROM response_cache ORDER BY accessed DESC LIMIT ?)",
+            (self.db_max_entries,)
+        )
+
+    def _db_size(self) -> int:
+        if self._conn is None:
+            return 0
+        try:
+            with self._db_lock:
+                return self._conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+        except sqlite3.Error:
+            return 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get per-tier statistics"""
+        memory_lookups = self.stats["memory_hits"] + self.stats["memory_misses"]
+        db_lookups = self.stats["db_hits"] + self.stats["db_misses"]
+
+        return {
+            "memory": {
+                "entries": len(self.memory),
+                "max_entries": self.memory_max_entries,
+                "ttl_seconds": self.memory_ttl_seconds,
+                "hits": self.stats["memory_hits"],
+                "misses": self.stats["memory_misses"],
+                "hit_ratio": round(self.stats["memory_hits"] / memory_lookups, 3) if memory_lookups else 0.0
+            },
+            "shared": {
+                "enabled": self._conn is not None,
+                "entries": self._db_size(),
+                "max_entries": self.db_max_entries,
+                "ttl_seconds": self.db_ttl_seconds,
+                "hits": self.stats["db_hits"],
+                "misses": self.stats["db_misses"],
+                "hit_ratio": round(self.stats["db_hits"] / db_lookups, 3) if db_lookups else 0.0,
+                "errors": self.stats["db_errors"]
+            },
+            "writes": self.stats["writes"]
+        }
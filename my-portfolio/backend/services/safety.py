@@ -3,23 +3,62 @@ Streamlined safety checker integrated with portfolio chatbot
 Focused on essential security while maintaining user experience
 """
 import re
+import time
 import logging
-from typing import Dict, Any
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Any, Optional
 from dataclasses import dataclass
 
+from utils.query_analysis import QueryAnalysis
+from utils.pattern_registry import pattern_registry
+
 logger = logging.getLogger(__name__)
 
-@dataclass
+@dataclass(frozen=True)
 class SafetyResult:
     is_safe: bool
     reason: str = ""
     confidence: float = 1.0
     suggestion: str = ""
 
+# Verdicts are immutable, so cached results share these instances
+SAFE = SafetyResult(is_safe=True)
+EMPTY_QUERY = SafetyResult(
+    is_safe=False,
+    reason="Please ask a specific question about Adil's portfolio.",
+    confidence=1.0,
+    suggestion="Try asking about his projects, skills, or contact information."
+)
+TOO_LONG = SafetyResult(
+    is_safe=False,
+    reason="Please keep your question under 500 characters.",
+    confidence=1.0,
+    suggestion="Try breaking your question into smaller parts."
+)
+SPAM = SafetyResult(
+    is_safe=False,
+    reason="Please ask a genuine question about Adil's portfolio.",
+    confidence=0.9,
+    suggestion="Ask about his projects, skills, education, or contact details."
+)
+HARMFUL = SafetyResult(
+    is_safe=False,
+    reason="I can only assist with professional questions about Adil's portfolio.",
+    confidence=0.95,
+    suggestion="Ask about his projects, technical skills, education, or contact information."
+)
+INJECTION = SafetyResult(
+    is_safe=False,
+    reason="Invalid input detected. Please ask a normal question.",
+    confidence=1.0,
+    suggestion="Ask about Adil's work, skills, or how to contact him."
+)
+
 class SafetyChecker:
     """Streamlined safety checker for Adil's portfolio chatbot"""
     
-    def __init__(self):
+    def __init__(self, cache_size: int = 2048):
         # Essential harmful patterns with word boundaries to avoid false positives
         self.harmful_patterns = [
             r'\bkill\b(?!\s*process)',  # "kill" but not "kill process"
@@ -32,40 +71,73 @@ class SafetyChecker:
         
         # Simple spam detection
         self.spam_indicators = [
-            r'(.)\1{8,}',  # 8+ repeated characters
+            r'(?P<repeated>.)(?P=repeated){8,}',  # 8+ repeated characters
             r'\b(free|buy|sell|click|visit|urgent|now)\b.*\b(link|website|discount)\b'
         ]
+        
+        self.injection_patterns = [
+            r'<script|javascript:|eval\(',
+            r'union\s+select|drop\s+table',
+            r'insert\s+into|delete\s+from'
+        ]
+        
+        # Each rule set is one precompiled alternation: a single scan per check. Queries are
+        # lowercased before every check, so the sets match case-sensitively (much faster in sre)
+        self.harmful_set = pattern_registry.compile("safety:harmful", self.harmful_patterns, flags=0)
+        self.spam_set = pattern_registry.compile("safety:spam", self.spam_indicators, flags=0)
+        self.injection_set = pattern_registry.compile("safety:injection", self.injection_patterns, flags=0)
+        
+        # Verdicts depend only on the lowercased, stripped query: bounded LRU keyed on it
+        self.cache_size = cache_size
+        self._verdicts: "OrderedDict[str, SafetyResult]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"checks": 0, "cache_hits": 0, "batch_checks": 0, "batch_seconds": 0.0}
 
-    def check_query(self, query: str) -> SafetyResult:
+    def check_query(self, query: str, analysis: Optional[QueryAnalysis] = None) -> SafetyResult:
         """Main safety validation for user queries"""
         
-        if not query or len(query.strip()) < 2:
-            return SafetyResult(
-                is_safe=False,
-                reason="Please ask a specific question about Adil's portfolio.",
-                confidence=1.0,
-                suggestion="Try asking about his projects, skills, or contact information."
-            )
+        query_lower = analysis.lowered if analysis is not None else (query or '').lower().strip()
+        
+        with self._lock:
+            self.stats["checks"] += 1
+            cached = self._verdicts.get(query_lower)
+            if cached is not None:
+                self._verdicts.move_to_end(query_lower)
+                self.stats["cache_hits"] += 1
+                return cached
+        
+        result = self._evaluate(query_lower)
+        self._remember(query_lower, result)
+        return result
+
+    def check_many(self, queries: List[str]) -> List[SafetyResult]:
+        """Verdicts for many queries, in order (repeats and cached queries are not re-evaluated)"""
+        
+        started = time.perf_counter()
+        results = [self.check_query(query) for query in queries]
         
-        query_lower = query.lower().strip()
+        elapsed = time.perf_counter() - started
+        with self._lock:
+            self.stats["batch_checks"] += len(queries)
+            self.stats["batch_seconds"] += elapsed
+        logger.info(f"Safety check_many: {len(queries)} queries in {elapsed * 1000:.1f}ms, "
+                    f"{len(queries) / elapsed if elapsed else 0:.0f} checks/s")
+        
+        return results
+
+    def _evaluate(self, query_lower: str) -> SafetyResult:
+        """Run the checks on one lowercased, stripped query"""
+        
+        if len(query_lower) < 2:
+            return EMPTY_QUERY
         
         # Length check
-        if len(query) > 500:
-            return SafetyResult(
-                is_safe=False,
-                reason="Please keep your question under 500 characters.",
-                confidence=1.0,
-                suggestion="Try breaking your question into smaller parts."
-            )
+        if len(query_lower) > 500:
+            return TOO_LONG
         
         # Check for spam
         if self._is_spam(query_lower):
-            return SafetyResult(
-                is_safe=False,
-                reason="Please ask a genuine question about Adil's portfolio.",
-                confidence=0.9,
-                suggestion="Ask about his projects, skills, education, or contact details."
-            )
+            return SPAM
         
         # Check for harmful content with word boundaries
         harmful_result = self._check_harmful_content(query_lower)
@@ -73,44 +145,37 @@ class SafetyChecker:
             return harmful_result
         
         # Basic injection detection
-        if self._has_injection_attempt(query):
-            return SafetyResult(
-                is_safe=False,
-                reason="Invalid input detected. Please ask a normal question.",
-                confidence=1.0,
-                suggestion="Ask about Adil's work, skills, or how to contact him."
-            )
-        
-        return SafetyResult(is_safe=True)
+        if self._has_injection_attempt(query_lower):
+            return INJECTION
+        
+        return SAFE
+
+    def _remember(self, key: str, result: SafetyResult):
+        """Insert a verdict into the bounded LRU"""
+        if self.cache_size <= 0:
+            return
+        with self._lock:
+            self._verdicts[key] = result
+            self._verdicts.move_to_end(key)
+            while len(self._verdicts) > self.cache_size:
+                self._verdicts.popitem(last=False)
 
     def _is_spam(self, query: str) -> bool:
         """Simple spam detection"""
-        return any(re.search(pattern, query, re.IGNORECASE) for pattern in self.spam_indicators)
+        return self.spam_set.contains(query)
 
     def _check_harmful_content(self, query: str) -> SafetyResult:
         """Check for harmful content using word boundaries"""
         
         # Check for harmful patterns with word boundaries
-        for pattern in self.harmful_patterns:
-            if re.search(pattern, query, re.IGNORECASE):
-                return SafetyResult(
-                    is_safe=False,
-                    reason="I can only assist with professional questions about Adil's portfolio.",
-                    confidence=0.95,
-                    suggestion="Ask about his projects, technical skills, education, or contact information."
-                )
-        
-        return SafetyResult(is_safe=True)
+        if self.harmful_set.contains(query):
+            return HARMFUL
+        
+        return SAFE
 
     def _has_injection_attempt(self, query: str) -> bool:
         """Simple injection detection"""
-        injection_patterns = [
-            r'<script|javascript:|eval\(',
-            r'union\s+select|drop\s+table',
-            r'insert\s+into|delete\s+from'
-        ]
-        
-        return any(re.search(pattern, query, re.IGNORECASE) for pattern in injection_patterns)
+        return self.injection_set.contains(query)
 
     def validate_session_id(self, session_id: str) -> bool:
         """Validate session ID format"""
@@ -141,6 +206,18 @@ class SafetyChecker:
         return {
             "harmful_patterns_count": len(self.harmful_patterns),
             "spam_patterns_count": len(self.spam_indicators),
+            "injection_patterns_count": len(self.injection_patterns),
+            "verdict_cache": {
+                "entries": len(self._verdicts),
+                "max_entries": self.cache_size,
+                "checks": self.stats["checks"],
+                "hits": self.stats["cache_hits"]
+            },
+            "batch": {
+                "checks": self.stats["batch_checks"],
+                "checks_per_second": round(self.stats["batch_checks"] / self.stats["batch_seconds"])
+                if self.stats["batch_seconds"] else 0
+            },
             "features": [
                 "word_boundary_filtering",
                 "spam_detection", 
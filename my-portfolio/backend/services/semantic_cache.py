@@ -0,0 +1,126 @@
+"""
+Semantic response cache over query embeddings
+Serves near-duplicate questions without retrieval or LLM calls
+"""
+import copy
+import logging
+import time
+from collections import OrderedDict
+from typing import Dict, Any, Optional, List
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+class SemanticResponseCache:
+    """LRU/TTL cache of formatted answers, matched by cosine similarity"""
+
+    def __init__(self, threshold: float = 0.92, max_entries: int = 512, ttl_seconds: int = 3600):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        # key -> {"embedding", "language", "response", "created"}
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        # Dense index rebuilt lazily after inserts/evictions
+        self._keys: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._dirty = True
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def lookup(self, embedding: np.ndarray, language: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the closest cached answer above the threshold"""
+
+        self._expire()
+
+        if not self.entries:
+            self.misses += 1
+            return None
+
+        if self._dirty:
+            self._rebuild_index()
+
+        scores = self._matrix @ embedding
+
+        # Best match in the requested language
+        for idx in np.argsort(-scores):
+            if scores[idx] < self.threshold:
+                break
+            key = self._keys[idx]
+            entry = self.entries[key]
+            if entry["language"] != language:
+                continue
+
+            self.entries.move_to_end(key)
+            self.hits += 1
+            logger.debug(f"Semantic cache hit: '{key[:50]}' (score={scores[idx]:.3f})")
+            return copy.deepcopy(entry["response"])
+
+        self.misses += 1
+        return None
+
+    def store(self, key: str, embedding: np.ndarray, language: str, response: Dict[str, Any]):
+        """Cache a formatted answer under its normalized query"""
+
+        cache_key = f"{language}:{key}"
+        if cache_key in self.entries:
+            self.entries.move_to_end(cache_key)
+
+        self.entries[cache_key] = {
+            "embedding": embedding.astype(np.float32),
+            "language": language,
+            "response": copy.deepcopy(response),
+            "created": time.time()
+        }
+
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+        self._dirty = True
+
+    def clear(self) -> int:
+        """Invalidate every entry, e.g. after the corpus is reloaded"""
+        count = len(self.entries)
+        self.entries.clear()
+        self._dirty = True
+        self.invalidations += 1
+        return count
+
+    def _expire(self):
+        """Drop entries older than the TTL (oldest first)"""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, entry in self.entries.items() if entry["created"] < cutoff]
+
+        for key in expired:
+            del self.entries[key]
+            self.evictions += 1
+
+        if expired:
+            self._dirty = True
+
+    def _rebuild_index(self):
+        """Stack cached embeddings into a single matrix for one matmul per lookup"""
+        self._keys = list(self.entries.keys())
+        self._matrix = np.vstack([self.entries[key]["embedding"] for key in self._keys])
+        self._dirty = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "threshold": self.threshold,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations
+        }
@@ -0,0 +1,51 @@
+"""
+Single-flight coalescing of identical in-flight work
+Concurrent duplicates await one shared task instead of each calling upstream
+"""
+import asyncio
+import logging
+from typing import Dict, Any, Awaitable, Callable, Hashable
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Run at most one task per key; later callers share its result"""
+
+    def __init__(self):
+        self.in_flight: Dict[Hashable, asyncio.Task] = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    async def run(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Await fn() for this key, joining an identical call that is already running"""
+
+        task = self.in_flight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self.in_flight[key] = task
+            self.executed += 1
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+            logger.debug(f"Coalesced duplicate request: {key}")
+
+        # Shielded so one caller disconnecting does not cancel the work for the others
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        if self.in_flight.get(key) is task:
+            del self.in_flight[key]
+
+        # Mark the exception as retrieved in case every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing statistics"""
+        total = self.executed + self.coalesced
+        return {
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+            "in_flight": len(self.in_flight),
+            "coalesced_ratio": round(self.coalesced / total, 3) if total else 0.0
+        }
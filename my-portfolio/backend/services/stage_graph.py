@@ -0,0 +1,77 @@
+"""
+Per-request stage graph
+Independent stages run concurrently, each as soon as its dependencies finish,
+CPU-bound stages go to the thread pool, and every stage records its own timing
+"""
+import asyncio
+import inspect
+import logging
+import time
+from typing import Dict, Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+class StageRejected(Exception):
+    """Raised by a gate stage to stop the request (e.g. an unsafe query)"""
+
+class StageGraph:
+    """Lazily started DAG of named stages; each stage runs at most once"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, Any]] = {}
+        self.tasks: Dict[str, asyncio.Task] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add(self, name: str, fn: Callable[..., Any], deps: Iterable[str] = (), cpu_bound: bool = False):
+        """Register a stage; fn receives its dependencies' results as keyword arguments"""
+        self.stages[name] = {"fn": fn, "deps": tuple(deps), "cpu_bound": cpu_bound}
+
+    def start(self, name: str) -> asyncio.Task:
+        """Schedule a stage (and its dependencies) without waiting for it"""
+        task = self.tasks.get(name)
+        if task is None:
+            task = asyncio.ensure_future(self._run_stage(name))
+            task.add_done_callback(self._retrieve_exception)
+            self.tasks[name] = task
+        return task
+
+    async def result(self, name: str) -> Any:
+        """Wait for a stage's result, starting it if needed"""
+        return await self.start(name)
+
+    async def run(self, *names: str) -> list:
+        """Run several stages concurrently"""
+        return await asyncio.gather(*(self.start(name) for name in names))
+
+    def cancel(self, name: str):
+        """Drop a speculative stage whose result is no longer needed"""
+        task = self.tasks.get(name)
+        if task is not None and not task.done():
+            task.cancel()
+
+    async def _run_stage(self, name: str) -> Any:
+        stage = self.stages[name]
+        deps = stage["deps"]
+        values = await asyncio.gather(*(self.start(dep) for dep in deps))
+        kwargs = dict(zip(deps, values))
+
+        started = time.perf_counter()
+        if stage["cpu_bound"]:
+            value = await asyncio.to_thread(stage["fn"], **kwargs)
+        else:
+            value = stage["fn"](**kwargs)
+            if inspect.isawaitable(value):
+                value = await value
+
+        self.timings[name] = round((time.perf_counter() - started) * 1000, 2)
+        return value
+
+    @staticmethod
+    def _retrieve_exception(task: asyncio.Task):
+        # Speculative stages may fail with nobody awaiting them
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Stage failed: {task.exception()}")
+
+    def get_timings(self) -> Dict[str, float]:
+        """Milliseconds spent in each completed stage"""
+        return dict(self.timings)
@@ -0,0 +1,48 @@
+"""
+Math answers must stay within the evaluator's cost budget and never return inf or nan
+Run from backend/: python -m pytest tests
+"""
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.math_eval import MAX_ROUND_DIGITS, MathError, evaluate, solve
+
+@pytest.mark.parametrize("query, answer", [
+    ("what is 2 + 3 * 4", "14"),
+    ("15% of 200", "30"),
+    ("round(3.14159, 2)", "3.14"),
+    ("round(1234, -2)", "1200"),
+    ("round(2.5)", "2"),
+    ("floor(7.9)", "7"),
+])
+def test_solves_arithmetic(query, answer):
+    assert solve(query)[1] == answer
+
+@pytest.mark.parametrize("expression", [
+    "round(2, -10000000)",
+    "round(2, 10000000)",
+    f"round(2, {MAX_ROUND_DIGITS + 1})",
+    "round(2, 1.5)",
+])
+def test_round_digits_are_bounded(expression):
+    started = time.perf_counter()
+    with pytest.raises(MathError):
+        evaluate(expression)
+    assert time.perf_counter() - started < 0.1
+
+@pytest.mark.parametrize("expression", [
+    "1e308*10",
+    "-1e308*10",
+    "floor(1e308*10)",
+    "1e308*10 - 1e308*10",
+    "1e400",
+    "exp(1000)",
+])
+def test_rejects_non_finite_results(expression):
+    with pytest.raises(MathError):
+        evaluate(expression)
@@ -0,0 +1,63 @@
+"""
+Typo correction must fix misspellings of corpus terms without rewriting valid words
+Run from backend/: python -m pytest tests
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.spell_corrector import ENGLISH_WORDS, SpellCorrector, count_words
+
+CORPUS = """
+Adil Saeed is a Software Engineering student at IMSciences Peshawar. His education covers
+machine learning. Projects: chatbot, OCR system. Skills: Python, FastAPI. Contact him by
+email. He always tries his best and keeps learning, at least one new technology a year.
+"""
+
+@pytest.fixture
+def corrector():
+    corrector = SpellCorrector(aliases={'adeel': 'adil'})
+    corrector.update(count_words([CORPUS]))
+    return corrector
+
+@pytest.mark.parametrize("typo, fixed", [
+    ("projets", "projects"),
+    ("porjects", "projects"),
+    ("eduction", "education"),
+    ("educaion", "education"),
+    ("contct", "contact"),
+    ("learnig", "learning"),
+    ("machin", "machine"),
+    ("imsceinces", "imsciences"),
+    ("adeel", "adil"),
+])
+def test_corrects_typos_of_corpus_words(corrector, typo, fixed):
+    assert corrector.correct_token(typo) == fixed
+
+@pytest.mark.parametrize("word", ["sciences", "educational", "beast"])
+def test_leaves_valid_english_words_alone(corrector, word):
+    assert corrector.correct_token(word) == word
+
+@pytest.mark.parametrize("word", ["sciences", "educational", "learnings", "projectss"])
+def test_rejects_affix_only_edits_without_a_dictionary(word):
+    # The affix guard holds even when the word is in no wordlist
+    corrector = SpellCorrector(dictionary=())
+    corrector.update(count_words([CORPUS]))
+    assert corrector.correct_token(word) == word
+
+def test_single_letter_truncation_is_still_a_typo(corrector):
+    assert corrector.correct_token("experienc") == "experienc"  # not in the corpus
+    corrector.update(count_words([CORPUS, "experience"]))
+    assert corrector.correct_token("experienc") == "experience"
+
+def test_dictionary_words_are_not_correction_targets():
+    corrector = SpellCorrector()
+    corrector.update(count_words([CORPUS]))
+    assert "feast" in ENGLISH_WORDS
+    assert corrector.correct_token("faest") == "faest"
+
+def test_correct_keeps_contractions_and_possessives(corrector):
+    assert corrector.correct("couldn't find adil's projets") == "couldn't find adil's projects"
@@ -0,0 +1,120 @@
+"""
+Shared keyword automaton (Aho-Corasick)
+Every component registers its keyword lists under a category; one linear pass over the
+text then reports all matches, overlapping ones included, tagged with their categories
+"""
+import logging
+import threading
+from collections import deque
+from typing import Dict, Iterable, List, Set, Tuple, Any
+
+logger = logging.getLogger(__name__)
+
+class KeywordMatcher:
+    """Case-insensitive substring (or whole-word) keyword matching in one pass"""
+
+    def __init__(self):
+        # term -> {category: whole_word}
+        self._owners: Dict[str, Dict[str, bool]] = {}
+        self._automaton = None
+        self._lock = threading.Lock()
+        self.builds = 0
+
+    def add(self, category: str, terms: Iterable[str], whole_word: bool = False) -> int:
+        """Register terms under a category (safe to call at runtime); returns how many were new"""
+        added = 0
+        with self._lock:
+            for term in terms:
+                term = term.lower().strip()
+                if not term:
+                    continue
+                owners = self._owners.setdefault(term, {})
+                if owners.get(category) != whole_word:
+                    owners[category] = whole_word
+                    added += 1
+            if added:
+                # Rebuilt lazily on the next match
+                self._automaton = None
+        return added
+
+    def match(self, text: str) -> Dict[str, Set[str]]:
+        """category -> matched terms for the (lowercased) text"""
+        goto, fail, output = self._automaton or self._build()
+        text = text.lower()
+        owners = self._owners
+        hits: Dict[str, Set[str]] = {}
+
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for term in output[state]:
+                start = end - len(term) + 1
+                for category, whole_word in owners[term].items():
+                    if whole_word and not self._is_whole_word(text, start, end):
+                        continue
+                    hits.setdefault(category, set()).add(term)
+
+        return hits
+
+    def vocabulary(self) -> List[str]:
+        """Every registered term"""
+        return list(self._owners)
+
+    def categories(self, text: str) -> Set[str]:
+        """Categories with at least one match"""
+        return set(self.match(text))
+
+    @staticmethod
+    def _is_whole_word(text: str, start: int, end: int) -> bool:
+        before = text[start - 1] if start > 0 else ' '
+        after = text[end + 1] if end + 1 < len(text) else ' '
+        return not (before.isalnum() or before == '_') and not (after.isalnum() or after == '_')
+
+    def _build(self) -> Tuple[List[Dict[str, int]], List[int], List[Tuple[str, ...]]]:
+        """Trie plus failure links; each state's output includes its suffix states' terms"""
+        with self._lock:
+            if self._automaton is not None:
+                return self._automaton
+
+            goto: List[Dict[str, int]] = [{}]
+            outputs: List[List[str]] = [[]]
+            for term in self._owners:
+                state = 0
+                for char in term:
+                    if char not in goto[state]:
+                        goto.append({})
+                        outputs.append([])
+                        goto[state][char] = len(goto) - 1
+                    state = goto[state][char]
+                outputs[state].append(term)
+
+            fail = [0] * len(goto)
+            queue = deque(goto[0].values())
+            while queue:
+                state = queue.popleft()
+                for char, child in goto[state].items():
+                    queue.append(child)
+                    suffix = fail[state]
+                    while suffix and char not in goto[suffix]:
+                        suffix = fail[suffix]
+                    fail[child] = goto[suffix].get(char, 0) if goto[suffix].get(char, 0) != child else 0
+                    outputs[child] = outputs[child] + outputs[fail[child]]
+
+            self._automaton = (goto, fail, [tuple(o) for o in outputs])
+            self.builds += 1
+            logger.debug(f"Keyword automaton built: {len(self._owners)} terms, {len(goto)} states")
+            return self._automaton
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get vocabulary size and rebuild count"""
+        categories = {c for owners in self._owners.values() for c in owners}
+        return {
+            "terms": len(self._owners),
+            "categories": len(categories),
+            "builds": self.builds
+        }
+
+# Shared by the pipeline, splitter, formatter and preprocessors
+keyword_matcher = KeywordMatcher()
@@ -0,0 +1,188 @@
+"""
+Sandboxed arithmetic for math questions
+A query is rewritten into a Python expression, parsed with ast and evaluated by walking only
+whitelisted nodes under a fixed cost budget; nothing ever reaches eval
+"""
+import ast
+import math
+import operator
+import re
+import logging
+from typing import Dict, Optional, Tuple, Union, Any
+
+logger = logging.getLogger(__name__)
+
+Number = Union[int, float]
+
+# Cost model: bounds on input size, tree size and the size of any intermediate integer
+MAX_EXPRESSION_LENGTH = 200
+MAX_NODES = 64
+MAX_INT_BITS = 4096
+MAX_FACTORIAL = 170
+MAX_ROUND_DIGITS = 15
+
+class MathError(ValueError):
+    """Expression is not allowed, too costly or mathematically undefined"""
+
+def _factorial(n: Number) -> int:
+    if not float(n).is_integer() or not 0 <= n <= MAX_FACTORIAL:
+        raise MathError(f"factorial needs a whole number from 0 to {MAX_FACTORIAL}")
+    return math.factorial(int(n))
+
+def _round(value: Number, ndigits: Optional[Number] = None) -> Number:
+    # round(2, -10**7) builds a 10**7 digit power of ten, so ndigits is bounded like a power
+    if ndigits is None:
+        return round(value)
+    if not float(ndigits).is_integer() or abs(ndigits) > MAX_ROUND_DIGITS:
+        raise MathError(f"round needs a whole number of digits from -{MAX_ROUND_DIGITS} to {MAX_ROUND_DIGITS}")
+    return round(value, int(ndigits))
+
+FUNCTIONS = {
+    'sqrt': math.sqrt, 'abs': abs, 'round': _round, 'min': min, 'max': max,
+    'log': math.log, 'ln': math.log, 'log10': math.log10, 'log2': math.log2, 'exp': math.exp,
+    'sin': math.sin, 'cos': math.cos, 'tan': math.tan, 'floor': math.floor, 'ceil': math.ceil,
+    'factorial': _factorial
+}
+CONSTANTS = {'pi': math.pi, 'e': math.e, 'tau': math.tau}
+
+BINARY_OPERATORS = {
+    ast.Add: operator.add, ast.Sub: operator.sub, ast.Mult: operator.mul, ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv, ast.Mod: operator.mod, ast.Pow: operator.pow
+}
+UNARY_OPERATORS = {ast.UAdd: operator.pos, ast.USub: operator.neg}
+
+NUMBER = r'\d+(?:\.\d+)?'
+
+# Spoken and typographic forms rewritten to Python syntax, in order
+REWRITES = [
+    (re.compile(r'[×✕]'), '*'), (re.compile(r'÷'), '/'), (re.compile(r'[−–]'), '-'),
+    (re.compile(r'(?<=\d),(?=\d{3}\b)'), ''),                         # 1,000 -> 1000
+    (re.compile(r'\bplus\b'), '+'), (re.compile(r'\bminus\b'), '-'),
+    (re.compile(r'\b(?:times|multiplied by)\b'), '*'), (re.compile(r'\bdivided by\b'), '/'),
+    (re.compile(r'\b(?:to the power of|raised to(?: the power of)?)\b'), '**'),
+    (re.compile(r'\bmod(?:ulo)?\b'), '%'),
+    (re.compile(rf'\bsquare root of\s*({NUMBER})'), r'sqrt(\1)'),
+    (re.compile(r'\s*\bsquared\b'), '**2'), (re.compile(r'\s*\bcubed\b'), '**3'),
+    (re.compile(r'(?<=[\d)])\s*x\s*(?=[\d(])'), '*'),
+    (re.compile(r'\^'), '**'),
+    # "15% of 200" and a bare "15%" are percentages; "10 % 3" stays modulo
+    (re.compile(rf'({NUMBER})\s*%\s*of\b'), r'(\1/100)*'),
+    (re.compile(rf'({NUMBER})\s*%(?!\s*[\d(.])'), r'(\1/100)'),
+]
+
+# Words allowed around the expression; anything else means it is not (only) a math question
+FILLER = re.compile(
+    r"\b(?:what(?:'s|s)?|is|are|calculate|compute|evaluate|solve|the|value|result|answer|of|"
+    r"please|tell|me|how|much|equals?|give|find|work|out|can|you|do|does|make)\b|[?!=:]"
+)
+EXPRESSION = re.compile(
+    r'(?:\s|[\d.+\-*/%(),]|\b(?:' + '|'.join(sorted(list(FUNCTIONS) + list(CONSTANTS), key=len, reverse=True)) + r')\b)+'
+)
+
+def extract_expression(text: str) -> Optional[str]:
+    """The arithmetic expression a (lowercased) query asks for, or None if it is not a math question"""
+    if not any(char.isdigit() for char in text) or len(text) > MAX_EXPRESSION_LENGTH:
+        return None
+
+    for pattern, replacement in REWRITES:
+        text = pattern.sub(replacement, text)
+    expression = re.sub(r'\s+', ' ', FILLER.sub(' ', text)).strip(' .,')
+    if not expression or not EXPRESSION.fullmatch(expression):
+        return None
+
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except (SyntaxError, ValueError):
+        return None
+    # A lone number or "-5" is not a calculation
+    if not any(isinstance(node, (ast.BinOp, ast.Call)) for node in ast.walk(tree)):
+        return None
+    return expression
+
+def evaluate(expression: str) -> Number:
+    """Evaluate a whitelisted arithmetic expression within the cost budget"""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise MathError("expression is too long")
+    try:
+        tree = ast.parse(expression, mode='eval')
+    except (SyntaxError, ValueError) as e:
+        raise MathError(f"not an arithmetic expression: {e}")
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise MathError("expression is too complex")
+
+    try:
+        return _evaluate(tree.body)
+    except ZeroDivisionError:
+        raise MathError("division by zero is undefined")
+    except OverflowError:
+        raise MathError("result is too large")
+    except (ValueError, TypeError) as e:
+        if isinstance(e, MathError):
+            raise
+        raise MathError(f"undefined: {e}")
+
+def _evaluate(node: ast.AST) -> Number:
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return _check_size(node.value)
+
+    if isinstance(node, ast.Name) and node.id in CONSTANTS:
+        return CONSTANTS[node.id]
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in UNARY_OPERATORS:
+        return UNARY_OPERATORS[type(node.op)](_evaluate(node.operand))
+
+    if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPERATORS:
+        left, right = _evaluate(node.left), _evaluate(node.right)
+        if isinstance(node.op, ast.Pow):
+            _check_power(left, right)
+        return _check_size(BINARY_OPERATORS[type(node.op)](left, right))
+
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS
+            and not node.keywords and 0 < len(node.args) <= 4):
+        return _check_size(FUNCTIONS[node.func.id](*(_evaluate(arg) for arg in node.args)))
+
+    raise MathError(f"'{ast.unparse(node)}' is not allowed")
+
+def _check_power(base: Number, exponent: Number):
+    """Refuse powers whose result would exceed the integer budget before computing them"""
+    if abs(base) > 1 and exponent > 0:
+        if exponent * math.log2(abs(base)) > MAX_INT_BITS:
+            raise MathError("result is too large")
+
+def _check_size(value: Any) -> Number:
+    if isinstance(value, complex):
+        raise MathError("result is not a real number")
+    if isinstance(value, float) and not math.isfinite(value):
+        raise MathError("result is too large" if math.isinf(value) else "result is undefined")
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise MathError("result is too large")
+    return value
+
+def format_number(value: Number) -> str:
+    """Integers in full (scientific past 30 digits), floats to 10 significant digits"""
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            value = int(value)
+        else:
+            return f"{value:.10g}"
+    digits = str(abs(value))
+    if len(digits) > 30:
+        return f"{'-' if value < 0 else ''}{digits[0]}.{digits[1:7]}e+{len(digits) - 1}"
+    return str(value)
+
+def solve(text: str) -> Optional[Tuple[str, str]]:
+    """(expression, formatted result) for a math question, or None if it is not one"""
+    expression = extract_expression(text)
+    if expression is None:
+        return None
+    return expression, format_number(evaluate(expression))
+
+def get_limits() -> Dict[str, int]:
+    """Cost budget, for stats endpoints"""
+    return {
+        "max_expression_length": MAX_EXPRESSION_LENGTH,
+        "max_nodes": MAX_NODES,
+        "max_int_bits": MAX_INT_BITS,
+        "max_factorial": MAX_FACTORIAL,
+        "max_round_digits": MAX_ROUND_DIGITS
+    }
@@ -0,0 +1,124 @@
+"""
+Shared registry of precompiled regex rule sets
+Each rule set is compiled once into a single alternation with one named group per rule,
+so a check is one scan of the string and the matching group tells the rules apart
+"""
+import re
+import logging
+import threading
+from typing import Dict, Iterable, List, Optional, Set, Union, Any
+
+logger = logging.getLogger(__name__)
+
+class PatternSet:
+    """One compiled alternation over a rule set; rules are labelled, labels default to the pattern"""
+
+    def __init__(self, name: str, rules: Union[Dict[str, str], Iterable[str]], flags: int = re.IGNORECASE):
+        if not isinstance(rules, dict):
+            rules = {pattern: pattern for pattern in rules}
+        for pattern in rules.values():
+            # Group numbers shift once rules share an alternation; use (?P<name>..)/(?P=name) instead
+            if re.search(r'\\[1-9]', pattern):
+                raise ValueError(f"Pattern set '{name}' uses a numbered backreference: {pattern}")
+
+        self.name = name
+        self.rules = dict(rules)
+        self.flags = flags
+        self.labels: List[str] = list(rules)
+        self._groups = {f"_r{index}": label for index, label in enumerate(self.labels)}
+
+        # A \b every rule starts with is checked once per position instead of once per branch,
+        # which lets each branch start with a literal again (about 4x faster scans)
+        prefix = r'\b' if rules and all(
+            pattern.startswith(r'\b') and not _has_top_level_alternation(pattern) for pattern in rules.values()
+        ) else ''
+        bodies = [rules[label][len(prefix):] for label in self.labels]
+        branches = "|".join(f"(?P<_r{index}>{body})" for index, body in enumerate(bodies))
+        self.regex = re.compile(f"{prefix}(?:{branches})" if prefix else branches, flags)
+
+        # Yes/no checks skip the rule groups: sre can only skip ahead to the possible first
+        # characters of plain literal branches, which the groups (and IGNORECASE) hide from it
+        plain = "|".join(bodies)
+        self.scanner = re.compile(f"{prefix}(?:{plain})" if prefix else plain, flags)
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def _label(self, match: re.Match) -> str:
+        # lastgroup is the enclosing rule group unless a named group inside the rule closed later
+        label = self._groups.get(match.lastgroup)
+        if label is None:
+            group = next(name for name in self._groups if match.group(name) is not None)
+            label = self._groups[group]
+        return label
+
+    def contains(self, text: str) -> bool:
+        """Whether any rule matches"""
+        return self.scanner.search(text) is not None
+
+    def search(self, text: str) -> Optional[str]:
+        """Label of the leftmost matching rule, or None"""
+        match = self.regex.search(text)
+        return self._label(match) if match else None
+
+    def matches(self, text: str) -> Set[str]:
+        """Labels of every rule matched in one left-to-right scan (matches do not overlap)"""
+        return {self._label(match) for match in self.regex.finditer(text)}
+
+    def sub(self, replacements: Dict[str, str], text: str) -> str:
+        """Replace each match with its rule's literal replacement in one pass"""
+        return self.regex.sub(lambda match: replacements[self._label(match)], text)
+
+def _has_top_level_alternation(pattern: str) -> bool:
+    """Whether a '|' outside any group or character class splits the pattern"""
+    depth, in_class, escaped = 0, False, False
+    for char in pattern:
+        if escaped:
+            escaped = False
+        elif char == '\\':
+            escaped = True
+        elif in_class:
+            in_class = char != ']'
+        elif char == '[':
+            in_class = True
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            return True
+    return False
+
+class PatternRegistry:
+    """Compiles each named rule set once and hands out the shared PatternSet"""
+
+    def __init__(self):
+        self._sets: Dict[str, PatternSet] = {}
+        self._lock = threading.Lock()
+
+    def compile(self, name: str, rules: Union[Dict[str, str], Iterable[str]],
+                flags: int = re.IGNORECASE) -> PatternSet:
+        """Compile (or recompile, when the rules changed) a rule set under a name"""
+        if not isinstance(rules, dict):
+            rules = {pattern: pattern for pattern in rules}
+        with self._lock:
+            existing = self._sets.get(name)
+            if existing is not None and existing.rules == rules and existing.flags == flags:
+                return existing
+            pattern_set = PatternSet(name, rules, flags)
+            self._sets[name] = pattern_set
+            logger.debug(f"Pattern set '{name}' compiled: {len(pattern_set)} rules")
+            return pattern_set
+
+    def get(self, name: str) -> Optional[PatternSet]:
+        return self._sets.get(name)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get compiled rule sets and their sizes"""
+        return {
+            "sets": len(self._sets),
+            "rules": {name: len(pattern_set) for name, pattern_set in self._sets.items()}
+        }
+
+# Shared by the safety checker, preprocessor, memory and pipeline
+pattern_registry = PatternRegistry()
@@ -0,0 +1,52 @@
+"""
+Per-request query analysis
+Everything the pipeline, splitter, formatter and safety checker derive from the query text,
+computed once and shared read-only for the rest of the request
+"""
+from types import MappingProxyType
+from typing import Dict, Optional, Set, Tuple, Any
+
+class QueryAnalysis:
+    """Immutable, slot-based result of analysing one query"""
+
+    __slots__ = (
+        'query',         # original text
+        'lowered',       # lowercased and stripped, before typo fixes
+        'normalized',    # lowercased with typo fixes applied
+        'language',
+        'matches',       # keyword_matcher category -> matched terms
+        'keyword_hits',  # intent -> matched keywords
+        'intents',       # intents with at least one hit, in SEMANTIC_MAP order
+        'people',        # people mentioned (QuerySplitter names)
+        'wants_images',
+        'length_class',  # short / medium / detailed
+        'math_expression'  # arithmetic the query asks for (utils.math_eval), or None
+    )
+
+    def __init__(self, query: str, lowered: str, normalized: str, language: str,
+                 keyword_hits: Dict[str, Tuple[str, ...]], people: Tuple[str, ...],
+                 wants_images: bool, length_class: str, matches: Dict[str, Set[str]] = None,
+                 math_expression: Optional[str] = None):
+        for name, value in (
+            ('query', query), ('lowered', lowered), ('normalized', normalized),
+            ('language', language),
+            ('matches', MappingProxyType({c: frozenset(t) for c, t in (matches or {}).items()})),
+            ('keyword_hits', MappingProxyType(dict(keyword_hits))), ('intents', tuple(keyword_hits)),
+            ('people', people), ('wants_images', wants_images), ('length_class', length_class),
+            ('math_expression', math_expression)
+        ):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError("QueryAnalysis is immutable")
+
+    def __delattr__(self, name: str):
+        raise AttributeError("QueryAnalysis is immutable")
+
+    @property
+    def primary_intent(self) -> str:
+        return self.intents[0] if self.intents else 'general'
+
+    def __repr__(self) -> str:
+        return (f"QueryAnalysis(normalized={self.normalized!r}, intents={self.intents}, "
+                f"people={self.people}, length_class={self.length_class!r})")
@@ -4,7 +4,9 @@ Separates questions about different people clearly
 """
 import re
 import logging
-from typing import List, Dict, Any
+from typing import List, Dict, Set, Any, Optional, Iterable
+
+from utils.keyword_matcher import keyword_matcher
 
 logger = logging.getLogger(__name__)
 
@@ -34,23 +36,53 @@ class QuerySplitter:
             r'\balso\b',               # "also tell me"
             r'[,;]',                   # Comma/semicolon separators
         ]
+        
+        self.split_topics = [
+            'project', 'skill', 'education', 'contact', 'experience', 
+            'qualification', 'work', 'development', 'programming'
+        ]
+        self.split_conjunctions = [
+            'and', 'also', 'plus', 'additionally', 'furthermore',
+            'what about', 'tell me about', 'along with'
+        ]
+        
+        # Adil is matched liberally (substrings), everyone else on word boundaries
+        for person, patterns in self.person_patterns.items():
+            keyword_matcher.add(f"person:{person}", patterns, whole_word=person != 'adil')
+        keyword_matcher.add("split:topic", self.split_topics)
+        keyword_matcher.add("split:conjunction", self.split_conjunctions)
 
-    def split_query(self, query: str) -> List[Dict[str, str]]:
-        """Split query into parts and detect person-specific queries"""
+    def add_person(self, person: str, patterns: Iterable[str]):
+        """Teach the splitter a new person (e.g. someone added to Adil.txt)"""
+        patterns = [p.lower() for p in patterns]
+        known = self.person_patterns.setdefault(person, [])
+        known.extend(p for p in patterns if p not in known)
+        keyword_matcher.add(f"person:{person}", patterns, whole_word=True)
+
+    def split_query(self, query: str, people: Optional[List[str]] = None,
+                    matches: Optional[Dict[str, Set[str]]] = None) -> List[Dict[str, str]]:
+        """Split query into parts and detect person-specific queries
+
+        people and matches (keyword_matcher output) skip detection when the caller
+        already has them (QueryAnalysis).
+        """
         
         if not query or len(query.strip()) < 10:
             return [{"query": query, "intent": self._detect_intent(query)}]
         
         try:
+            if matches is None:
+                matches = keyword_matcher.match(query)
+            
             # First check for multi-person queries
-            people_mentioned = self._detect_people_in_query(query)
+            people_mentioned = list(people) if people is not None else self.detect_people(query, matches)
             
             if len(people_mentioned) > 1:
                 # Split by people - this is the key improvement
                 return self._split_by_people(query, people_mentioned)
             
             # Check for multi-topic queries about Adil
-            if self._should_split_topics(query):
+            if self._should_split_topics(query, matches):
                 return self._split_by_topics(query)
             
             # Single query - determine if it's about Adil or others
@@ -67,31 +99,13 @@ class QuerySplitter:
             logger.error(f"Query splitting error: {e}")
             return [{"query": query, "intent": "general"}]
 
-    def _detect_people_in_query(self, query: str) -> List[str]:
+    def detect_people(self, query: str, matches: Optional[Dict[str, Set[str]]] = None) -> List[str]:
         """Detect which people are mentioned in the query"""
         
-        query_lower = query.lower()
-        people_found = []
-        
-        # More precise detection
-        for person, patterns in self.person_patterns.items():
-            # Check for exact matches or word boundaries
-            for pattern in patterns:
-                if person == 'adil':
-                    # For Adil, be more liberal with matching
-                    if (pattern in query_lower or 
-                        re.search(rf'\b{re.escape(pattern)}\b', query_lower)):
-                        if person not in people_found:
-                            people_found.append(person)
-                        break
-                else:
-                    # For others, require exact word boundary matches
-                    if re.search(rf'\b{re.escape(pattern)}\b', query_lower):
-                        if person not in people_found:
-                            people_found.append(person)
-                        break
+        if matches is None:
+            matches = keyword_matcher.match(query)
         
-        return people_found
+        return [person for person in self.person_patterns if f"person:{person}" in matches]
 
     def _split_by_people(self, query: str, people: List[str]) -> List[Dict[str, str]]:
         """Split query by different people mentioned"""
@@ -181,26 +195,14 @@ class QuerySplitter:
         
         return f"Who is {proper_name}?"
 
-    def _should_split_topics(self, query: str) -> bool:
+    def _should_split_topics(self, query: str, matches: Optional[Dict[str, Set[str]]] = None) -> bool:
         """Check if query should be split by topics (enhanced)"""
         
-        query_lower = query.lower()
-        
-        # More comprehensive topic detection
-        topics = [
-            'project', 'skill', 'education', 'contact', 'experience', 
-            'qualification', 'work', 'development', 'programming'
-        ]
-        
-        topic_count = sum(1 for topic in topics if topic in query_lower)
-        
-        # Enhanced conjunction detection
-        conjunctions = [
-            'and', 'also', 'plus', 'additionally', 'furthermore',
-            'what about', 'tell me about', 'along with'
-        ]
+        if matches is None:
+            matches = keyword_matcher.match(query)
         
-        conjunction_count = sum(1 for conj in conjunctions if conj in query_lower)
+        topic_count = len(matches.get("split:topic", ()))
+        conjunction_count = len(matches.get("split:conjunction", ()))
         
         # Split if multiple topics AND conjunctions present
         return topic_count > 1 and conjunction_count > 0
@@ -217,7 +219,8 @@ class QuerySplitter:
                     cleaned_parts = []
                     
                     for part in parts:
-                        part = part.strip()
+                        # "... and also his projects" -> "projects"
+                        part = re.sub(r'^(?:also|plus|and)\s+(?:his\s+)?', '', part.strip(), flags=re.IGNORECASE)
                         if len(part) > 5:  # Skip very short parts
                             
                             # Ensure each part is a complete question
@@ -226,12 +229,9 @@ class QuerySplitter:
                             if not any(part_lower.startswith(word) for word in 
                                      ['what', 'who', 'tell', 'show', 'how', 'where', 'when']):
                                 # Make it a complete question about Adil
-                                if 'qualification' in part_lower or 'education' in part_lower:
-                                    part = f"What are Adil's qualifications and {part}"
-                                elif 'project' in part_lower:
-                                    part = f"What are Adil's projects and {part}"
-                                elif 'skill' in part_lower:
-                                    part = f"What are Adil's skills and {part}"
+                                if any(topic in part_lower for topic in
+                                       ['qualification', 'education', 'project', 'skill']):
+                                    part = f"What are Adil's {part.rstrip('?')}?"
                                 else:
                                     part = f"Tell me about Adil's {part}"
                             
@@ -300,7 +300,7 @@ class QuerySplitter:
     def get_query_metadata(self, query: str) -> Dict[str, Any]:
         """Get metadata about the query for debugging"""
         
-        people = self._detect_people_in_query(query)
+        people = self.detect_people(query)
         intent = self._detect_intent(query)
         should_split = self._should_split_topics(query)
         
@@ -0,0 +1,227 @@
+"""
+Symmetric-delete (SymSpell-style) typo correction
+Every vocabulary word is indexed under all its deletes up to the maximum edit distance, so
+correcting a token only needs the token's own deletes and a few dictionary lookups
+"""
+import re
+import logging
+from collections import Counter
+from pathlib import Path
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Any
+
+logger = logging.getLogger(__name__)
+
+WORD = re.compile(r"[a-z]+")
+# Query tokens keep a possessive or contraction attached ("adil's", "couldn't")
+TOKEN = re.compile(r"[a-z]+(?:'[a-z]+)?")
+
+# Everyday English the portfolio corpus may never use; known words are never "corrected"
+COMMON_WORDS = """
+about above account across after again against all almost also always among answer any anyone
+anything area around ask asked back because become been before being below best better between
+both bring build call came cannot care change check child city class close come company could
+country course create created current currently day details different does doing done down during
+each early either else enough even ever every example explain fact family feel few find first
+follow food found free friend friends from full game gave general give given going good great
+group hand happen happy hard have having head hear help here high himself hold home hope house
+however idea important inside instead interest into just keep kind know known large last later
+learn least leave left less life like line list little live long look made make many maybe mean
+might money more most much must name need never news next night nothing number often old once
+only open order other others over own part people person place plan platform play please point
+possible present problem program provide public question quite rather read real really reason
+right room same school seem sent should show side since small some someone something sometimes
+soon start still study such sure system take talk tell than thank thanks that their them then
+there these they thing things think this those though thought three through time today together
+told tough toward true trying turn under until upon used using very want water well were what
+when where whether which while whole whose why will with within without word work world would
+write wrong year years young your yourself
+""".split()
+
+# Endings that make a different word form, not a typo ("answer" -> "answers", "create" -> "created")
+INFLECTIONS = ('s', 'es', 'd', 'ed', 'ing', 'ly', 'y')
+
+def load_wordlist(path: Path) -> FrozenSet[str]:
+    """One lowercase word per line; empty when the file is missing"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return frozenset(line.strip() for line in f if line.strip())
+    except OSError as e:
+        logger.warning(f"English wordlist unavailable, only the corpus protects real words: {e}")
+        return frozenset()
+
+# General English words of correctable length: valid words are never "corrected" towards the
+# corpus ("beast" -> "best"), but they are not correction targets either
+ENGLISH_WORDS = load_wordlist(Path(__file__).with_name("english_words.txt"))
+
+class SpellCorrector:
+    """Corrects unknown tokens to the closest, most frequent vocabulary word"""
+
+    def __init__(self, max_edit_distance: int = 2, min_length: int = 5, cache_size: int = 4096,
+                 aliases: Dict[str, str] = None, dictionary: Optional[Iterable[str]] = None):
+        self.max_edit_distance = max_edit_distance
+        # Known-valid words outside the corpus (defaults to the bundled English wordlist)
+        self.dictionary = ENGLISH_WORDS if dictionary is None else frozenset(dictionary)
+        # Whole-token fixes applied before anything else, whatever the token length
+        self.aliases = dict(aliases or {})
+        # Shorter tokens are left alone ("kon", "hai", "phon" are too close to too much)
+        self.min_length = min_length
+        self.cache_size = cache_size
+        self.words: Dict[str, int] = {}
+        self.deletes: Dict[str, Set[str]] = {}
+        self._corrections: Dict[str, Optional[str]] = {}
+        self.stats = {"lookups": 0, "corrections": 0, "rejected_affix": 0, "cache_hits": 0, "builds": 0}
+
+    def update(self, vocabulary: Dict[str, int]) -> Dict[str, int]:
+        """Make the index match a new vocabulary, touching only the words that changed"""
+        vocabulary = {w: c for w, c in vocabulary.items() if WORD.fullmatch(w)}
+        removed = [w for w in self.words if w not in vocabulary]
+        added = [w for w in vocabulary if w not in self.words]
+
+        for word in removed:
+            for variant in self._variants(word):
+                bucket = self.deletes.get(variant)
+                if bucket is not None:
+                    bucket.discard(word)
+                    if not bucket:
+                        del self.deletes[variant]
+        for word in added:
+            for variant in self._variants(word):
+                self.deletes.setdefault(variant, set()).add(word)
+
+        self.words = dict(vocabulary)
+        if added or removed:
+            # Earlier answers may point at removed words or miss new ones
+            self._corrections.clear()
+        self.stats["builds"] += 1
+        logger.info(f"Spell index: {len(self.words)} words (+{len(added)}/-{len(removed)}), "
+                    f"{len(self.deletes)} delete keys")
+        return {"added": len(added), "removed": len(removed)}
+
+    def correct_token(self, token: str) -> str:
+        """Closest vocabulary word for an unknown token, or the token unchanged"""
+        alias = self.aliases.get(token)
+        if alias is not None:
+            return alias
+        if len(token) < self.min_length or self._is_known(token):
+            return token
+
+        self.stats["lookups"] += 1
+        if token in self._corrections:
+            self.stats["cache_hits"] += 1
+            correction = self._corrections[token]
+        else:
+            correction = self._lookup(token)
+            if len(self._corrections) >= self.cache_size:
+                self._corrections.clear()
+            self._corrections[token] = correction
+
+        if correction is None:
+            return token
+        if self._is_affix_edit(token, correction):
+            self.stats["rejected_affix"] += 1
+            return token
+        self.stats["corrections"] += 1
+        return correction
+
+    def _is_known(self, token: str) -> bool:
+        """A corpus or dictionary word, or an inflection of one ("pictures")"""
+        if token in self.words or token in self.dictionary:
+            return True
+        return any(token.endswith(ending) and (token[:-len(ending)] in self.words
+                                               or token[:-len(ending)] in self.dictionary)
+                   for ending in INFLECTIONS)
+
+    @staticmethod
+    def _is_affix_edit(token: str, correction: str) -> bool:
+        """The correction only adds or drops letters at one end, making another word rather than
+        fixing a typo ("sciences" -> "imsciences", "educational" -> "education", "answer" -> "answers")
+
+        A single letter that is not an inflection is still a typo ("experienc", "adill").
+        """
+        short, long = sorted((token, correction), key=len)
+        added = len(long) - len(short)
+        if long.startswith(short):
+            return added >= 2 or long[len(short):] in INFLECTIONS
+        return added >= 2 and long.endswith(short)
+
+    def correct(self, text: str) -> str:
+        """Correct every lowercase word in the text, leaving everything else as it was"""
+        return TOKEN.sub(self._correct_match, text)
+
+    def _correct_match(self, match: re.Match) -> str:
+        stem, apostrophe, suffix = match.group().partition("'")
+        if apostrophe and suffix != 's':
+            # Contractions ("couldn't", "you're") are not in any corpus; leave them be
+            return match.group()
+        return self.correct_token(stem) + apostrophe + suffix
+
+    def _max_distance(self, token: str) -> int:
+        # One edit for ordinary words, two only for long ones, where two edits are still distinctive
+        return min(self.max_edit_distance, 1 if len(token) < 8 else 2)
+
+    def _lookup(self, token: str) -> Optional[str]:
+        max_distance = self._max_distance(token)
+        best, best_distance, best_count = None, max_distance + 1, 0
+        seen = set()
+
+        # Deletes level by level: a word found through k deletes of the token is at least k
+        # edits away, so once a closer word is known the deeper levels cannot beat it
+        level = {token}
+        for deleted in range(max_distance + 1):
+            if deleted > best_distance:
+                break
+            for variant in level:
+                for word in self.deletes.get(variant, ()):
+                    if word in seen or abs(len(word) - len(token)) > max_distance:
+                        continue
+                    seen.add(word)
+                    distance = self._distance(token, word, best_distance + 1)
+                    count = self.words[word]
+                    if distance < best_distance or (distance == best_distance and count > best_count):
+                        best, best_distance, best_count = word, distance, count
+            level = {v[:i] + v[i + 1:] for v in level if len(v) > 1 for i in range(len(v))}
+        return best if best_distance <= max_distance else None
+
+    def _variants(self, word: str) -> Set[str]:
+        """The word and everything reachable from it by up to max_edit_distance deletes"""
+        variants = {word}
+        frontier = {word}
+        for _ in range(self.max_edit_distance):
+            frontier = {w[:i] + w[i + 1:] for w in frontier if len(w) > 1 for i in range(len(w))}
+            variants |= frontier
+        return variants
+
+    @staticmethod
+    def _distance(a: str, b: str, limit: int) -> int:
+        """Optimal string alignment distance (adjacent transpositions count once), capped at limit"""
+        if a == b:
+            return 0
+        previous2: List[int] = []
+        previous = list(range(len(b) + 1))
+        for i in range(1, len(a) + 1):
+            current = [i] + [0] * len(b)
+            for j in range(1, len(b) + 1):
+                cost = 0 if a[i - 1] == b[j - 1] else 1
+                current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+                if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                    current[j] = min(current[j], previous2[j - 2] + 1)
+            if min(current) >= limit:
+                return limit
+            previous2, previous = previous, current
+        return previous[-1]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get vocabulary size and correction counts"""
+        return {
+            "words": len(self.words),
+            "dictionary_words": len(self.dictionary),
+            "delete_keys": len(self.deletes),
+            **self.stats
+        }
+
+def count_words(texts: Iterable[str]) -> Dict[str, int]:
+    """Word frequencies over lowercased texts, for building the vocabulary"""
+    counts = Counter()
+    for text in texts:
+        counts.update(WORD.findall(text.lower()))
+    return dict(counts)
@@ -6,6 +6,9 @@ import re
 import logging
 from typing import Dict, List, Tuple, Any
 
+from utils.keyword_matcher import keyword_matcher
+from utils.pattern_registry import pattern_registry
+
 logger = logging.getLogger(__name__)
 
 class TextPreprocessor:
@@ -49,6 +52,27 @@ class TextPreprocessor:
             'education': ['study', 'learning', 'degree'],
             'experience': ['background', 'career', 'history']
         }
+        
+        # Corrections and synonyms each compile to one alternation, applied in a single pass
+        self.correction_set = pattern_registry.compile("preproc:corrections", list(self.corrections))
+        self.concept_replacements = {
+            r'\b' + re.escape(synonym) + r'\b': standard_term
+            for standard_term, synonyms in self.concept_map.items()
+            for synonym in synonyms
+        }
+        self.concept_set = pattern_registry.compile("preproc:concepts", list(self.concept_replacements))
+        
+        # Intent vocabulary for extract_intent
+        self.intent_keywords = {
+            'projects': ['project', 'work', 'build', 'app', 'development'],
+            'skills': ['skill', 'programming', 'technology'],
+            'education': ['education', 'degree', 'university', 'study'],
+            'contact': ['contact', 'email', 'phone', 'linkedin', 'hire'],
+            'about': ['who', 'about', 'background', 'bio'],
+            'experience': ['experience', 'career', 'history', 'work']
+        }
+        for intent, keywords in self.intent_keywords.items():
+            keyword_matcher.add(f"preproc:{intent}", keywords)
 
     async def process(self, text: str, language: str = "en") -> str:
         """Main preprocessing pipeline"""
@@ -91,23 +115,12 @@ class TextPreprocessor:
     def _apply_corrections(self, text: str) -> str:
         """Apply portfolio-specific corrections"""
         
-        for pattern, replacement in self.corrections.items():
-            text = re.sub(pattern, replacement, text, flags=re.IGNORECASE)
-        
-        return text
+        return self.correction_set.sub(self.corrections, text)
 
     def _normalize_concepts(self, text: str) -> str:
         """Normalize portfolio concepts"""
         
-        text_lower = text.lower()
-        
-        for standard_term, synonyms in self.concept_map.items():
-            for synonym in synonyms:
-                pattern = r'\b' + re.escape(synonym) + r'\b'
-                if re.search(pattern, text_lower):
-                    text = re.sub(pattern, standard_term, text, flags=re.IGNORECASE)
-        
-        return text
+        return self.concept_set.sub(self.concept_replacements, text)
 
     async def resolve_coreferences(self, text: str, context: Dict) -> str:
         """Simple coreference resolution"""
@@ -151,21 +164,12 @@ class TextPreprocessor:
     def extract_intent(self, text: str) -> Tuple[str, List[str]]:
         """Extract query intent"""
         
-        text_lower = text.lower()
-        
-        intent_keywords = {
-            'projects': ['project', 'work', 'build', 'app', 'development'],
-            'skills': ['skill', 'programming', 'technology'],
-            'education': ['education', 'degree', 'university', 'study'],
-            'contact': ['contact', 'email', 'phone', 'linkedin', 'hire'],
-            'about': ['who', 'about', 'background', 'bio'],
-            'experience': ['experience', 'career', 'history', 'work']
-        }
+        matches = keyword_matcher.match(text)
         
         # Score intents
         intent_scores = {}
-        for intent, keywords in intent_keywords.items():
-            score = sum(1 for keyword in keywords if keyword in text_lower)
+        for intent in self.intent_keywords:
+            score = len(matches.get(f"preproc:{intent}", ()))
             if score > 0:
                 intent_scores[intent] = score
         
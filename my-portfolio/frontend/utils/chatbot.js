@@ -4,6 +4,7 @@ class PortfolioChatbot {
         this.messages = [];
         this.localStorageKey = "portfolioChatHistory";
         this.backendUrl = "http://127.0.0.1:8000/api/v1/chat";
+        this.streamUrl = "http://127.0.0.1:8000/api/v1/chat/stream";
         this.isTyping = false;
         this.isUserScrolling = false;
         this.isGeneratingResponse = false;
@@ -241,16 +242,21 @@ openChat() {
 
         try {
             this.showTypingIndicator();
-            const botResponse = await this.getBotResponse(messageText);
-            this.hideTypingIndicator();
-            
-            // NEW: Handle both text and images
-            await this.streamMessageText(botResponse.answer || botResponse, {
-                sources: botResponse.sources || [],
-                queryType: botResponse.query_type || 'unknown',
-                images: botResponse.images || [],
-                showImagesAfter: botResponse.show_images_after_ms || 0
-            });
+
+            // Prefer real token streaming; fall back to the buffered endpoint
+            const streamed = await this.streamBotResponse(messageText);
+            if (!streamed) {
+                const botResponse = await this.getBotResponse(messageText);
+                this.hideTypingIndicator();
+                
+                // NEW: Handle both text and images
+                await this.streamMessageText(botResponse.answer || botResponse, {
+                    sources: botResponse.sources || [],
+                    queryType: botResponse.query_type || 'unknown',
+                    images: botResponse.images || [],
+                    showImagesAfter: botResponse.show_images_after_ms || 0
+                });
+            }
         } catch (error) {
             this.hideTypingIndicator();
             console.error('Chat error:', error);
@@ -370,6 +376,138 @@ openChat() {
         this.scrollToBottom();
     }
 
+    // Stream tokens from the SSE endpoint as they arrive; returns false only if streaming is unavailable
+    async streamBotResponse(userMessage) {
+        let response;
+        try {
+            response = await fetch(this.streamUrl, {
+                method: 'POST',
+                headers: { 
+                    'Content-Type': 'application/json', 
+                    'Accept': 'text/event-stream' 
+                },
+                body: JSON.stringify(this.buildRequestPayload(userMessage))
+            });
+        } catch (error) {
+            console.warn('Streaming unavailable, using standard endpoint:', error);
+            return false;
+        }
+
+        // Fall back only when streaming itself is unavailable; a rejected query (400, 422)
+        // would just be rejected again by the buffered endpoint
+        if ([404, 405, 501].includes(response.status) || !response.body) return false;
+
+        if (!response.ok) {
+            const detail = await this.readErrorDetail(response);
+            this.hideTypingIndicator();
+            await this.streamMessageText(detail || this.getErrorMessage(new Error(`HTTP ${response.status}`)), { type: 'error' });
+            return true;
+        }
+
+        this.hideTypingIndicator();
+
+        const message = {
+            id: this.generateMessageId(),
+            text: '',
+            isUser: false,
+            timestamp: new Date().toISOString(),
+            metadata: {}
+        };
+
+        const chatMessages = document.getElementById('chat-messages');
+        const messageElement = document.createElement('div');
+        messageElement.className = 'message bot-message';
+        messageElement.id = message.id;
+        chatMessages?.appendChild(messageElement);
+
+        const render = (text) => {
+            messageElement.innerHTML = `
+                <div class="message-content">${this.parseSimpleMarkdown(text)}</div>
+                <div class="message-time">${this.formatTime(new Date(message.timestamp))}</div>
+            `;
+            if (Date.now() - this.lastScrollTime >= 100) {
+                this.scrollToBottom();
+                this.lastScrollTime = Date.now();
+            }
+        };
+
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        let streamedText = '';
+        let finalResponse = null;
+
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+
+            buffer += decoder.decode(value, { stream: true });
+            const frames = buffer.split('\n\n');
+            buffer = frames.pop();
+
+            for (const frame of frames) {
+                const event = this.parseSseFrame(frame);
+                if (!event) continue;
+
+                if (event.type === 'token' && this.isGeneratingResponse) {
+                    streamedText += event.data.content || '';
+                    render(streamedText);
+                } else if (event.type === 'done') {
+                    finalResponse = event.data;
+                }
+            }
+        }
+
+        // The final event carries the formatted answer, which replaces the raw tokens
+        message.text = finalResponse?.answer || streamedText || this.getErrorMessage(new Error('Empty stream'));
+        message.metadata = {
+            sources: finalResponse?.sources || [],
+            queryType: finalResponse?.query_type || 'unknown',
+            images: finalResponse?.images || [],
+            showImagesAfter: finalResponse?.show_images_after_ms || 0
+        };
+        this.messages.push(message);
+        this.saveHistory();
+        render(message.text);
+
+        if (message.metadata.images.length > 0) {
+            await this.handleImageDisplay(messageElement, message.metadata.images, message.metadata.showImagesAfter || 2500);
+        }
+
+        this.scrollToBottom();
+        return true;
+    }
+
+    parseSseFrame(frame) {
+        let type = 'message';
+        const dataLines = [];
+        for (const line of frame.split('\n')) {
+            if (line.startsWith('event:')) type = line.slice(6).trim();
+            else if (line.startsWith('data:')) dataLines.push(line.slice(5).trim());
+        }
+        if (!dataLines.length) return null;
+        try {
+            return { type, data: JSON.parse(dataLines.join('\n')) };
+        } catch (error) {
+            console.warn('Malformed stream event:', error);
+            return null;
+        }
+    }
+
+    buildRequestPayload(userMessage) {
+        return {
+            query: userMessage,
+            language: /[\u0600-\u06FF]/.test(userMessage) ? 'ur' : 'en',
+            session_id: this.sessionId,
+            timestamp: new Date().toISOString(),
+            conversation_history: this.messages.slice(-10).map(msg => ({
+                role: msg.isUser ? 'user' : 'assistant',
+                content: msg.text,
+                timestamp: msg.timestamp || new Date().toISOString()
+            }))
+        };
+    }
+
     async getBotResponse(userMessage) {
         try {
             const response = await fetch(this.backendUrl, {
@@ -378,17 +516,7 @@ openChat() {
                     'Content-Type': 'application/json', 
                     'Accept': 'application/json' 
                 },
-                body: JSON.stringify({
-                    query: userMessage,
-                    language: /[\u0600-\u06FF]/.test(userMessage) ? 'ur' : 'en',
-                    session_id: this.sessionId,
-                    timestamp: new Date().toISOString(),
-                    conversation_history: this.messages.slice(-10).map(msg => ({
-                        role: msg.isUser ? 'user' : 'assistant',
-                        content: msg.text,
-                        timestamp: msg.timestamp || new Date().toISOString()
-                    }))
-                })
+                body: JSON.stringify(this.buildRequestPayload(userMessage))
             });
             
             if (!response.ok) {
@@ -402,6 +530,16 @@ openChat() {
         }
     }
 
+    // The detail string of a FastAPI error body (validation errors carry a list instead)
+    async readErrorDetail(response) {
+        try {
+            const body = await response.json();
+            return typeof body.detail === 'string' ? body.detail : null;
+        } catch (error) {
+            return null;
+        }
+    }
+
     getErrorMessage(error) {
         if (error.message.includes('Failed to fetch')) return "Connection error. Check your internet connection.";
         return "I encountered an error. Please try again.";